@@ -10,7 +10,7 @@ source ../pombola-virtualenv/bin/activate
 
 ./manage.py hansard_check_for_new_sources
 ./manage.py hansard_process_sources
-./manage.py hansard_assign_speakers
+./manage.py hansard_assign_speakers --bulk
 
 # This will print out to STDOUT if it finds any. This should then get emailed to
 # the right people by the cron script.
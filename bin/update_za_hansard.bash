@@ -17,3 +17,7 @@ cd `dirname $0`/..
 
 # Run the committee minutes scraper and imports
 ./bin/run_management_command za_hansard_pmg_api_scraper --scrape --save-json --import-to-sayit --delete-existing --commit
+
+# The section summaries are kept up to date as speeches are imported,
+# but recreate them in case anything was changed without sending signals
+./bin/run_management_command south_africa_rebuild_section_summaries
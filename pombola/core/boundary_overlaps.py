@@ -0,0 +1,134 @@
+"""
+Work out how place boundaries change from one parliamentary session to the next.
+
+For each place in a session, this finds the places of the same kind in
+the previous and next sessions that overlap it, and what percentage of
+its area each one covers. The geometry operations are slow, so the
+areas are compared in a pool of processes; the results are stored as
+BoundaryOverlap rows, which Place.get_boundary_changes() reads. They
+only change when boundaries are redrawn, so this only needs to be run
+after new boundaries or sessions are added.
+"""
+
+from multiprocessing import Pool
+
+from django.db import connection, transaction
+
+from mapit.models import Area, Generation
+
+from pombola.core.models import BoundaryOverlap, Place, PlaceKind
+
+
+def area_overlaps(task):
+    """Return the percentage of an area covered by each area it overlaps
+
+    task is (area_id, type_code, generation_id), and only areas of that
+    type in that generation are considered. This is run in a worker
+    process, and only reads from the database. Returns the task with a
+    list of (other_area_id, percent)."""
+
+    area_id, type_code, generation_id = task
+    area = Area.objects.get(id=area_id)
+    polygons = area.polygons.collect()
+    if polygons is None or polygons.area == 0:
+        return task, []
+
+    overlaps = []
+    generation = Generation.objects.get(id=generation_id)
+    for other_area in Area.objects.intersect('intersects', area, [type_code], generation):
+        intersection = polygons.intersection(other_area.polygons.collect())
+        overlaps.append((other_area.id, 100 * intersection.area / polygons.area))
+    return task, overlaps
+
+
+def consecutive_sessions(kind):
+    """Return (session, other_session) for each pair of adjacent sessions of a place kind, both ways round"""
+
+    sessions = [
+        s for s in kind.parliamentary_sessions().order_by('start_date')
+        if s.mapit_generation]
+    pairs = []
+    for earlier, later in zip(sessions, sessions[1:]):
+        pairs.append((earlier, later))
+        pairs.append((later, earlier))
+    return pairs
+
+
+def update_boundary_overlaps(kinds=None, processes=None, verbose=False):
+    """Recalculate the BoundaryOverlap rows for places of the given kinds
+
+    If kinds isn't given, all place kinds are updated. processes is the
+    size of the pool of worker processes, which defaults to the number
+    of CPUs. The existing overlaps of each kind are only replaced once
+    all the new ones have been worked out."""
+
+    if kinds is None:
+        kinds = PlaceKind.objects.all()
+
+    # The places to compare, keyed on the task that compares them with
+    # the areas in the other session:
+    places_by_task = {}
+    # Places in each (kind, session), keyed on their MapIt area ID:
+    places_by_area = {}
+
+    for kind in kinds:
+        for session, other_session in consecutive_sessions(kind):
+            places_by_area[(kind.id, other_session.id)] = dict(
+                Place.objects
+                .filter(
+                    kind=kind,
+                    parliamentary_session=other_session,
+                    mapit_area__isnull=False)
+                .values_list('mapit_area', 'id'))
+
+            for place in (
+                    Place.objects
+                    .filter(
+                        kind=kind,
+                        parliamentary_session=session,
+                        mapit_area__isnull=False)
+                    .select_related('mapit_area__type')):
+                task = (
+                    place.mapit_area_id,
+                    place.mapit_area.type.code,
+                    other_session.mapit_generation)
+                places_by_task.setdefault(task, []).append(
+                    (place, (kind.id, other_session.id)))
+
+    overlaps = []
+
+    # Don't let the worker processes share this process's database
+    # connection; each opens its own.
+    connection.close()
+    pool = Pool(processes)
+    try:
+        for task, area_overlap_list in pool.imap_unordered(area_overlaps, places_by_task):
+            for place, other_key in places_by_task[task]:
+                other_places = places_by_area[other_key]
+                for other_area_id, percent in area_overlap_list:
+                    other_place_id = other_places.get(other_area_id)
+                    if other_place_id is None or other_place_id == place.id:
+                        continue
+                    overlaps.append(BoundaryOverlap(
+                        place=place,
+                        other_place_id=other_place_id,
+                        percent=percent))
+                if verbose:
+                    print "Found {0} overlaps for {1}".format(
+                        len(area_overlap_list), place.slug)
+    except:
+        pool.terminate()
+        raise
+    else:
+        pool.close()
+    finally:
+        pool.join()
+
+    store_boundary_overlaps(kinds, overlaps)
+    return overlaps
+
+
+@transaction.commit_on_success
+def store_boundary_overlaps(kinds, overlaps):
+    BoundaryOverlap.objects.filter(place__kind__in=list(kinds)).delete()
+    BoundaryOverlap.objects.bulk_create(overlaps)
@@ -1,6 +1,7 @@
 # This command creates a new PopIt instance based on the Person,
 # Position and Organisation models in Pombola.
 
+import datetime
 import json
 from optparse import make_option
 from os.path import exists, isdir, join
@@ -8,7 +9,12 @@ import slumber
 import sys
 import urlparse
 
-from pombola.core.popolo import get_popolo_data
+from pombola.core.popolo import (
+    iter_organizations, iter_people, output_file,
+    JSONListWriter, MongoExportWriter)
+from pombola.core.popolo_fragments import (
+    iter_stored_organizations, iter_stored_people, get_changes,
+    refresh_fragments, CHANGES_PERIOD)
 
 from django.core.management.base import BaseCommand, CommandError
 
@@ -27,6 +33,24 @@ class Command(BaseCommand):
                 action="store_true",
                 help="Make a single file with inline memberships, suitable for core_import_popolo"
             ),
+            make_option(
+                "--gzip",
+                dest="gzip",
+                action="store_true",
+                help="Compress the output files with gzip, adding .gz to their names"
+            ),
+            make_option(
+                "--incremental",
+                dest="incremental",
+                action="store_true",
+                help="Only regenerate the people and organisations updated since the last incremental export, and write a feed of changes to changes.json"
+            ),
+            make_option(
+                "--full",
+                dest="full",
+                action="store_true",
+                help="With --incremental, regenerate everyone and everything, to pick up any changes that aren't tracked"
+            ),
     )
 
     def handle(self, *args, **options):
@@ -45,31 +69,87 @@ class Command(BaseCommand):
 
         primary_id_scheme = '.'.join(reversed(parsed_url.netloc.split('.')))
 
+        if options['full'] and not options['incremental']:
+            raise CommandError("--full can only be used with --incremental")
+
+        compress = options['gzip']
         inline_memberships = options['pombola']
 
-        popolo_data = get_popolo_data(
-            primary_id_scheme,
-            pombola_url,
-            inline_memberships=inline_memberships
-        )
+        # The people and organisations are written out as they're
+        # generated, so that the whole export is never in memory at once.
+
+        if options['incremental']:
+            refresh_fragments(primary_id_scheme, pombola_url, full=options['full'])
+            people = iter_stored_people(inline_memberships=inline_memberships)
+            organizations = iter_stored_organizations()
+        else:
+            people = iter_people(
+                primary_id_scheme, pombola_url, inline_memberships=inline_memberships)
+            organizations = iter_organizations(primary_id_scheme, pombola_url)
 
         if options['pombola']:
-            output_filename = join(output_directory, 'pombola.json')
-            with open(output_filename, 'w') as f:
-                json.dump(popolo_data, f, indent=4, sort_keys=True)
+            self.write_pombola_file(output_directory, people, organizations, compress)
         else:
-            for collection, data in popolo_data.items():
-                for mongoexport_format in (True, False):
-                    if mongoexport_format:
-                        output_basename = 'mongo-' + collection + '.dump'
-                    else:
-                        output_basename = collection + ".json"
-                    output_filename = join(output_directory, output_basename)
-                    with open(output_filename, 'w') as f:
-                        if mongoexport_format:
-                            for item in data:
-                                item['_id'] = item['id']
-                                json.dump(item, f, sort_keys=True)
-                                f.write("\n")
-                        else:
-                            json.dump(data, f, indent=4, sort_keys=True)
+            self.write_collection_files(output_directory, people, organizations, compress)
+
+        if options['incremental']:
+            changes = get_changes(datetime.datetime.now() - CHANGES_PERIOD)
+            with output_file(join(output_directory, 'changes.json'), compress) as f:
+                json.dump(changes, f, indent=4, sort_keys=True)
+
+    def write_pombola_file(self, output_directory, people, organizations, compress):
+        output_filename = join(output_directory, 'pombola.json')
+        with output_file(output_filename, compress) as f:
+            f.write('{\n    "organizations": ')
+            writer = JSONListWriter(f, level=1)
+            for organization in organizations:
+                writer.write(organization)
+            writer.close()
+
+            f.write(',\n    "persons": ')
+            writer = JSONListWriter(f, level=1)
+            for person, memberships in people:
+                writer.write(person)
+            writer.close()
+
+            f.write(',\n    "posts": []\n}')
+
+    def write_collection_files(self, output_directory, people, organizations, compress):
+
+        def collection_files(collection):
+            return (
+                output_file(join(output_directory, collection + '.json'), compress),
+                output_file(join(output_directory, 'mongo-' + collection + '.dump'), compress),
+            )
+
+        def write_item(writers, item):
+            item['_id'] = item['id']
+            for writer in writers:
+                writer.write(item)
+
+        def close_writers(writers):
+            for writer in writers:
+                writer.close()
+
+        persons_json, persons_mongo = collection_files('persons')
+        memberships_json, memberships_mongo = collection_files('memberships')
+        with persons_json as pj, persons_mongo as pm, memberships_json as mj, memberships_mongo as mm:
+            person_writers = (JSONListWriter(pj), MongoExportWriter(pm))
+            membership_writers = (JSONListWriter(mj), MongoExportWriter(mm))
+            for person, memberships in people:
+                write_item(person_writers, person)
+                for membership in memberships:
+                    write_item(membership_writers, membership)
+            close_writers(person_writers)
+            close_writers(membership_writers)
+
+        organizations_json, organizations_mongo = collection_files('organizations')
+        with organizations_json as oj, organizations_mongo as om:
+            organization_writers = (JSONListWriter(oj), MongoExportWriter(om))
+            for organization in organizations:
+                write_item(organization_writers, organization)
+            close_writers(organization_writers)
+
+        posts_json, posts_mongo = collection_files('posts')
+        with posts_json as pj, posts_mongo as pm:
+            close_writers((JSONListWriter(pj), MongoExportWriter(pm)))
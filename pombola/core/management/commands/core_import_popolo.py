@@ -16,6 +16,7 @@ from pombola.core.models import (Organisation, OrganisationKind, Identifier,
                          PlaceKind, Person, Contact, ContactKind, Position,
                          PositionTitle, Place, PlaceKind)
 from pombola.images.models import Image
+from pombola.search.autocomplete import deferred_autocomplete_invalidation
 from mapit.models import Area, Generation
 
 VERBOSE = False
@@ -180,6 +181,7 @@ class Command(LabelCommand):
         make_option('--delete-old', action='store_true', dest='delete_old', help='Delete old positions, contacts, and alternative names and identifiers, assuming we have complete information to recreate them'),
         )
 
+    @deferred_autocomplete_invalidation()
     def handle_label(self,  input_filename, **options):
 
         # FIXME: currently this script relies on the slugs and names
@@ -25,7 +25,7 @@ from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 
 from mapit.models import Area, Generation, Type
-from pombola.core.models import Place, PlaceKind
+from pombola.core.models import Place, PlaceClosure, PlaceKind
 
 PROPORTION_OVERLAP_REQUIRED = 0.98
 
@@ -132,3 +132,7 @@ class Command(BaseCommand):
                                 child_type,
                                 parent_placekind,
                                 parent_type)
+
+        # Places that were left without a parent were only changed with
+        # update(), so bring the whole hierarchy up to date:
+        PlaceClosure.objects.rebuild()
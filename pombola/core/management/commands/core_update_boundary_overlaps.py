@@ -0,0 +1,37 @@
+from multiprocessing import cpu_count
+from optparse import make_option
+
+from django.core.management.base import NoArgsCommand, CommandError
+
+from pombola.core.boundary_overlaps import update_boundary_overlaps
+from pombola.core.models import PlaceKind
+
+
+class Command(NoArgsCommand):
+    help = 'Work out how places overlap with those of the same kind in adjacent parliamentary sessions'
+
+    option_list = NoArgsCommand.option_list + (
+        make_option('--processes', dest='processes', type='int', default=cpu_count(),
+                    help='Compare this many areas at once (defaults to the number of CPUs)'),
+        make_option('--kind', dest='kind_slugs', action='append', default=[],
+                    help='Only update places of the kind with this slug (may be repeated)'),
+    )
+
+    def handle_noargs(self, **options):
+        if options['processes'] < 1:
+            raise CommandError("--processes must be at least 1")
+
+        verbose = int(options['verbosity']) >= 2
+
+        kinds = PlaceKind.objects.all()
+        if options['kind_slugs']:
+            kinds = kinds.filter(slug__in=options['kind_slugs'])
+            if len(kinds) != len(options['kind_slugs']):
+                raise CommandError("Unknown place kind in: {0}".format(
+                    ', '.join(options['kind_slugs'])))
+
+        overlaps = update_boundary_overlaps(
+            list(kinds), processes=options['processes'], verbose=verbose)
+
+        if verbose:
+            print "Stored {0} boundary overlaps".format(len(overlaps))
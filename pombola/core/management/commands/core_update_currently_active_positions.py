@@ -0,0 +1,51 @@
+from optparse import make_option
+
+from django.core.management.base import NoArgsCommand
+from django.db import transaction
+
+from pombola.core.models import Person, Position
+from pombola.search.indexing import update_objects_in_search_index
+
+
+class Command(NoArgsCommand):
+
+    help = 'Refresh the is_currently_active flag on positions (run daily)'
+
+    option_list = NoArgsCommand.option_list + (
+        make_option('--commit', action='store_true', dest='commit', help='Actually update the database'),
+    )
+
+    @transaction.commit_on_success
+    def handle_noargs(self, **options):
+
+        # Positions that should be active today, decided from the
+        # start and end dates rather than the flag:
+        active_today = Position.objects.all().active_on()
+
+        newly_active = Position.objects.filter(is_currently_active=False, pk__in=active_today)
+        newly_inactive = Position.objects.filter(is_currently_active=True).exclude(pk__in=active_today)
+
+        verbosity = int(options['verbosity'])
+        if verbosity >= 2:
+            for position in newly_active:
+                print "  Now active: %s" % position
+            for position in newly_inactive:
+                print "  No longer active: %s" % position
+
+        if options['commit']:
+            # The current positions are shown in search results, so
+            # reindex the people whose positions have changed:
+            people_ids = set(newly_active.values_list('person_id', flat=True))
+            people_ids.update(newly_inactive.values_list('person_id', flat=True))
+
+            activated = newly_active.update(is_currently_active=True)
+            deactivated = newly_inactive.update(is_currently_active=False)
+
+            update_objects_in_search_index(
+                Person, Person.objects.filter(id__in=people_ids))
+        else:
+            activated = newly_active.count()
+            deactivated = newly_inactive.count()
+
+        if verbosity >= 1:
+            print "%d position(s) became active and %d ended" % (activated, deactivated)
@@ -0,0 +1,112 @@
+"""
+Cache the results of MapIt point-in-polygon and overlap lookups.
+
+Finding the areas that cover a point, or that overlap another area, means
+testing against the full boundary geometries, which is slow; but most of
+the lookups are for the same neighbourhoods over and over again. So the
+results (just area IDs) are kept in Django's cache, keyed on the location
+rounded to LOCATION_DECIMAL_PLACES, or on the area, and the generation.
+
+Every key includes a version that's replaced when boundaries or
+generations change (see the signal handlers in pombola.core.models), so
+nothing needs to be deleted from the cache when boundaries are imported.
+"""
+
+import uuid
+
+from django.contrib.gis.geos import Point
+from django.core.cache import cache
+
+from mapit.models import Area
+
+# 4 decimal places is about 11m, which is well within the accuracy of
+# the boundaries and of most geolocation.
+LOCATION_DECIMAL_PLACES = 4
+
+CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+CACHE_VERSION_KEY = 'mapit_cache_version'
+
+
+def get_cache_version():
+    version = cache.get(CACHE_VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(CACHE_VERSION_KEY, version, CACHE_TIMEOUT):
+            version = cache.get(CACHE_VERSION_KEY, version)
+    return version
+
+
+def invalidate_mapit_cache():
+    """Make sure no lookups from before now are used again"""
+    cache.set(CACHE_VERSION_KEY, uuid.uuid4().hex, CACHE_TIMEOUT)
+
+
+def cached_lookup(key_parts, lookup):
+    """Return the cached result for key_parts, calling lookup if there isn't one"""
+
+    key = ':'.join(['mapit', get_cache_version()] + [str(p) for p in key_parts])
+    result = cache.get(key)
+    if result is None:
+        result = lookup()
+        cache.set(key, result, CACHE_TIMEOUT)
+    return result
+
+
+def quantize_location(lat, lon):
+    """Round a location so that nearby lookups share a cache entry"""
+    return (round(lat, LOCATION_DECIMAL_PLACES),
+            round(lon, LOCATION_DECIMAL_PLACES))
+
+
+def area_ids_by_location(lat, lon, generation=None):
+    """Return the IDs of the MapIt areas that cover a location
+
+    If generation isn't specified, the current generation is used."""
+
+    lat, lon = quantize_location(lat, lon)
+    generation_id = generation.id if generation else 'current'
+
+    def lookup():
+        return list(
+            Area.objects
+            .by_location(Point(lon, lat), generation)
+            .values_list('id', flat=True)
+        )
+
+    return cached_lookup(('location', generation_id, lat, lon), lookup)
+
+
+def overlapping_area_ids(area, type_code, minimum_overlap, fallback_count):
+    """Return IDs of areas of a type that overlap area, largest overlap first
+
+    Only the areas that cover more than minimum_overlap (a proportion)
+    of area are returned; if there are none, the fallback_count areas
+    with the largest overlap are returned instead."""
+
+    def lookup():
+        polygons = area.polygons.collect()
+        candidates = Area.objects.filter(
+            type__code=type_code,
+            polygons__polygon__intersects=polygons,
+        ).distinct()
+
+        area_of_original = polygons.area
+
+        # calculate the overlap
+        size_of_overlap = {}
+        for candidate in candidates:
+            intersection = polygons.intersection(candidate.polygons.collect())
+            size_of_overlap[candidate.id] = intersection.area / area_of_original
+
+        # Sort the results by the overlap size; largest overlap first
+        area_ids = sorted(size_of_overlap,
+                          reverse=True,
+                          key=lambda a: size_of_overlap[a])
+
+        likely_area_ids = [a for a in area_ids if size_of_overlap[a] > minimum_overlap]
+        return likely_area_ids or area_ids[:fallback_count]
+
+    return cached_lookup(
+        ('overlaps', area.id, type_code, minimum_overlap, fallback_count),
+        lookup)
@@ -1,5 +1,6 @@
 from __future__ import division
 
+import calendar
 import datetime
 from functools import partial
 import re
@@ -14,7 +15,8 @@ from django.core.urlresolvers import reverse
 
 from django.db.models import Q
 from django.db import transaction
-from django.db.models.signals import post_init
+from django.db.models.signals import post_init, pre_save, post_save, post_delete
+from django.dispatch import receiver
 
 from django.utils.dateformat import DateFormat
 
@@ -36,6 +38,7 @@ from pombola.slug_helpers.models import validate_slug_not_redirecting
 
 from mapit import models as mapit_models
 
+from pombola.core.mapit_cache import invalidate_mapit_cache
 from pombola.country import significant_positions_filter
 
 # tell South how to handle the custom fields
@@ -310,6 +313,11 @@ class Person(ModelBase, HasImageMixin, ScorecardMixin, IdentifierMixin):
 
     contacts = generic.GenericRelation(Contact)
     images = generic.GenericRelation(Image)
+    # Kept up to date by Image.save(), so that primary_image() doesn't
+    # have to look through all the images:
+    cached_primary_image = models.ForeignKey(
+        Image, null=True, blank=True, editable=False,
+        on_delete=models.SET_NULL, related_name='+')
     objects = PersonManager()
 
     can_be_featured = models.BooleanField(default=False, help_text="can this person be featured on the home page (e.g., is their data appropriate and extant)?")
@@ -617,6 +625,11 @@ class Organisation(ModelBase, HasImageMixin, IdentifierMixin):
     objects = OrganisationManager()
     contacts = generic.GenericRelation(Contact)
     images = generic.GenericRelation(Image)
+    # Kept up to date by Image.save(), so that primary_image() doesn't
+    # have to look through all the images:
+    cached_primary_image = models.ForeignKey(
+        Image, null=True, blank=True, editable=False,
+        on_delete=models.SET_NULL, related_name='+')
     informationsources = generic.GenericRelation(InformationSource)
 
     def __unicode__(self):
@@ -744,14 +757,9 @@ class Place(ModelBase, ScorecardMixin, BudgetsMixin):
         except IndexError:
             return None
 
-    def related_people(self, positions_filter=significant_positions_filter):
-        """Find significant people associated with this place"""
-
-        positions = Position.objects.filter(
-            place=self,
-            person__hidden=False,
-        ).currently_active()
-        positions = positions_filter(positions)
+    @staticmethod
+    def group_positions_by_person(positions):
+        """Return a list of (person, positions) as related_people() does"""
 
         # Group all the positions by person:
         result_dict = defaultdict(list)
@@ -766,32 +774,74 @@ class Place(ModelBase, ScorecardMixin, BudgetsMixin):
         return sorted(result_dict.items(),
                       key=lambda t: t[0].sort_name)
 
+    def related_people(self, positions_filter=significant_positions_filter):
+        """Find significant people associated with this place"""
+
+        positions = Position.objects.filter(
+            place=self,
+            person__hidden=False,
+        ).currently_active()
+        positions = positions_filter(positions)
+        positions = positions.select_related(
+            'person__cached_primary_image', 'title', 'organisation', 'place')
+
+        return self.group_positions_by_person(positions)
+
     def related_people_child_places(self, positions_filter=significant_positions_filter):
-        """Find significant people associated with child places"""
+        """Find significant people associated with child places
 
-        results = []
-        for child_place in self.child_places.all():
-            people_and_positions = child_place.related_people(positions_filter)
-            if people_and_positions:
-                results.append((child_place, people_and_positions))
-        return results
+        This returns a list of (child_place, related_people) for each
+        child place with any related people, the same as calling
+        related_people() on each child place, but finds the positions
+        for all of them with a single query."""
+
+        positions = Position.objects.filter(
+            place__parent_place=self,
+            person__hidden=False,
+        ).currently_active()
+        positions = positions_filter(positions)
+        positions = positions.select_related(
+            'person__cached_primary_image', 'title', 'organisation', 'place')
+
+        positions_by_place = defaultdict(list)
+        for position in positions:
+            positions_by_place[position.place].append(position)
+
+        # Child places are in slug order, like self.child_places.all():
+        return [
+            (child_place, self.group_positions_by_person(place_positions))
+            for child_place, place_positions
+            in sorted(positions_by_place.items(), key=lambda t: t[0].slug)
+        ]
 
     def parent_places(self):
-        """Return an array of all the parent places."""
-        if self.parent_place:
-            parents = [ self.parent_place ]
-            parents.extend( self.parent_place.parent_places() )
-            # print parents
-            return parents
-        else:
-            return []
+        """Return an array of all the parent places, nearest first."""
+        return [
+            c.ancestor for c in
+            self.ancestor_closures
+            .filter(depth__gt=0)
+            .select_related('ancestor__kind')
+            .order_by('depth')
+        ]
 
     def self_and_parents(self):
         """Return a query set that matches this place and all parents."""
-        parents = self.parent_places()
-        ids     = [ x.id for x in parents ]
-        ids.append(self.id)
-        return Place.objects.filter(pk__in=ids)
+        return Place.objects.filter(descendant_closures__descendant=self)
+
+    def self_and_children(self):
+        """Return a query set that matches this place and all places below it."""
+        return Place.objects.filter(ancestor_closures__ancestor=self)
+
+    def parent_place_is_below(self):
+        """Return True if parent_place is this place or one of the places below it"""
+        return bool(
+            self.pk and self.parent_place_id and
+            self.self_and_children().filter(id=self.parent_place_id).exists())
+
+    def clean(self):
+        if self.parent_place_is_below():
+            raise exceptions.ValidationError(
+                "The parent place can't be this place or one of the places below it")
 
 
     def all_related_positions(self):
@@ -861,14 +911,18 @@ class Place(ModelBase, ScorecardMixin, BudgetsMixin):
         # area name in a note below the main changes:
         cutoff = 1
 
+        # Sessions without a MapIt generation are left out, as they
+        # are by core_update_boundary_overlaps, so the neighbouring
+        # sessions are the ones the overlaps were worked out for:
         previous_sessions = []
         next_sessions = []
         append_to = previous_sessions
-        for session in self.kind.parliamentary_sessions():
+        for session in self.kind.parliamentary_sessions().order_by('start_date'):
             if session == self.parliamentary_session:
                 append_to = next_sessions
                 continue
-            append_to.append(session)
+            if session.mapit_generation:
+                append_to.append(session)
 
         previous_session = previous_sessions[-1] if previous_sessions else None
         next_session = next_sessions[0] if next_sessions else None
@@ -885,30 +939,22 @@ class Place(ModelBase, ScorecardMixin, BudgetsMixin):
         # Occasionally a place will not have a MapIt area associated
         # with it; in these cases we can't find which boundaries it
         # overlaps with, so just return an empty dictionary.
-        if self.mapit_area is None:
+        if self.mapit_area_id is None:
             return result
 
+        # The overlaps are precomputed by core_update_boundary_overlaps:
+        overlaps_by_session = defaultdict(list)
+        for overlap in self.boundary_overlaps.select_related('other_place'):
+            other_place = overlap.other_place
+            overlaps_by_session[other_place.parliamentary_session_id].append(
+                (overlap.percent, other_place))
+
         for key, session in (('previous', previous_session),
                              ('next', next_session)):
             if not session:
                 result[key] = None
                 continue
-            intersections = []
-            for area in mapit_models.Area.objects.intersect('intersects',
-                                               self.mapit_area,
-                                               [self.mapit_area.type.code],
-                                               mapit_models.Generation.objects.get(pk=session.mapit_generation)):
-                # Now work out the % intersection between the two:
-                self_geos_geometry = self.mapit_area.polygons.collect()
-                if self_geos_geometry.area == 0:
-                    continue
-                other_geos_geometry = area.polygons.collect()
-                intersection = self_geos_geometry.intersection(other_geos_geometry)
-                proportion_shared = intersection.area / self_geos_geometry.area
-                intersections.append((100 * proportion_shared,
-                                      Place.objects.get(kind=self.kind,
-                                                        parliamentary_session=session,
-                                                        mapit_area=area)))
+            intersections = overlaps_by_session[session.id]
             intersections.sort(key=lambda x: -x[0])
             result[key] = {'session': session,
                            'connector': connectors[key][session.relative_time()],
@@ -946,29 +992,26 @@ class Place(ModelBase, ScorecardMixin, BudgetsMixin):
 
         found_any_aspirants = False
 
-        # This is a classically horrible thing to try to do with SQL -
-        # recurse up this place's hierarchy via the parent column -
-        # however, we know that there will only be at most 5 levels
-        # (Ward -> Constituency -> County -> Province -> Country) for
-        # Kenya, and the results of the query should be cached.
+        # Fetch the whole of this place's hierarchy at once from the
+        # closure table, then go up it until reaching a place from a
+        # non-overlapping parliamentary session.
 
-        place_hierarchy = []
+        ancestors = [self] + [
+            c.ancestor for c in
+            self.ancestor_closures
+            .filter(depth__gt=0)
+            .select_related('ancestor__parliamentary_session')
+            .order_by('depth')
+        ]
 
-        current_place = self
-        while True:
-            place_hierarchy.append(current_place)
-            parent = current_place.parent_place
+        place_hierarchy = [self]
+        for current_place, parent in zip(ancestors, ancestors[1:]):
             current_place_session = current_place.parliamentary_session
-            if parent:
-                # If the parent place is actually from a non-overlapping
-                # parliamentary sessions, stop recursing:
-                parent_session = parent.parliamentary_session
-                if parent_session and current_place_session:
-                    if not parent_session.overlaps(current_place_session):
-                        break
-                current_place = parent
-            else:
-                break
+            parent_session = parent.parliamentary_session
+            if parent_session and current_place_session:
+                if not parent_session.overlaps(current_place_session):
+                    break
+            place_hierarchy.append(parent)
 
         # Preserve the order of places in the hierarchy, but allow
         # fast lookups with a dict:
@@ -1039,37 +1082,44 @@ class PositionTitle(ModelBase):
        ordering = ["slug"]
 
 
+def position_date_or_today(when):
+    """Return when as a datetime.date, or today's date if it's None"""
+
+    if when == None:
+        return datetime.date.today()
+    if isinstance(when, datetime.datetime):
+        return when.date()
+    return when
+
+
 class PositionQuerySet(models.query.GeoQuerySet):
     def currently_active(self, when=None):
-        """Filter on start and end dates to limit to currently active positions"""
+        """Filter to limit to currently active positions
+
+        If no date is given this uses the denormalized
+        is_currently_active flag, which is set when a position is
+        saved and refreshed nightly by the
+        core_update_currently_active_positions management command.
+        For any other date the start and end dates are compared."""
 
         if when == None:
-            when = datetime.date.today()
+            return self.filter(is_currently_active=True)
 
-        now_approx = repr(ApproximateDate(year=when.year, month=when.month, day=when.day))
+        return self.active_on(when)
 
-        qs = (
-            self
-                .filter(sorting_start_date__lte=now_approx)
-                .filter(Q(sorting_end_date_high__gte=now_approx) | Q(end_date=''))
-        )
+    def active_on(self, when=None):
+        """Filter on start and end dates to limit to positions active on a date"""
+
+        when = position_date_or_today(when)
 
-        return qs
+        return self.filter(date_range_start__lte=when, date_range_end__gte=when)
 
     def currently_inactive(self, when=None):
         """Filter on start and end dates to limit to currently inactive positions"""
 
-        if when == None:
-            when = datetime.date.today()
-
-        now_approx = repr(ApproximateDate(year=when.year, month=when.month, day=when.day))
-
-        start_criteria = Q(start_date__gt=now_approx)
-        end_criteria = Q(sorting_end_date_high__lt=now_approx) & ~Q(end_date='')
+        when = position_date_or_today(when)
 
-        qs = self.filter(start_criteria | end_criteria)
-
-        return qs
+        return self.filter(Q(date_range_start__gt=when) | Q(date_range_end__lt=when))
 
 
     def aspirant_positions(self):
@@ -1172,6 +1222,23 @@ class Position(ModelBase, IdentifierMixin):
     sorting_start_date_high = models.CharField(editable=True, default='', max_length=10)
     sorting_end_date_high = models.CharField(editable=True, default='', max_length=10)
 
+    # The first and last days on which the position could be active,
+    # treating a partial date as covering its whole month or year.
+    # Unknown or 'past' start dates are stored as datetime.date.min,
+    # and unknown or 'future' end dates as datetime.date.max, so that
+    # the active_on() filter is just a pair of date comparisons. Filled
+    # in by code - see '_set_date_range' below. There is also a GiST
+    # index on the daterange of these for range queries in raw SQL -
+    # see POSITION_DATE_RANGE_SQL.
+    date_range_start = models.DateField(editable=False, default=datetime.date.min, db_index=True)
+    date_range_end = models.DateField(editable=False, default=datetime.date.max, db_index=True)
+
+    # Whether this position was active on the day it was last saved,
+    # or on the last run of core_update_currently_active_positions.
+    # This lets currently_active() be an index lookup rather than a
+    # comparison of the sorting date strings.
+    is_currently_active = models.BooleanField(default=False, db_index=True, editable=False)
+
     objects = PositionManager()
 
     def clean(self):
@@ -1310,11 +1377,48 @@ class Position(ModelBase, IdentifierMixin):
         self.sorting_start_date_high = re.sub('-00', '-99', sorting_start_date)
         self.sorting_end_date_high   = re.sub('-00', '-99', sorting_end_date)
 
+    def is_active_on(self, when=None):
+        """Return whether the position is active on a date (default today)
+
+        This must give the same answer as PositionQuerySet.active_on,
+        and relies on the date range having been set."""
+
+        when = position_date_or_today(when)
+
+        return self.date_range_start <= when <= self.date_range_end
+
+    def _set_date_range(self):
+        """Set the date range fields from the actual dates (does not call save())"""
+
+        start = self.start_date
+        end   = self.end_date
+
+        if not start or start.past:
+            self.date_range_start = datetime.date.min
+        elif start.future:
+            self.date_range_start = datetime.date.max
+        else:
+            self.date_range_start = datetime.date(start.year, start.month or 1, start.day or 1)
+
+        if not end or end.future:
+            self.date_range_end = datetime.date.max
+        elif end.past:
+            self.date_range_end = datetime.date.min
+        elif end.day:
+            self.date_range_end = datetime.date(end.year, end.month, end.day)
+        elif end.month:
+            last_day = calendar.monthrange(end.year, end.month)[1]
+            self.date_range_end = datetime.date(end.year, end.month, last_day)
+        else:
+            self.date_range_end = datetime.date(end.year, 12, 31)
+
     def is_nominated_politician(self):
         return self.title.slug == 'nominated-member-parliament'
 
     def save(self, *args, **kwargs):
         self._set_sorting_dates()
+        self._set_date_range()
+        self.is_currently_active = self.is_active_on()
         super(Position, self).save(*args, **kwargs)
 
     def __unicode__(self):
@@ -1330,6 +1434,22 @@ class Position(ModelBase, IdentifierMixin):
     class Meta:
         ordering = ['-sorting_end_date', '-sorting_start_date']
 
+
+# The SQL expression for a position's date range, as used in the GiST
+# index core_position_date_range_gist.  Use it (formatted with the
+# table name or alias) in raw SQL, for example:
+#
+#   WHERE {range} @> %s::date
+#   WHERE {range_a} && {range_b}
+#
+# so that PostgreSQL can use that index. If the end of a position is
+# before its start it's never active, so the range is empty.
+POSITION_DATE_RANGE_SQL = (
+    "(CASE WHEN {0}.date_range_start > {0}.date_range_end "
+    "THEN 'empty'::daterange "
+    "ELSE daterange({0}.date_range_start, {0}.date_range_end, '[]') END)"
+)
+
 class ParliamentarySession(ModelBase):
     start_date = DateField(blank=True, null=True)
     end_date = DateField(blank=True, null=True)
@@ -1416,6 +1536,149 @@ class OrganisationRelationship(ModelBase):
     kind = models.ForeignKey(OrganisationRelationshipKind)
 
 
+class PlaceClosureManager(models.Manager):
+
+    def update_for_place(self, place):
+        """Bring the rows for place and every place below it up to date
+
+        If the place's own rows don't match its parent_place, the rows
+        linking it and the places below it to the places above it are
+        replaced with ones for its new parent's ancestors."""
+
+        parent_id = place.parent_place_id
+        expected = [(place.id, 0)]
+        if parent_id:
+            expected.append((parent_id, 1))
+        current = self.filter(descendant=place, depth__lte=1).values_list('ancestor', 'depth')
+        if sorted(current) == sorted(expected):
+            return
+
+        subtree = list(self.filter(ancestor=place).values_list('descendant', 'depth'))
+        has_own_row = (place.id, 0) in subtree
+        if not has_own_row:
+            subtree.append((place.id, 0))
+        subtree_ids = [descendant_id for descendant_id, _ in subtree]
+
+        if not has_own_row:
+            self.create(ancestor=place, descendant=place, depth=0)
+
+        ancestors = []
+        if parent_id:
+            ancestors = list(self.filter(descendant=parent_id).values_list('ancestor', 'depth'))
+            if not ancestors:
+                try:
+                    self.update_for_place(place.parent_place)
+                except Place.DoesNotExist:
+                    # When loading fixtures the parent may not have
+                    # been saved yet; it'll pick this place up when it
+                    # is - see update_place_closure below.
+                    pass
+                ancestors = list(self.filter(descendant=parent_id).values_list('ancestor', 'depth'))
+
+        self.filter(descendant__in=subtree_ids).exclude(ancestor__in=subtree_ids).delete()
+        self.bulk_create(
+            PlaceClosure(
+                ancestor_id=ancestor_id,
+                descendant_id=descendant_id,
+                depth=ancestor_depth + 1 + descendant_depth)
+            for ancestor_id, ancestor_depth in ancestors
+            for descendant_id, descendant_depth in subtree
+        )
+
+    @transaction.commit_on_success
+    def rebuild(self):
+        """Replace every row with ones worked out from the parent_place of every Place
+
+        This is needed after parent_place has been changed without
+        saving the places, e.g. with a queryset update()."""
+
+        parents = dict(Place.objects.values_list('id', 'parent_place'))
+        closures = []
+        for place_id in parents:
+            ancestor_id, depth, seen = place_id, 0, set()
+            while ancestor_id is not None and ancestor_id not in seen:
+                closures.append(PlaceClosure(
+                    ancestor_id=ancestor_id, descendant_id=place_id, depth=depth))
+                seen.add(ancestor_id)
+                ancestor_id = parents.get(ancestor_id)
+                depth += 1
+        self.all().delete()
+        self.bulk_create(closures, batch_size=1000)
+
+
+class PlaceClosure(models.Model):
+    """A link between a place and one of the places above it in the hierarchy
+
+    Each place has a row linking it to itself with depth 0, to its
+    parent place with depth 1, to its parent's parent with depth 2,
+    and so on, so all the places above or below a place can be found
+    with a single join rather than by following parent_place one level
+    at a time. These are kept up to date whenever a Place is saved."""
+
+    ancestor = models.ForeignKey(Place, related_name='descendant_closures')
+    descendant = models.ForeignKey(Place, related_name='ancestor_closures')
+    depth = models.PositiveIntegerField()
+
+    objects = PlaceClosureManager()
+
+    def __unicode__(self):
+        return u'{0} is {1} below {2}'.format(self.descendant, self.depth, self.ancestor)
+
+    class Meta:
+        unique_together = ('ancestor', 'descendant')
+
+
+class BoundaryOverlap(models.Model):
+    """How much of a place is covered by a place of the same kind in another session
+
+    Working this out needs slow geometry operations on the MapIt
+    boundaries, so rather than doing it whenever a place page is shown,
+    core_update_boundary_overlaps works out the overlaps between places
+    in consecutive parliamentary sessions and stores them here for
+    Place.get_boundary_changes(). percent is the percentage of place's
+    area that is also in other_place."""
+
+    place = models.ForeignKey(Place, related_name='boundary_overlaps')
+    other_place = models.ForeignKey(Place, related_name='+')
+    percent = models.FloatField()
+
+    def __unicode__(self):
+        return u'{0:.1f}% of {1} is in {2}'.format(
+            self.percent, self.place, self.other_place)
+
+    class Meta:
+        unique_together = ('place', 'other_place')
+
+
+class PopoloFragment(ModelBase):
+    """The Popolo JSON last exported for a person or organisation
+
+    These are regenerated by core_export_to_popolo_json --incremental
+    only for people and organisations that have been updated since, and
+    the export files are then assembled from them. updated is when the
+    JSON last actually changed, so the fragments also make a feed of
+    changes; when an object is deleted its fragment is kept for a while
+    with deleted set, so that the deletion appears in the feed too."""
+
+    collection = models.CharField(max_length=20, choices=(
+        ('persons', 'Persons'),
+        ('organizations', 'Organizations'),
+    ))
+    object_id = models.PositiveIntegerField()
+    popolo_id = models.CharField(max_length=200)
+    data = models.TextField(blank=True)
+    deleted = models.BooleanField(default=False)
+    generated = models.DateTimeField()
+
+    objects = ManagerBase()
+
+    def __unicode__(self):
+        return self.popolo_id
+
+    class Meta:
+        unique_together = ('collection', 'object_id')
+
+
 def raw_query_with_prefetch(query_model, query, params, fields_prefetches):
     """A workaround not being able to do select_related on a RawQuerySet
 
@@ -1436,7 +1699,7 @@ def raw_query_with_prefetch(query_model, query, params, fields_prefetches):
             models.Position,
             'SELECT * FROM core_position WHERE ....',
             (), # Any parameters for the raw query
-            (('person', ('alternative_names', 'images')),
+            (('person', ('alternative_names', 'cached_primary_image')),
              ('organisation', ()))
         )
     """
@@ -1475,3 +1738,72 @@ def raw_query_with_prefetch(query_model, query, params, fields_prefetches):
             if related_object:
                 setattr(o, field, related_object)
     return objects
+
+
+@receiver(post_save, sender=mapit_models.Generation)
+@receiver(post_save, sender=mapit_models.Area)
+@receiver(post_delete, sender=mapit_models.Area)
+@receiver(post_save, sender=mapit_models.Geometry)
+@receiver(post_delete, sender=mapit_models.Geometry)
+def invalidate_mapit_cache_on_boundary_change(sender, **kwargs):
+    invalidate_mapit_cache()
+
+
+@receiver(pre_save, sender=Place)
+def check_place_is_not_below_itself(sender, instance, **kwargs):
+    # Place.clean() reports this in forms; this stops anything else
+    # from saving a loop, which the closure rows can't represent.
+    if instance.parent_place_is_below():
+        raise ValueError(
+            "Place {0} can't be the parent of {1}, which is above it".format(
+                instance.parent_place_id, instance.id))
+
+
+@receiver(post_save, sender=Place)
+def update_place_closure(sender, instance, raw=False, **kwargs):
+    PlaceClosure.objects.update_for_place(instance)
+    if raw:
+        # Fixtures can have places before their parents, so link up
+        # any children that were saved first:
+        for child in (
+                Place.objects
+                .filter(parent_place=instance)
+                .exclude(ancestor_closures__ancestor=instance)):
+            PlaceClosure.objects.update_for_place(child)
+
+
+def touch(model, **filters):
+    """Mark objects as updated without saving them or sending signals"""
+    model.objects.filter(**filters).update(updated=datetime.datetime.now())
+
+
+# A person or organisation's updated time should reflect changes to
+# everything that's exported with it, so that the incremental Popolo
+# export picks them up.
+
+@receiver(post_save, sender=Position)
+@receiver(post_delete, sender=Position)
+def touch_position_person_and_organisation(sender, instance, **kwargs):
+    touch(Person, id=instance.person_id)
+    if instance.organisation_id:
+        touch(Organisation, id=instance.organisation_id)
+
+
+@receiver(post_save, sender=AlternativePersonName)
+@receiver(post_delete, sender=AlternativePersonName)
+def touch_alternative_name_person(sender, instance, **kwargs):
+    touch(Person, id=instance.person_id)
+
+
+@receiver(post_save, sender=Contact)
+@receiver(post_delete, sender=Contact)
+@receiver(post_save, sender=Identifier)
+@receiver(post_delete, sender=Identifier)
+@receiver(post_save, sender=Image)
+@receiver(post_delete, sender=Image)
+def touch_content_object(sender, instance, **kwargs):
+    model = ContentType.objects.get_for_id(instance.content_type_id).model_class()
+    if model in (Person, Organisation):
+        touch(model, id=instance.object_id)
+    elif model is Position:
+        touch(Person, position=instance.object_id)
@@ -2,17 +2,24 @@ import sys
 import slumber
 import json
 import datetime
+import gzip
+import os
 from collections import defaultdict
+from contextlib import contextmanager
 from urlparse import urljoin
 
+from django.contrib.contenttypes.models import ContentType
 from django.core.management.base import BaseCommand, CommandError
 from django.core.urlresolvers import reverse
 from django.db import transaction
+from django.db.models import Q
 from django_date_extensions.fields import ApproximateDate
 
 from mapit.views.areas import area
 
-from pombola.core.models import Person, Organisation, Position
+from pombola.core.models import (
+    AlternativePersonName, Contact, Identifier, Organisation, Person, Position)
+from pombola.images.models import Image
 from pombola import country
 
 extra_popolo_person_fields = (
@@ -85,10 +92,128 @@ def date_to_partial_iso8601(approx_date):
         d = datetime.date(year, 1, 1)
         return d.strftime("%Y")
 
-def add_identifiers_to_properties(o, properties, primary_id_scheme):
+# The number of people or organisations that are exported at once; the
+# objects related to them are fetched together and then discarded, so
+# this bounds the memory used however large the database is.
+CHUNK_SIZE = 500
+
+def chunks(l, size):
+    """Split a list into lists of at most size items
+
+    >>> list(chunks([1, 2, 3, 4, 5], 2))
+    [[1, 2], [3, 4], [5]]
+    """
+    for i in range(0, len(l), size):
+        yield l[i:i + size]
+
+def in_bulk_in_order(queryset, ids):
+    """Return the objects in queryset with the given IDs, in that order"""
+    objects = dict((o.id, o) for o in queryset.filter(id__in=ids))
+    return [objects[i] for i in ids if i in objects]
+
+class RelatedObjects(object):
+    """The objects related to some people and organisations, fetched in bulk
+
+    Looking up the identifiers, contacts, images, alternative names
+    and positions of each object in turn takes tens of thousands of
+    queries for a large country, so instead each kind is fetched with
+    a single query and kept in dictionaries keyed on the object it
+    relates to. The lookups return the same thing as the corresponding
+    per-object methods."""
+
+    def __init__(self, person_ids=(), organisation_ids=()):
+        person_type = ContentType.objects.get_for_model(Person)
+        organisation_type = ContentType.objects.get_for_model(Organisation)
+        position_type = ContentType.objects.get_for_model(Position)
+
+        self.positions = defaultdict(list)
+        position_ids = []
+        if person_ids:
+            for position in (
+                    Position.objects
+                    .filter(person__in=person_ids)
+                    .select_related(
+                        'title',
+                        'organisation',
+                        'place__mapit_area__type',
+                        'place__parliamentary_session__house')):
+                self.positions[position.person_id].append(position)
+                position_ids.append(position.id)
+
+        self.identifiers = defaultdict(lambda: defaultdict(set))
+        identifiers_of = self.related_to(
+            (person_type, person_ids),
+            (organisation_type, organisation_ids),
+            (position_type, position_ids))
+        if identifiers_of:
+            for content_type_id, object_id, scheme, identifier in (
+                    Identifier.objects
+                    .filter(identifiers_of)
+                    .values_list('content_type', 'object_id', 'scheme', 'identifier')):
+                self.identifiers[(content_type_id, object_id)][scheme].add(identifier)
+
+        self.contacts = defaultdict(list)
+        contacts_of = self.related_to(
+            (person_type, person_ids),
+            (organisation_type, organisation_ids))
+        if contacts_of:
+            for contact in Contact.objects.filter(contacts_of).select_related('kind'):
+                self.contacts[(contact.content_type_id, contact.object_id)].append(contact)
+
+        self.person_images = {}
+        self.alternative_names = defaultdict(list)
+        if person_ids:
+            for image in (
+                    Image.objects
+                    .filter(
+                        content_type=person_type,
+                        object_id__in=person_ids,
+                        is_primary=True)
+                    .order_by('id')):
+                self.person_images.setdefault(image.object_id, image.image)
+
+            for alternative_name in (
+                    AlternativePersonName.objects
+                    .filter(person__in=person_ids)
+                    .order_by('person', 'id')):
+                self.alternative_names[alternative_name.person_id].append(alternative_name)
+
+    @staticmethod
+    def related_to(*content_types_and_ids):
+        """Return a Q matching generic relations to any of the objects, or None"""
+        q = None
+        for content_type, object_ids in content_types_and_ids:
+            if object_ids:
+                q_for_type = Q(content_type=content_type, object_id__in=object_ids)
+                q = q_for_type if q is None else q | q_for_type
+        return q
+
+    def key(self, o):
+        return (ContentType.objects.get_for_model(o).id, o.id)
+
+    def get_all_identifiers(self, o):
+        return self.identifiers.get(self.key(o), {})
+
+    def get_contacts(self, o):
+        return self.contacts.get(self.key(o), [])
+
+    def get_primary_image(self, person):
+        return self.person_images.get(person.id)
+
+    def get_alternative_names(self, person):
+        return self.alternative_names.get(person.id, [])
+
+    def get_positions(self, person):
+        return self.positions.get(person.id, [])
+
+def add_identifiers_to_properties(o, properties, primary_id_scheme, related=None):
     properties['id'] = o.get_popolo_id(primary_id_scheme)
+    if related is None:
+        all_identifiers = o.get_all_identifiers()
+    else:
+        all_identifiers = related.get_all_identifiers(o)
     secondary_identifiers = []
-    for scheme, identifiers in o.get_all_identifiers().items():
+    for scheme, identifiers in all_identifiers.items():
         sorted_identifiers = sorted(identifiers)
         secondary_identifiers.append({
             'scheme': scheme,
@@ -96,9 +221,13 @@ def add_identifiers_to_properties(o, properties, primary_id_scheme):
         })
     properties['identifiers'] = secondary_identifiers
 
-def add_contact_details_to_properties(o, properties):
+def add_contact_details_to_properties(o, properties, related=None):
+    if related is None:
+        all_contacts = o.contacts.all()
+    else:
+        all_contacts = related.get_contacts(o)
     contacts = []
-    for c in o.contacts.all():
+    for c in all_contacts:
         if not c.value:
             continue
         contact = {
@@ -121,26 +250,31 @@ def add_start_and_end_date(o, properties, start_key_map=None, end_key_map=None):
     if end_value and not end_value.future:
         properties[end_key_map[1]] = date_to_partial_iso8601(end_value)
 
-def add_other_names(person, properties):
+def add_other_names(person, properties, related=None):
+    if related is None:
+        alternative_names = person.alternative_names.all()
+    else:
+        alternative_names = related.get_alternative_names(person)
     properties['other_names'] = []
-    for an in person.alternative_names.all():
+    for an in alternative_names:
         an_properties = {'name': an.alternative_name}
         add_start_and_end_date(an, an_properties)
         if an.note:
             an_properties['note'] = an.note
         properties['other_names'].append(an_properties)
 
-def get_organizations(primary_id_scheme, base_url):
-    """Return a list of Popolo organization objects"""
-
-    result = []
+def get_organisation_categories():
+    """Return a dict mapping organisation slugs to their Popolo category"""
 
     oslug_to_categories = defaultdict(set)
 
-    for pos in Position.objects.all():
-        if pos.organisation:
-            slug = pos.organisation.slug
-            oslug_to_categories[slug].add(pos.category)
+    for slug, category in (
+            Position.objects
+            .filter(organisation__isnull=False)
+            .values_list('organisation__slug', 'category')
+            .order_by()
+            .distinct()):
+        oslug_to_categories[slug].add(category)
 
     all_categories = set()
     oslug_to_category = {}
@@ -172,22 +306,41 @@ def get_organizations(primary_id_scheme, base_url):
             print >> sys.stderr, error
         raise Exception, "Found organisations with multiple categories other than 'other'"
 
-    for o in Organisation.objects.all():
-        properties = {'slug': o.slug,
-                      'name': o.name.strip(),
-                      'classification': o.kind.name}
-        if o.slug in oslug_to_category:
-            properties['category'] = oslug_to_category[o.slug]
-        add_start_and_end_date(
-            o,
-            properties,
-            start_key_map=('started', 'founding_date'),
-            end_key_map=('ended', 'dissolution_date'))
-        add_identifiers_to_properties(o, properties, primary_id_scheme)
-        add_contact_details_to_properties(o, properties)
-        result.append(properties)
-        country.add_extra_popolo_data_for_organization(o, properties, base_url)
-    return result
+    return oslug_to_category
+
+def iter_organizations(primary_id_scheme, base_url, chunk_size=CHUNK_SIZE, organisation_ids=None):
+    """Generate Popolo organization objects, a chunk of organisations at a time
+
+    If organisation_ids is given only those organisations are included."""
+
+    oslug_to_category = get_organisation_categories()
+
+    organisations = country.prefetch_extra_popolo_data_for_organizations(
+        Organisation.objects.select_related('kind'))
+    if organisation_ids is None:
+        organisation_ids = list(Organisation.objects.values_list('id', flat=True))
+
+    for chunk_ids in chunks(organisation_ids, chunk_size):
+        related = RelatedObjects(organisation_ids=chunk_ids)
+        for o in in_bulk_in_order(organisations, chunk_ids):
+            properties = {'slug': o.slug,
+                          'name': o.name.strip(),
+                          'classification': o.kind.name}
+            if o.slug in oslug_to_category:
+                properties['category'] = oslug_to_category[o.slug]
+            add_start_and_end_date(
+                o,
+                properties,
+                start_key_map=('started', 'founding_date'),
+                end_key_map=('ended', 'dissolution_date'))
+            add_identifiers_to_properties(o, properties, primary_id_scheme, related)
+            add_contact_details_to_properties(o, properties, related)
+            country.add_extra_popolo_data_for_organization(o, properties, base_url)
+            yield properties
+
+def get_organizations(primary_id_scheme, base_url):
+    """Return a list of Popolo organization objects"""
+    return list(iter_organizations(primary_id_scheme, base_url))
 
 def create_organisations(popit, primary_id_scheme, base_url):
     """Create organizations in PopIt based on those used in memberships in Pombola
@@ -207,6 +360,75 @@ def create_organisations(popit, primary_id_scheme, base_url):
             print >> sys.stderr, json.dumps(organization, indent=4)
             raise
 
+def get_person_memberships(person, primary_id_scheme, base_url, related):
+    """Return the Popolo membership objects for a person's positions"""
+
+    memberships = []
+    for position in related.get_positions(person):
+        properties = {'person_id': person.get_popolo_id(primary_id_scheme)}
+        if position.title and position.title.name:
+            properties['role'] = position.title.name
+        add_start_and_end_date(position, properties)
+        add_identifiers_to_properties(position, properties, primary_id_scheme, related)
+        if position.organisation:
+            organization_id = position.organisation.get_popolo_id(primary_id_scheme)
+            properties['organization_id'] = organization_id
+        if position.place:
+            # If there's a place associated with the position, set that on
+            # the position as an area:
+            properties['area'] = get_area_information(position.place, base_url)
+        memberships.append(properties)
+    return memberships
+
+def iter_people(primary_id_scheme, base_url, inline_memberships=True, chunk_size=CHUNK_SIZE, person_ids=None):
+    """Generate (person, memberships) pairs of Popolo objects, a chunk of people at a time
+
+    If inline_memberships is True, the memberships are also included
+    in the person object. If person_ids is given only those people are
+    included."""
+
+    people = country.prefetch_extra_popolo_data_for_people(Person.objects.all())
+    if person_ids is None:
+        person_ids = list(Person.objects.values_list('id', flat=True))
+
+    for chunk_ids in chunks(person_ids, chunk_size):
+        related = RelatedObjects(person_ids=chunk_ids)
+        for person in in_bulk_in_order(people, chunk_ids):
+            name = person.legal_name
+            person_properties = {'name': name}
+            for date, key in ((person.date_of_birth, 'birth_date'),
+                              (person.date_of_death, 'death_date')):
+                if date:
+                    person_properties[key] = date_to_partial_iso8601(date)
+            primary_image = related.get_primary_image(person)
+            if primary_image:
+                person_properties['images' ] = [
+                    {
+                        'url': urljoin(base_url, primary_image.url)
+                    }
+                ]
+            add_identifiers_to_properties(person, person_properties, primary_id_scheme, related)
+            add_contact_details_to_properties(person, person_properties, related)
+            add_other_names(person, person_properties, related)
+            for key in extra_popolo_person_fields:
+                value = getattr(person, key)
+                # This might be a markitup.fields.Markup field, in
+                # which case we need to call raw on it:
+                try:
+                    value = value.raw
+                except AttributeError:
+                    pass
+                if value:
+                    person_properties[key] = value
+            country.add_extra_popolo_data_for_person(person, person_properties, base_url)
+
+            memberships = get_person_memberships(
+                person, primary_id_scheme, base_url, related)
+            if inline_memberships:
+                person_properties['memberships'] = memberships
+
+            yield person_properties, memberships
+
 def get_people(primary_id_scheme, base_url, inline_memberships=True):
 
     result = {
@@ -215,58 +437,11 @@ def get_people(primary_id_scheme, base_url, inline_memberships=True):
     if not inline_memberships:
         result['memberships'] = []
 
-    for person in Person.objects.all():
-        name = person.legal_name
-        person_properties = {'name': name}
-        for date, key in ((person.date_of_birth, 'birth_date'),
-                          (person.date_of_death, 'death_date')):
-            if date:
-                person_properties[key] = date_to_partial_iso8601(date)
-        primary_image = person.primary_image()
-        if primary_image:
-            person_properties['images' ] = [
-                {
-                    'url': urljoin(base_url, primary_image.url)
-                }
-            ]
-        add_identifiers_to_properties(person, person_properties, primary_id_scheme)
-        add_contact_details_to_properties(person, person_properties)
-        add_other_names(person, person_properties)
-        for key in extra_popolo_person_fields:
-            value = getattr(person, key)
-            # This might be a markitup.fields.Markup field, in
-            # which case we need to call raw on it:
-            try:
-                value = value.raw
-            except AttributeError:
-                pass
-            if value:
-                person_properties[key] = value
-        country.add_extra_popolo_data_for_person(person, person_properties, base_url)
-
-        if inline_memberships:
-            person_properties['memberships'] = []
-
-        for position in person.position_set.all():
-            properties = {'person_id': person.get_popolo_id(primary_id_scheme)}
-            if position.title and position.title.name:
-                properties['role'] = position.title.name
-            add_start_and_end_date(position, properties)
-            add_identifiers_to_properties(position, properties, primary_id_scheme)
-            if position.organisation:
-                position.organisation.slug
-                organization_id = position.organisation.get_popolo_id(primary_id_scheme)
-                properties['organization_id'] = organization_id
-            if position.place:
-                # If there's a place associated with the position, set that on
-                # the position as an area:
-                properties['area'] = get_area_information(position.place, base_url)
-            if inline_memberships:
-                person_properties['memberships'].append(properties)
-            else:
-                result['memberships'].append(properties)
-
+    for person_properties, memberships in iter_people(
+            primary_id_scheme, base_url, inline_memberships):
         result['persons'].append(person_properties)
+        if not inline_memberships:
+            result['memberships'].extend(memberships)
     return result
 
 def get_popolo_data(primary_id_scheme, base_url, inline_memberships=True):
@@ -275,6 +450,65 @@ def get_popolo_data(primary_id_scheme, base_url, inline_memberships=True):
     result['posts'] = []
     return result
 
+JSON_INDENT = 4
+
+class JSONListWriter(object):
+    """Write a JSON list to a file one item at a time
+
+    The result is laid out as json.dump(items, f, indent=4,
+    sort_keys=True) would, but only one item need be in memory at
+    once. level is the depth to which the list itself is nested."""
+
+    def __init__(self, f, level=0):
+        self.f = f
+        self.item_indent = ' ' * (JSON_INDENT * (level + 1))
+        self.closing_indent = ' ' * (JSON_INDENT * level)
+        self.count = 0
+
+    def write(self, item):
+        self.f.write(',\n' if self.count else '[\n')
+        lines = json.dumps(item, indent=JSON_INDENT, sort_keys=True).split('\n')
+        self.f.write('\n'.join(self.item_indent + line for line in lines))
+        self.count += 1
+
+    def close(self):
+        if self.count:
+            self.f.write('\n' + self.closing_indent + ']')
+        else:
+            self.f.write('[]')
+
+class MongoExportWriter(object):
+    """Write items to a file in mongoexport format, one JSON object per line"""
+
+    def __init__(self, f):
+        self.f = f
+
+    def write(self, item):
+        json.dump(item, self.f, sort_keys=True)
+        self.f.write('\n')
+
+    def close(self):
+        pass
+
+@contextmanager
+def output_file(filename, compress=False):
+    """Open a file to write to filename, which is replaced once it's complete
+
+    If compress is True the file is gzipped and '.gz' is added to
+    filename. If anything goes wrong the original file is left alone."""
+    if compress:
+        filename += '.gz'
+    temporary_filename = filename + '.new'
+    f = (gzip.open if compress else open)(temporary_filename, 'wb')
+    try:
+        yield f
+    except:
+        f.close()
+        os.remove(temporary_filename)
+        raise
+    f.close()
+    os.rename(temporary_filename, filename)
+
 def create_people(popit, primary_id_scheme, base_url):
     data = get_people(primary_id_scheme, base_url, inline_memberships=False)
     for singular in ('person', 'membership'):
@@ -0,0 +1,176 @@
+"""
+A store of the exported Popolo JSON of each person and organisation.
+
+Regenerating the whole Popolo export every night is wasteful when only
+a few people and organisations have changed, so refresh_fragments()
+only regenerates the JSON of those updated since it was last generated
+and keeps it in PopoloFragment; the export files can then be assembled
+from the stored fragments with iter_stored_people() and
+iter_stored_organizations(). A person or organisation is marked as
+updated when anything exported with it changes, such as their
+positions, contacts, identifiers, alternative names or images (and
+their register of interests entries, in South Africa).
+
+Anything else that affects the export, like a change to a position
+title or place, is only picked up when every fragment is regenerated
+with full=True.
+
+Since each fragment records when its JSON last changed, get_changes()
+lists what's changed since a given time, so that consumers of the
+export can fetch just the differences.
+"""
+
+import datetime
+import json
+
+from pombola.core.models import Organisation, Person, PopoloFragment
+from pombola.core.popolo import CHUNK_SIZE, chunks, iter_organizations, iter_people
+
+# How long the change feed goes back, and so for how long the
+# fragments of deleted objects are kept:
+CHANGES_PERIOD = datetime.timedelta(days=30)
+
+
+def refresh_fragments(primary_id_scheme, base_url, full=False):
+    """Regenerate the fragments of people and organisations that have been updated
+
+    If full is True every fragment is regenerated. Only fragments
+    whose JSON is different are marked as changed. Returns the number
+    of fragments that changed, including those of deleted objects."""
+
+    started = datetime.datetime.now()
+
+    def generate_people(person_ids):
+        for person, memberships in iter_people(
+                primary_id_scheme, base_url, person_ids=person_ids):
+            yield person
+
+    def generate_organizations(organisation_ids):
+        return iter_organizations(
+            primary_id_scheme, base_url, organisation_ids=organisation_ids)
+
+    changed = refresh_collection('persons', Person, generate_people, started, full)
+    changed += refresh_collection('organizations', Organisation, generate_organizations, started, full)
+
+    PopoloFragment.objects.filter(
+        deleted=True, updated__lt=started - CHANGES_PERIOD).delete()
+
+    return changed
+
+
+def refresh_collection(collection, model, generate, started, full):
+    fragments = PopoloFragment.objects.filter(collection=collection)
+
+    generated = dict(
+        fragments.filter(deleted=False).values_list('object_id', 'generated'))
+    object_ids = set()
+    to_generate = []
+    for object_id, updated in model.objects.values_list('id', 'updated'):
+        object_ids.add(object_id)
+        if full or object_id not in generated or updated >= generated[object_id]:
+            to_generate.append(object_id)
+
+    changed = 0
+    for chunk_ids in chunks(to_generate, CHUNK_SIZE):
+        stored = dict(
+            (f.object_id, f) for f in fragments.filter(object_id__in=chunk_ids))
+        unchanged_ids = []
+        new_fragments = []
+        for properties in generate(chunk_ids):
+            popolo_id = properties['id']
+            object_id = int(popolo_id.rsplit(':', 1)[1])
+            data = json.dumps(properties, sort_keys=True)
+            fragment = stored.get(object_id)
+            if fragment is None:
+                new_fragments.append(PopoloFragment(
+                    collection=collection,
+                    object_id=object_id,
+                    popolo_id=popolo_id,
+                    data=data,
+                    generated=started,
+                    ))
+            elif fragment.data == data and not fragment.deleted:
+                unchanged_ids.append(object_id)
+                continue
+            else:
+                fragments.filter(id=fragment.id).update(
+                    popolo_id=popolo_id,
+                    data=data,
+                    deleted=False,
+                    generated=started,
+                    updated=started,
+                    )
+            changed += 1
+        PopoloFragment.objects.bulk_create(new_fragments)
+        fragments.filter(object_id__in=unchanged_ids).update(generated=started)
+
+    deleted_ids = [i for i in generated if i not in object_ids]
+    for chunk_ids in chunks(deleted_ids, CHUNK_SIZE):
+        changed += fragments.filter(object_id__in=chunk_ids).update(
+            data='',
+            deleted=True,
+            generated=started,
+            updated=started,
+            )
+
+    return changed
+
+
+def iter_stored(collection, model):
+    """Generate the stored objects of a collection, in the usual export order"""
+
+    fragments = PopoloFragment.objects.filter(collection=collection, deleted=False)
+    object_ids = list(model.objects.values_list('id', flat=True))
+    for chunk_ids in chunks(object_ids, CHUNK_SIZE):
+        data = dict(
+            fragments
+            .filter(object_id__in=chunk_ids)
+            .values_list('object_id', 'data'))
+        for object_id in chunk_ids:
+            if object_id in data:
+                yield json.loads(data[object_id])
+
+
+def iter_stored_people(inline_memberships=True):
+    """Generate (person, memberships) pairs from the stored fragments
+
+    These are the same as iter_people() generates, as of the last
+    refresh_fragments()."""
+
+    for person in iter_stored('persons', Person):
+        if inline_memberships:
+            memberships = person['memberships']
+        else:
+            memberships = person.pop('memberships')
+        yield person, memberships
+
+
+def iter_stored_organizations():
+    """Generate organization objects from the stored fragments"""
+
+    return iter_stored('organizations', Organisation)
+
+
+def get_changes(since):
+    """Return a change feed of the people and organisations changed since a time
+
+    Each collection has a list of the IDs of the objects whose JSON
+    has changed, with when it last changed and whether the object has
+    been deleted, oldest first."""
+
+    result = {
+        'since': since.isoformat(),
+        'persons': [],
+        'organizations': [],
+    }
+    for collection, popolo_id, updated, deleted in (
+            PopoloFragment.objects
+            .filter(updated__gt=since)
+            .order_by('updated', 'id')
+            .values_list('collection', 'popolo_id', 'updated', 'deleted')):
+        result[collection].append({
+            'id': popolo_id,
+            'updated': updated.isoformat(),
+            'deleted': deleted,
+        })
+    return result
@@ -0,0 +1,155 @@
+from datetime import date
+
+from django.contrib.gis.geos import Polygon
+from django.test import TestCase, TransactionTestCase
+
+from mapit.models import Area, Generation, Geometry, Type
+
+from pombola.core import models
+from pombola.core.boundary_overlaps import area_overlaps, update_boundary_overlaps
+
+
+def square(x0, y0, x1, y1):
+    return Polygon(((x0, y0), (x0, y1), (x1, y1), (x1, y0), (x0, y0)))
+
+
+class BoundaryOverlapMixin(object):
+
+    def setUp(self):
+        self.old_generation = Generation.objects.create(description="Old boundaries")
+        self.new_generation = Generation.objects.create(active=True, description="New boundaries")
+        self.constituency_type = Type.objects.create(code='CON', description='Constituency')
+
+        def area(name, generation, polygon):
+            a = Area.objects.create(
+                name=name,
+                type=self.constituency_type,
+                generation_low=generation,
+                generation_high=generation,
+            )
+            Geometry.objects.create(area=a, polygon=polygon)
+            return a
+
+        self.old_area = area('Old', self.old_generation, square(17, -30, 19, -29))
+        self.west_area = area('West', self.new_generation, square(17, -30, 18, -29))
+        self.east_area = area('East', self.new_generation, square(18, -30, 19, -29))
+
+        self.house = house = models.Organisation.objects.create(
+            name='National Assembly',
+            slug='national-assembly',
+            kind=models.OrganisationKind.objects.create(name='House', slug='house'),
+        )
+
+        def session(name, generation, start_date, end_date):
+            return models.ParliamentarySession.objects.create(
+                name=name,
+                slug=name.lower(),
+                start_date=start_date,
+                end_date=end_date,
+                house=house,
+                mapit_generation=generation.id,
+            )
+
+        self.old_session = session(
+            'Old', self.old_generation, date(2007, 1, 1), date(2012, 12, 31))
+        self.new_session = session(
+            'New', self.new_generation, date(2013, 1, 1), date(9999, 12, 31))
+
+        self.kind = models.PlaceKind.objects.create(name='Constituency', slug='constituency')
+
+        def place(area, session):
+            return models.Place.objects.create(
+                name=area.name,
+                slug=area.name.lower(),
+                kind=self.kind,
+                mapit_area=area,
+                parliamentary_session=session,
+            )
+
+        self.old_place = place(self.old_area, self.old_session)
+        self.west_place = place(self.west_area, self.new_session)
+        self.east_place = place(self.east_area, self.new_session)
+
+
+class BoundaryOverlapTest(BoundaryOverlapMixin, TestCase):
+
+    def test_area_overlaps(self):
+        task = (self.old_area.id, 'CON', self.new_generation.id)
+        returned_task, overlaps = area_overlaps(task)
+        self.assertEqual(returned_task, task)
+        overlaps = dict(overlaps)
+        self.assertEqual(
+            sorted(overlaps.keys()), sorted([self.west_area.id, self.east_area.id]))
+        self.assertAlmostEqual(overlaps[self.west_area.id], 50)
+        self.assertAlmostEqual(overlaps[self.east_area.id], 50)
+
+    def test_boundary_changes_come_from_stored_overlaps(self):
+        models.BoundaryOverlap.objects.create(
+            place=self.old_place, other_place=self.west_place, percent=99.5)
+        models.BoundaryOverlap.objects.create(
+            place=self.old_place, other_place=self.east_place, percent=0.5)
+
+        changes = self.old_place.get_boundary_changes()
+
+        self.assertIsNone(changes['previous'])
+        self.assertEqual(changes['next']['session'], self.new_session)
+        self.assertEqual(
+            changes['next']['intersections'],
+            [{'percent': 99.5, 'place': self.west_place}])
+        self.assertEqual(changes['next']['others'], [self.east_place])
+
+        changes = self.west_place.get_boundary_changes()
+        self.assertEqual(changes['previous']['intersections'], [])
+        self.assertIsNone(changes['next'])
+
+    def test_sessions_without_boundaries_are_skipped(self):
+        interim_session = models.ParliamentarySession.objects.create(
+            name='Interim',
+            slug='interim',
+            start_date=date(2012, 6, 1),
+            end_date=date(2012, 12, 31),
+            house=self.house,
+        )
+        models.Place.objects.create(
+            name='Interim',
+            slug='interim',
+            kind=self.kind,
+            parliamentary_session=interim_session,
+        )
+        models.BoundaryOverlap.objects.create(
+            place=self.old_place, other_place=self.west_place, percent=100)
+
+        changes = self.old_place.get_boundary_changes()
+
+        self.assertEqual(changes['next']['session'], self.new_session)
+        self.assertEqual(
+            changes['next']['intersections'],
+            [{'percent': 100, 'place': self.west_place}])
+
+
+# The overlaps are worked out in other processes, which can only see
+# data that's been committed:
+class UpdateBoundaryOverlapsTest(BoundaryOverlapMixin, TransactionTestCase):
+
+    def test_update_boundary_overlaps(self):
+        update_boundary_overlaps(processes=1)
+
+        overlaps = dict(
+            ((o.place, o.other_place), o.percent)
+            for o in models.BoundaryOverlap.objects.all())
+        self.assertEqual(
+            sorted(overlaps.keys()),
+            sorted([
+                (self.old_place, self.west_place),
+                (self.old_place, self.east_place),
+                (self.west_place, self.old_place),
+                (self.east_place, self.old_place),
+            ]))
+        self.assertAlmostEqual(overlaps[(self.old_place, self.west_place)], 50)
+        self.assertAlmostEqual(overlaps[(self.old_place, self.east_place)], 50)
+        self.assertAlmostEqual(overlaps[(self.west_place, self.old_place)], 100)
+        self.assertAlmostEqual(overlaps[(self.east_place, self.old_place)], 100)
+
+        # Running it again replaces the overlaps rather than adding to them:
+        update_boundary_overlaps(processes=1)
+        self.assertEqual(models.BoundaryOverlap.objects.count(), 4)
@@ -16,6 +16,8 @@ from django.core.management import call_command
 from django.core.management.base import CommandError
 from django.test import TestCase
 
+from django_date_extensions.fields import ApproximateDate
+
 
 # A context manager to suppress standard output, as suggested in:
 # http://stackoverflow.com/a/1810086/223092
@@ -201,3 +203,48 @@ class MergePeopleCommandTest(TestCase):
         with self.assertRaises(CommandError):
             with no_stdout_or_stderr():
                 call_command('core_merge_people', **options)
+
+
+class UpdateCurrentlyActivePositionsCommandTest(TestCase):
+
+    def setUp(self):
+        self.person = Person.objects.create(
+            legal_name="Test Person",
+            slug="test-person")
+        self.ended = Position.objects.create(
+            person=self.person,
+            category="other",
+            start_date=ApproximateDate(2001, 1, 1),
+            end_date=ApproximateDate(2002, 1, 1))
+        self.ongoing = Position.objects.create(
+            person=self.person,
+            category="other",
+            start_date=ApproximateDate(2001, 1, 1),
+            end_date=ApproximateDate(future=True))
+
+    def test_flags_set_on_save(self):
+        self.assertFalse(Position.objects.get(pk=self.ended.id).is_currently_active)
+        self.assertTrue(Position.objects.get(pk=self.ongoing.id).is_currently_active)
+
+    def test_stale_flags_are_corrected(self):
+        # Make the flags stale, as they would be after a day rollover:
+        Position.objects.filter(pk=self.ended.id).update(is_currently_active=True)
+        Position.objects.filter(pk=self.ongoing.id).update(is_currently_active=False)
+        self.assertEqual(
+            [self.ended],
+            list(Position.objects.all().currently_active()))
+
+        with no_stdout_or_stderr():
+            call_command('core_update_currently_active_positions', commit=True)
+
+        self.assertEqual(
+            [self.ongoing],
+            list(Position.objects.all().currently_active()))
+
+    def test_no_changes_without_commit(self):
+        Position.objects.filter(pk=self.ended.id).update(is_currently_active=True)
+
+        with no_stdout_or_stderr():
+            call_command('core_update_currently_active_positions')
+
+        self.assertTrue(Position.objects.get(pk=self.ended.id).is_currently_active)
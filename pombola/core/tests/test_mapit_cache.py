@@ -0,0 +1,44 @@
+from django.contrib.gis.geos import Polygon
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import TestCase
+
+from mapit.models import Area, Generation, Geometry, Type
+from mock import patch
+
+from pombola.core import mapit_cache
+
+
+class MapItCacheTest(TestCase):
+
+    def setUp(self):
+        cache_patcher = patch.object(
+            mapit_cache, 'cache', LocMemCache('mapit-cache-test', {}))
+        cache_patcher.start()
+        self.addCleanup(cache_patcher.stop)
+
+        generation = Generation.objects.create(active=True, description="Test generation")
+        province_type = Type.objects.create(code='PRV', description='Province')
+        self.province = Area.objects.create(
+            name="Test Province",
+            type=province_type,
+            generation_low=generation,
+            generation_high=generation,
+        )
+        self.geometry = Geometry.objects.create(
+            area=self.province,
+            polygon=Polygon(((17, -29), (17, -30), (18, -30), (18, -29), (17, -29))),
+        )
+
+    def test_lookups_are_cached(self):
+        self.assertEqual(
+            mapit_cache.area_ids_by_location(-29.5, 17.5), [self.province.id])
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                mapit_cache.area_ids_by_location(-29.50001, 17.50001), [self.province.id])
+        self.assertEqual(mapit_cache.area_ids_by_location(-28.5, 17.5), [])
+
+    def test_boundary_changes_invalidate_lookups(self):
+        self.assertEqual(
+            mapit_cache.area_ids_by_location(-29.5, 17.5), [self.province.id])
+        self.geometry.delete()
+        self.assertEqual(mapit_cache.area_ids_by_location(-29.5, 17.5), [])
@@ -5,6 +5,7 @@ from django_date_extensions.fields import ApproximateDate
 from django.contrib.contenttypes.models import ContentType
 
 from pombola.core import models
+from pombola.images.models import Image, attach_primary_images
 from pombola.slug_helpers.models import SlugRedirect
 from pombola.tasks.models import Task
 
@@ -352,6 +353,71 @@ class PlaceRedirectUniquenessTest(TestCase):
             other_place.clean_fields()
 
 
+class PlaceClosureTest(TestCase):
+
+    def setUp(self):
+        kind = models.PlaceKind.objects.create(name="Area", slug="area")
+
+        def place(slug, parent=None):
+            return models.Place.objects.create(
+                name=slug.title(), slug=slug, kind=kind, parent_place=parent)
+
+        self.country = place('country')
+        self.county = place('county', self.country)
+        self.constituency = place('constituency', self.county)
+        self.ward = place('ward', self.constituency)
+        self.other_county = place('other-county', self.country)
+
+    def assertClosureMatchesParents(self):
+        closures = set(models.PlaceClosure.objects.values_list(
+            'ancestor', 'descendant', 'depth'))
+        models.PlaceClosure.objects.rebuild()
+        self.assertEqual(
+            closures,
+            set(models.PlaceClosure.objects.values_list('ancestor', 'descendant', 'depth')))
+
+    def test_parent_places(self):
+        self.assertEqual(
+            self.ward.parent_places(),
+            [self.constituency, self.county, self.country])
+        self.assertEqual(self.country.parent_places(), [])
+        self.assertEqual(
+            set(self.ward.self_and_parents()),
+            set([self.ward, self.constituency, self.county, self.country]))
+        self.assertEqual(
+            set(self.county.self_and_children()),
+            set([self.county, self.constituency, self.ward]))
+        self.assertClosureMatchesParents()
+
+    def test_moving_a_place_moves_the_places_below_it(self):
+        self.constituency.parent_place = self.other_county
+        self.constituency.save()
+        self.assertEqual(
+            self.ward.parent_places(),
+            [self.constituency, self.other_county, self.country])
+        self.assertEqual(set(self.county.self_and_children()), set([self.county]))
+        self.assertClosureMatchesParents()
+
+        self.constituency.parent_place = None
+        self.constituency.save()
+        self.assertEqual(self.ward.parent_places(), [self.constituency])
+        self.assertClosureMatchesParents()
+
+    def test_place_cannot_be_below_itself(self):
+        self.country.parent_place = self.ward
+        with self.assertRaises(ValidationError):
+            self.country.full_clean()
+        with self.assertRaises(ValueError):
+            self.country.save()
+        self.assertIsNone(
+            models.Place.objects.get(id=self.country.id).parent_place)
+        self.assertClosureMatchesParents()
+
+        self.county.parent_place = self.county
+        with self.assertRaises(ValidationError):
+            self.county.full_clean()
+
+
 class OrganisationRedirectUniquenessTest(TestCase):
 
     def test_redirect_uniqueness_validation(self):
@@ -528,6 +594,79 @@ class PersonPlaceTest(TestCase):
         self.assertEqual(set(related_people[0][1]),
                          set([self.position_a]))
 
+    def test_place_related_people_child_places(self):
+        for child_place in (self.place_a, self.place_b):
+            child_place.parent_place = self.place_d
+            child_place.save()
+
+        with self.assertNumQueries(1):
+            child_places = self.place_d.related_people_child_places(
+                positions_filter=lambda qs: qs)
+
+        self.assertEqual(
+            [place for place, people in child_places],
+            [self.place_b, self.place_a])
+        (place_b_person, place_b_positions), = child_places[0][1]
+        self.assertEqual(place_b_person, self.person)
+        self.assertEqual(place_b_positions, [self.position_d])
+        (place_a_person, place_a_positions), = child_places[1][1]
+        self.assertEqual(place_a_person, self.person)
+        self.assertEqual(set(place_a_positions),
+                         set([self.position_a, self.position_c]))
+
+
+class PersonPrimaryImageTest(TestCase):
+
+    def setUp(self):
+        self.person = models.Person.objects.create(
+            legal_name='Alfred Smith',
+            slug='alfred-smith',
+        )
+
+    def add_image(self, name, **kwargs):
+        return Image.objects.create(
+            content_object=self.person,
+            image=name,
+            source='test',
+            **kwargs)
+
+    def reload_person(self):
+        return models.Person.objects.get(id=self.person.id)
+
+    def test_cached_primary_image_follows_primary_image(self):
+        self.assertIsNone(self.reload_person().primary_image())
+
+        first = self.add_image('images/first.png')
+        self.assertEqual(self.reload_person().cached_primary_image, first)
+
+        second = self.add_image('images/second.png')
+        self.assertEqual(self.reload_person().cached_primary_image, first)
+
+        second.is_primary = True
+        second.save()
+        self.assertEqual(
+            self.reload_person().primary_image().name, 'images/second.png')
+
+        second.delete()
+        self.assertIsNone(self.reload_person().primary_image())
+
+    def test_attach_primary_images(self):
+        self.add_image('images/first.png')
+        other_person = models.Person.objects.create(
+            legal_name='Bob Smith',
+            slug='bob-smith',
+        )
+        people = list(
+            models.Person.objects
+            .filter(id__in=[self.person.id, other_person.id])
+            .order_by('id'))
+
+        with self.assertNumQueries(1):
+            attach_primary_images(people)
+        with self.assertNumQueries(0):
+            self.assertEqual(people[0].primary_image().name, 'images/first.png')
+            self.assertIsNone(people[1].primary_image())
+
 
 class SummaryTest(TestCase):
 
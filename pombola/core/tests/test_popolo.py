@@ -1,9 +1,16 @@
-from datetime import date
+from datetime import date, datetime
+import gzip
 import json
+from os.path import join
+from shutil import rmtree
+from tempfile import mkdtemp
 
 from django.contrib.contenttypes.models import ContentType
 from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from django_date_extensions.fields import ApproximateDate
 
@@ -11,6 +18,8 @@ from mapit.models import Generation, Area, Type
 
 from pombola.core import models
 from pombola.core.popolo import get_popolo_data
+from pombola.core.popolo_fragments import (
+    get_changes, iter_stored_organizations, iter_stored_people, refresh_fragments)
 from pombola.images.models import Image
 
 class PopoloTest(TestCase):
@@ -293,5 +302,115 @@ class PopoloTest(TestCase):
         self.assertEqual(session['id'], example_session.id)
         self.assertEqual(session['mapit_generation'], self.generation.id)
 
+    def test_popolo_queries_do_not_depend_on_number_of_people(self):
+        with CaptureQueriesContext(connection) as one_person:
+            get_popolo_data('org.example', 'http://pombola.example.org/')
+
+        other_person = models.Person.objects.create(
+            legal_name='Other Person',
+            slug='other-person',
+        )
+        models.Contact.objects.create(
+            kind=self.contact_kind,
+            value='other@example.org',
+            content_object=other_person,
+        )
+        models.Identifier.objects.create(
+            identifier='/person/someone-else',
+            scheme='some.schema',
+            content_object=other_person,
+        )
+        other_person.add_alternative_name('Other H Person')
+        models.Position.objects.create(
+            person=other_person,
+            organisation=self.organisation,
+            place=self.place,
+            title=self.position_title,
+        )
+
+        with CaptureQueriesContext(connection) as two_people:
+            data = get_popolo_data('org.example', 'http://pombola.example.org/')
+
+        self.assertEqual(2, len(data['persons']))
+        self.assertEqual(len(one_person), len(two_people))
+
+    def test_export_command_matches_popolo_data(self):
+        output_directory = mkdtemp()
+        try:
+            call_command(
+                'core_export_to_popolo_json',
+                output_directory,
+                'http://pombola.example.org/',
+                pombola=True)
+            with open(join(output_directory, 'pombola.json')) as f:
+                exported = json.load(f)
+
+            call_command(
+                'core_export_to_popolo_json',
+                output_directory,
+                'http://pombola.example.org/',
+                gzip=True)
+            with gzip.open(join(output_directory, 'memberships.json.gz')) as f:
+                exported_memberships = json.load(f)
+            with gzip.open(join(output_directory, 'mongo-persons.dump.gz')) as f:
+                exported_mongo_persons = [json.loads(line) for line in f]
+        finally:
+            rmtree(output_directory)
+
+        self.assertEqual(
+            exported,
+            get_popolo_data('org.example', 'http://pombola.example.org/'))
+
+        data = get_popolo_data('org.example',
+                               'http://pombola.example.org/',
+                               inline_memberships=False)
+        for membership in data['memberships']:
+            membership['_id'] = membership['id']
+        self.assertEqual(exported_memberships, data['memberships'])
+        self.assertEqual(1, len(exported_mongo_persons))
+        self.assertEqual(
+            exported_mongo_persons[0]['_id'],
+            'core_person:{0}'.format(self.person.id))
+
+    def test_incremental_export_regenerates_changed_objects(self):
+        started = datetime.now()
+        self.assertEqual(
+            2, refresh_fragments('org.example', 'http://pombola.example.org/'))
+
+        data = get_popolo_data('org.example', 'http://pombola.example.org/')
+        self.assertEqual(
+            [person for person, memberships in iter_stored_people()],
+            data['persons'])
+        self.assertEqual(list(iter_stored_organizations()), data['organizations'])
+
+        # Nothing has changed, so nothing should be regenerated:
+        self.assertEqual(
+            0, refresh_fragments('org.example', 'http://pombola.example.org/'))
+
+        # Changing a contact should update the person's fragment:
+        self.email_contact.value = 'changed@example.org'
+        self.email_contact.save()
+        self.assertEqual(
+            1, refresh_fragments('org.example', 'http://pombola.example.org/'))
+        person, memberships = list(iter_stored_people(inline_memberships=False))[0]
+        self.assertEqual(
+            person['contact_details'][0]['value'], 'changed@example.org')
+        self.assertNotIn('memberships', person)
+        self.assertEqual(1, len(memberships))
+
+        # And deleting the organisation should remove its fragment:
+        organisation_id = self.organisation.id
+        self.organisation.delete()
+        refresh_fragments('org.example', 'http://pombola.example.org/')
+        self.assertEqual([], list(iter_stored_organizations()))
+
+        changes = get_changes(started)
+        self.assertEqual(
+            [(c['id'], c['deleted']) for c in changes['organizations']],
+            [('core_organisation:{0}'.format(organisation_id), True)])
+        self.assertEqual(
+            [c['id'] for c in changes['persons']],
+            ['core_person:{0}'.format(self.person.id)])
+
 # FIXME: also mock out the PopIt API to test create_organisations and
 # create_people.
@@ -468,6 +468,33 @@ class PositionTest(TestCase):
         self.assertEqual( pos_qs.currently_inactive(mid_2012).count(), 0 )
         self.assertEqual( pos_qs.currently_inactive(mid_2013).count(), 1 )
 
+    def test_date_range(self):
+        """Check the date range covers the whole of partial dates"""
+
+        position = models.Position.objects.create(
+            person     = self.person,
+            title      = self.title,
+            start_date = ApproximateDate(year=2011, month=3),
+            end_date   = ApproximateDate(year=2012, month=2),
+        )
+        self.assertEqual( position.date_range_start, datetime.date(2011, 3, 1) )
+        self.assertEqual( position.date_range_end,   datetime.date(2012, 2, 29) )
+
+        position.start_date = ApproximateDate(past=True)
+        position.end_date   = ApproximateDate(year=2012)
+        position.save()
+        self.assertEqual( position.date_range_start, datetime.date.min )
+        self.assertEqual( position.date_range_end,   datetime.date(2012, 12, 31) )
+
+        # A position started in the past is active, not inactive
+        position.end_date = ApproximateDate(future=True)
+        position.save()
+        pos_qs = models.Position.objects.all()
+        self.assertEqual( position.date_range_end, datetime.date.max )
+        self.assertEqual( pos_qs.currently_active().count(), 1 )
+        self.assertEqual( pos_qs.currently_inactive().count(), 0 )
+
+
     def test_position_title_no_redirect(self):
         response = self.client.get(
             reverse('position_pt', kwargs={
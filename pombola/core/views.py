@@ -22,6 +22,7 @@ from django.core.exceptions import ObjectDoesNotExist
 from speeches.models import Speaker
 
 from pombola.core import models
+from pombola.images.models import attach_primary_images
 from pombola.slug_helpers.views import SlugRedirectMixin, get_slug_redirect
 
 
@@ -42,7 +43,8 @@ class HomeView(TemplateView):
 
         # For the election homepage produce a list of all the featured people.
         # Shuffle it each time to avoid any bias.
-        context['featured_persons'] = list(models.Person.objects.get_featured())
+        context['featured_persons'] = attach_primary_images(
+            models.Person.objects.get_featured())
         random.shuffle(context['featured_persons'])
 
         return context
@@ -329,6 +331,7 @@ def position(request, pt_slug, ok_slug=None, o_slug=None):
     positions = positions.order_by(order)
 
     positions = positions.select_related('person',
+                                         'person__cached_primary_image',
                                          'organisation',
                                          'title',
                                          'place',
@@ -383,8 +386,8 @@ class OrganisationDetailView(SlugRedirectMixin, DetailView):
     def get_context_data(self, **kwargs):
         context = super(OrganisationDetailView, self).get_context_data(**kwargs)
         context['positions'] = self.object.position_set. \
-            select_related('person', 'title', 'place'). \
-            prefetch_related('person__alternative_names', 'person__images'). \
+            select_related('person__cached_primary_image', 'title', 'place'). \
+            prefetch_related('person__alternative_names'). \
             order_by('person__legal_name')
         return context
 
@@ -405,8 +408,8 @@ class OrganisationDetailSub(SubSlugRedirectMixin, DetailView):
         if self.sub_page == 'people':
             all_positions = context['all_positions'] = \
                 self.object.position_set.filter(person__hidden=False). \
-                    select_related('person', 'title', 'place'). \
-                    prefetch_related('person__alternative_names', 'person__images')
+                    select_related('person__cached_primary_image', 'title', 'place'). \
+                    prefetch_related('person__alternative_names')
 
             if self.request.GET.get('all'):
                 positions = all_positions
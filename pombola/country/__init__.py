@@ -10,6 +10,10 @@ imports_and_defaults = (
      lambda person, dictionary, base_url: None),
     ('add_extra_popolo_data_for_organization',
      lambda organisation, dictionary, base_url: None),
+    ('prefetch_extra_popolo_data_for_people',
+     lambda qs: qs),
+    ('prefetch_extra_popolo_data_for_organizations',
+     lambda qs: qs),
 )
 
 # Note that one could do this without the dynamic import and use of
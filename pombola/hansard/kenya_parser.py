@@ -12,6 +12,7 @@ from django.db import transaction
 from BeautifulSoup import BeautifulSoup, BeautifulStoneSoup, NavigableString, Tag
 
 from pombola.hansard.models import Source, Sitting, Entry, Venue
+from pombola.search.indexing import update_objects_in_search_index
 
 # EXCEPTIONS
 class KenyaParserCouldNotParseTimeString(Exception):
@@ -95,6 +96,20 @@ class KenyaParser():
         )
         (?:\ in\ the\ National\ Assembly\ Chamber)?""", re.VERBOSE)
 
+    # how many entries to insert in each query when creating a sitting
+    entry_batch_size = 500
+
+    # patterns used when converting the html to data
+    nbsp_reg               = re.compile(r'&nbsp;|&#160;')
+    blank_line_reg         = re.compile(r'\s*$')
+    na_page_number_reg     = re.compile(r'(\d+)\s{10,}')
+    sen_page_number_reg    = re.compile(r'\s{10,}(\d+)')
+    disclaimer_reg         = re.compile(r'\s*Disclaimer:')
+    whitespace_reg         = re.compile(r'\s+')
+    space_before_comma_reg = re.compile(r'\s+,')
+    speaker_in_speech_reg  = re.compile(r'\(([^\)]+)\):(.*)')
+    leading_colon_reg      = re.compile(r'^:\s*')
+
 
     @classmethod
     def convert_pdf_to_html(cls, pdf_file):
@@ -161,9 +176,25 @@ class KenyaParser():
     @classmethod
     def convert_html_to_data(cls, html):
 
+        meaningful_content = cls.convert_html_to_transcript( html )
+
+        hansard_data = {
+            'meta': cls.extract_meta_from_transcript( meaningful_content ),
+            'transcript': meaningful_content,
+        }
+
+        return hansard_data
+
+
+    @classmethod
+    def convert_html_to_transcript(cls, html):
+        """Return the list of meaningful chunks found in the html
+
+        Unlike convert_html_to_data this doesn't use the database, so it
+        can safely be run in a separate process."""
+
         # Clean out all the &nbsp; now. pdftohtml puts them to preserve the lines
-        html = re.sub( r'&nbsp;', ' ', html )
-        html = re.sub( r'&#160;', ' ', html )
+        html = cls.nbsp_reg.sub(' ', html)
 
         # create a soup out of the html
         soup = BeautifulSoup(
@@ -173,16 +204,27 @@ class KenyaParser():
 
         if not soup.body:
             raise Exception, "No <body> was found - output probably isn't HTML"
-        contents = soup.body.contents
 
-        # counters to use in the loops below
+        # Each of these steps is a generator consuming the output of the
+        # one before, so the document is only walked once.
+        filtered_contents  = cls.filter_html_contents( soup.body.contents )
+        merged_contents    = cls.merge_filtered_contents( filtered_contents )
+
+        return list( cls.classify_merged_contents( merged_contents ) )
+
+
+    @classmethod
+    def filter_html_contents(cls, contents):
+        """Generate a dict for each line of text, skipping page numbers etc"""
+
+        # counters to use in the loop below
         br_count    = 0
         page_number = 1
 
-        filtered_contents = []
+        # an iterator, so that the page skipping below can consume it too
+        contents = iter(contents)
 
-        while len(contents):
-            line = contents.pop(0)
+        for line in contents:
 
             # get the tag name if there is one
             tag_name = line.name if type(line) == Tag else None
@@ -199,118 +241,132 @@ class KenyaParser():
             else:
                 text_content = line.text
 
-            if re.match( r'\s*$', text_content ):
+            if cls.blank_line_reg.match( text_content ):
                 continue
 
-
-            # For Assembly
-            # check for something that looks like the page number - when found
-            # delete it and the two lines that follow
             if tag_name == 'b':
-                page_number_match = re.match( r'(\d+)\s{10,}', line.text )
+                # For Assembly
+                # check for something that looks like the page number - when found
+                # delete it and the two lines that follow
+                page_number_match = cls.na_page_number_reg.match( text_content )
                 if page_number_match:
                     # up the page number - the match is the page that we are leaving
                     page_number = int(page_number_match.group(0)) + 1
                     # skip on to the next page
-                    while len(contents):
-                        item = contents.pop(0)
+                    for item in contents:
                         if type(item) == Tag and item.name == 'hr': break
                     continue
 
-            # For Senate
-            # check for something that looks like the page number
-            if tag_name == 'b':
-                page_number_match = re.search( r'\s{10,}(\d+)', line.text )
+                # For Senate
+                # check for something that looks like the page number
+                page_number_match = cls.sen_page_number_reg.search( text_content )
                 if page_number_match:
                     # set the page number - the match is the page that we are on
                     page_number = int(page_number_match.group(0))
                     continue
 
-            if tag_name == 'b':
-                if re.search( r'\s*Disclaimer:', line.text ):
+                if cls.disclaimer_reg.search( text_content ):
                     # This is a disclaimer line that we can skip
                     continue
 
-            # if br_count > 0:
-            #     print 'br_count: ' + str(br_count)
-            # print type( line )
-            # # if type(line) == Tag: print line.name
-            # print "%s: >>>%s<<<" % (tag_name, text_content)
-            # print '------------------------------------------------------'
-
             text_content = text_content.strip()
-            text_content = re.sub( r'\s+', ' ', text_content )
+            text_content = cls.whitespace_reg.sub( ' ', text_content )
 
-            filtered_contents.append(dict(
+            yield dict(
                 tag_name     = tag_name,
                 text_content = text_content,
                 br_count     = br_count,
                 page_number  = page_number,
-            ))
+            )
 
             br_count = 0
 
-        # go through all the filtered_content and using the br_count determine
-        # when lines should be merged
-        merged_contents = []
+
+    @classmethod
+    def merge_filtered_contents(cls, filtered_contents):
+        """Generate the lines that result from merging related filtered lines
+
+        The br_count is used to determine when lines should be merged."""
+
+        current      = None
+        text_content = []
 
         for line in filtered_contents:
 
-            # print line
             br_count = line['br_count']
 
             # Join lines that have the same tag_name and are not too far apart
             same_tag_name_test = (
                     br_count <= 1
-                and len(merged_contents)
-                and line['tag_name'] == merged_contents[-1]['tag_name']
+                and current is not None
+                and line['tag_name'] == current['tag_name']
             )
 
             # Italic text in the current unstyled text
             inline_italic_test = (
                     br_count == 0
-                and len(merged_contents)
+                and current is not None
                 and line['tag_name'] == 'i'
-                and merged_contents[-1]['tag_name'] == None
+                and current['tag_name'] == None
             )
 
             # Merge lines tha meet one of the above tests
             if ( same_tag_name_test or inline_italic_test ):
-                new_content = ' '.join( [ merged_contents[-1]['text_content'], line['text_content'] ] )
-                new_content = re.sub( r'\s+,', ',', new_content )
-                merged_contents[-1]['text_content'] = new_content
+                text_content.append( line['text_content'] )
             else:
-                merged_contents.append( line )
+                if current is not None:
+                    yield cls._merged_line( current, text_content )
+                current      = line
+                text_content = [ line['text_content'] ]
+
+        if current is not None:
+            yield cls._merged_line( current, text_content )
+
+
+    @classmethod
+    def _merged_line(cls, first_line, text_content):
+        """Return first_line with its text replaced by the joined text_content"""
+
+        # Only text that has been joined has spaces before commas removed.
+        # Doing that once over the whole text gives the same result as
+        # doing it after each join, as each part has been stripped.
+        if len(text_content) > 1:
+            first_line['text_content'] = cls.space_before_comma_reg.sub( ',', ' '.join( text_content ) )
+        return first_line
+
+
+    @classmethod
+    def classify_merged_contents(cls, merged_contents):
+        """Generate meaningful chunks (speeches, headings etc) from merged lines"""
 
-        # now go through and create some meaningful chunks from what we see
-        meaningful_content = []
         last_speaker_name  = ''
         last_speaker_title = ''
 
-        while len(merged_contents):
+        # Look one line ahead, as the start of a speech depends on the next line.
+        merged_contents = iter(merged_contents)
+        next_line = next(merged_contents, None)
 
-            line = merged_contents.pop(0)
-            next_line = merged_contents[0] if len(merged_contents) else None
+        while next_line is not None:
 
-            # print '----------------------------------------'
-            # print line
+            line = next_line
+            next_line = next(merged_contents, None)
 
             # if the content is italic then it is a scene
             if line['tag_name'] == 'i':
-                meaningful_content.append({
+                yield {
                     'type': 'scene',
                     'text': line['text_content'],
                     'page_number': line['page_number'],
-                })
+                }
                 continue
 
             # if the content is all caps then it is a heading
             if line['text_content'] == line['text_content'].upper():
-                meaningful_content.append({
+                yield {
                     'type': 'heading',
                     'text': line['text_content'],
                     'page_number': line['page_number'],
-                })
+                }
                 last_speaker_name  = ''
                 last_speaker_title = ''
                 continue
@@ -322,7 +378,7 @@ class KenyaParser():
                 # start of the speech.
                 speech = line['text_content']
 
-                matches = re.match( r'\(([^\)]+)\):(.*)', speech )
+                matches = cls.speaker_in_speech_reg.match( speech )
                 if matches:
                     last_speaker_title = last_speaker_name
                     last_speaker_name = matches.group(1)
@@ -331,17 +387,15 @@ class KenyaParser():
                     # strip leading colons that may have been missed when the
                     # name was extracted (usually the colon was outside the
                     # bold tags around the name)
-                    speech = re.sub( r'^:\s*', '', speech)
+                    speech = cls.leading_colon_reg.sub( '', speech )
 
-                meaningful_content.append({
+                yield {
                     'speaker_name':  last_speaker_name,
                     'speaker_title': last_speaker_title,
                     'text': speech,
                     'type': 'speech',
                     'page_number': line['page_number'],
-                })
-
-                # print meaningful_content[-1]
+                }
 
                 continue
 
@@ -357,21 +411,14 @@ class KenyaParser():
                 last_speaker_title = ''
                 continue
 
-            meaningful_content.append({
+            yield {
                 'type': 'other',
                 'text': line['text_content'],
                 'page_number': line['page_number'],
-            })
+            }
             last_speaker_name  = ''
             last_speaker_title = ''
 
-        hansard_data = {
-            'meta': cls.extract_meta_from_transcript( meaningful_content ),
-            'transcript': meaningful_content,
-        }
-
-        return hansard_data
-
 
     @classmethod
     def extract_meta_from_transcript(cls, transcript):
@@ -530,12 +577,13 @@ class KenyaParser():
         sitting.save()
 
         with transaction.commit_on_success():
+            entries = []
             counter = 0
             for line in data['transcript']:
 
                 counter += 1
 
-                entry = Entry(
+                entries.append(Entry(
                     sitting       = sitting,
                     type          = line['type'],
                     page_number   = line['page_number'],
@@ -543,10 +591,19 @@ class KenyaParser():
                     speaker_name  = line.get('speaker_name',  ''),
                     speaker_title = line.get('speaker_title', ''),
                     content       = line['text'],
-                )
-                entry.save()
+                ))
+
+            # Insert the entries in batches rather than one at a time;
+            # this doesn't send the post_save signals, so they are
+            # added to the search index together below.
+            Entry.objects.bulk_create(entries, batch_size=cls.entry_batch_size)
 
             source.last_processing_success = datetime.datetime.now()
             source.save()
 
+        update_objects_in_search_index(
+            Entry,
+            Entry.objects.filter(sitting=sitting).select_related('sitting__venue'),
+        )
+
         return None
@@ -1,3 +1,5 @@
+from optparse import make_option
+
 from django.conf import settings
 from django.core.management.base import NoArgsCommand
 
@@ -8,6 +10,16 @@ class Command(NoArgsCommand):
     help = 'Try to assign a person to each entry'
     args = ''
 
+    option_list = NoArgsCommand.option_list + (
+        make_option('--bulk', action='store_true', dest='bulk',
+                    help='Match names in memory and update entries in bulk (much faster)'),
+    )
+
     def handle_noargs(self, **options):
         algorithm = settings.HANSARD_NAME_MATCHING_ALGORITHM
-        Entry.assign_speakers(name_matching_algorithm=algorithm)
+        if options['bulk']:
+            updated = Entry.assign_speakers_in_bulk(name_matching_algorithm=algorithm)
+            if int(options['verbosity']) >= 2:
+                print "Assigned speakers to %d entries" % updated
+        else:
+            Entry.assign_speakers(name_matching_algorithm=algorithm)
@@ -0,0 +1,61 @@
+import glob
+import os
+import time
+
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+
+from pombola.hansard.kenya_parser import KenyaParser
+
+# The sample transcripts used in the parser tests
+DEFAULT_HTML_FILES = glob.glob(
+    os.path.join(os.path.dirname(__file__), '..', '..', 'tests', '*.html'))
+
+
+class Command(BaseCommand):
+    help = 'Time converting Hansard HTML to data (defaults to the test samples)'
+    args = '[HTML-FILE ...]'
+
+    option_list = BaseCommand.option_list + (
+        make_option('--repeat', dest='repeat', type='int', default=5,
+                    help='How many times to convert each file (default 5)'),
+        make_option('--multiply', dest='multiply', type='int', default=1,
+                    help='Repeat the body of each file this many times, to check how the time scales'),
+    )
+
+    def handle(self, *args, **options):
+        filenames = args or sorted(DEFAULT_HTML_FILES)
+
+        for filename in filenames:
+            with open(filename) as f:
+                html = f.read()
+
+            if options['multiply'] > 1:
+                html = self.multiply_body(html, options['multiply'])
+
+            timings = []
+            for i in range(options['repeat']):
+                start = time.time()
+                data = KenyaParser.convert_html_to_data(html)
+                timings.append(time.time() - start)
+
+            print "{0}: {1} entries, best {2:.3f}s, mean {3:.3f}s over {4} runs".format(
+                os.path.basename(filename),
+                len(data['transcript']),
+                min(timings),
+                sum(timings) / len(timings),
+                len(timings),
+            )
+
+    def multiply_body(self, html, times):
+        lower_html = html.lower()
+        body_start = lower_html.index('>', lower_html.index('<body')) + 1
+        body_end = lower_html.rfind('</body>')
+        if body_end < 0:
+            body_end = len(html)
+        return (
+            html[:body_start] +
+            html[body_start:body_end] * times +
+            html[body_end:]
+        )
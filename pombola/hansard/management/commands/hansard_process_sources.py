@@ -1,18 +1,53 @@
 import datetime
+import multiprocessing
+import traceback
 
-from django.core.management.base import NoArgsCommand
+from optparse import make_option
+
+from django.core.management.base import NoArgsCommand, CommandError
+from django.db import connection
 
 from pombola.hansard.models import Source
 from pombola.hansard.kenya_parser import KenyaParser
 
+
+def fetch_and_parse_source(source):
+    """Fetch and parse a source, returning (source, fetched, transcript, error)
+
+    This is run in a worker process, so it mustn't use the database.
+    fetched is False if the source's file couldn't be downloaded. If
+    anything goes wrong transcript is None and error is the traceback."""
+
+    try:
+        pdf = source.file()
+    except Exception:
+        return source, False, None, traceback.format_exc()
+
+    try:
+        html = KenyaParser.convert_pdf_to_html( pdf )
+        transcript = KenyaParser.convert_html_to_transcript( html )
+        return source, True, transcript, None
+    except Exception:
+        return source, True, None, traceback.format_exc()
+
+
 class Command(NoArgsCommand):
     help = 'Process all sources that have not been done'
     args = ''
 
+    option_list = NoArgsCommand.option_list + (
+        make_option('--jobs', dest='jobs', type='int', default=1,
+                    help='Fetch and parse this many sources at once in worker processes'),
+    )
+
     def handle_noargs(self, **options):
 
         verbose = int(options.get('verbosity')) >= 2
 
+        if options['jobs'] > 1:
+            self.process_in_parallel(options['jobs'], verbose)
+            return
+
         for source in Source.objects.all().requires_processing():
 
             if verbose:
@@ -31,3 +66,66 @@ class Command(NoArgsCommand):
             except Exception as e:
                 print "There was an exception when parsing {0}".format(pdf)
                 raise
+
+    def process_in_parallel(self, jobs, verbose):
+        """Fetch and parse sources in a pool of processes
+
+        The entries are all created here, in the parent process, as
+        each worker finishes. A source that fails doesn't stop the
+        others from being processed. As in the sequential case, a
+        source whose file couldn't be downloaded isn't marked as
+        attempted, so it's tried again next time, but one that was
+        downloaded and failed to parse is."""
+
+        sources = list(Source.objects.all().requires_processing())
+        if not sources:
+            return
+
+        # Don't share this process's database connection with the
+        # workers; it will be reopened when it's next needed.
+        connection.close()
+
+        pool = multiprocessing.Pool(jobs)
+        failed = []
+
+        try:
+            for source, fetched, transcript, error in pool.imap_unordered(fetch_and_parse_source, sources):
+
+                if not fetched:
+                    print "There was an exception when fetching {0}".format(source)
+                    print error
+                    failed.append(source)
+                    continue
+
+                if verbose:
+                    message = "{0}: Parsed {1}"
+                    print message.format(source.list_page, source)
+
+                source.last_processing_attempt = datetime.datetime.now()
+                source.save()
+
+                if error is None:
+                    try:
+                        data = {
+                            'meta': KenyaParser.extract_meta_from_transcript( transcript ),
+                            'transcript': transcript,
+                        }
+                        KenyaParser.create_entries_from_data_and_source( data, source )
+                    except Exception:
+                        error = traceback.format_exc()
+
+                if error is not None:
+                    print "There was an exception when parsing {0}".format(source)
+                    print error
+                    failed.append(source)
+        except:
+            pool.terminate()
+            raise
+        else:
+            pool.close()
+        finally:
+            pool.join()
+
+        if failed:
+            raise CommandError(
+                "Failed to process {0} of {1} sources".format(len(failed), len(sources)))
@@ -9,6 +9,15 @@ from pombola.hansard.models.base import HansardModelBase
 from pombola.hansard.constants import NAME_SUBSTRING_MATCH, NAME_SET_INTERSECTION_MATCH
 
 
+def person_name_words(name):
+    """Return the set of words in a person's name, as used by alias_match_score"""
+    return set(filter(lambda item : len(item) > 1, re.sub('[^A-Za-z]',' ', name).split()))
+
+def speaker_name_words(name):
+    """Return the set of words in a speaker name, as used by alias_match_score"""
+    return set(filter(lambda item : len(item) > 1, re.sub('[^A-za-z]',' ', name).split()))
+
+
 class EntryQuerySet(models.query.QuerySet):
     def monthly_appearance_counts(self):
         """Return an list of dictionaries for dates and counts for each month"""
@@ -87,7 +96,9 @@ class Entry(HansardModelBase):
 
     @classmethod
     def assign_speakers(cls, name_matching_algorithm=NAME_SET_INTERSECTION_MATCH):
-        """Go through all entries and assign speakers"""
+        """Go through all entries and assign speakers
+
+        See assign_speakers_in_bulk for a much faster way of doing this."""
 
         entries = cls.objects.all().unassigned_speeches()
 
@@ -112,13 +123,26 @@ class Entry(HansardModelBase):
                 entry.speaker = speaker
                 entry.save()
 
+    @classmethod
+    def assign_speakers_in_bulk(cls, name_matching_algorithm=NAME_SET_INTERSECTION_MATCH):
+        """Assign speakers to all entries, matching names in memory
+
+        This gives the same results as assign_speakers, but with far
+        fewer queries. Returns the number of entries assigned a speaker."""
+
+        # import here to avoid creating an import loop
+        from pombola.hansard.speaker_matching import BulkSpeakerAssigner
+
+        assigner = BulkSpeakerAssigner(name_matching_algorithm)
+        return assigner.assign()
+
     def alias_match_score(self, name_one, name_two):
         """
         Return a score based on the intersection of two names including titles
         minus all punctuation.
         """
-        set_one = set(filter(lambda item : len(item) > 1, re.sub('[^A-Za-z]',' ', name_one).split()))
-        set_two = set(filter(lambda item : len(item) > 1, re.sub('[^A-za-z]',' ', name_two).split()))
+        set_one = person_name_words(name_one)
+        set_two = speaker_name_words(name_two)
         return len(set_one & set_two)
 
     def possible_matching_speakers(self, update_aliases=False, name_matching_algorithm=NAME_SET_INTERSECTION_MATCH):
@@ -0,0 +1,179 @@
+"""
+Assign speakers to many Hansard entries at once.
+
+Entry.possible_matching_speakers() works on a single entry and runs
+several queries each time it's called. The BulkSpeakerAssigner here
+produces the same matches for all the unassigned speeches, but loads
+the aliases once, and the politicians once per sitting date, and does
+the name matching in memory. The speakers are then set with one UPDATE
+per person rather than a save() per entry.
+"""
+
+from collections import defaultdict
+import re
+
+from django.db import transaction
+
+from pombola.core.models import Person, Position
+from pombola.hansard.constants import NAME_SUBSTRING_MATCH, NAME_SET_INTERSECTION_MATCH
+from pombola.hansard.models import Alias, Entry
+from pombola.hansard.models.entry import person_name_words, speaker_name_words
+
+# The maximum number of entry IDs to put in a single UPDATE:
+UPDATE_CHUNK_SIZE = 500
+
+title_prefix_re = re.compile(r'^\w+\.\s')
+
+
+class PoliticianRoster(object):
+    """The politicians on a particular date, indexed by the words in their names"""
+
+    def __init__(self, when):
+        self.people = list(
+            Person
+            .objects
+            .all()
+            .is_politician(when=when)
+            .exclude(hidden=True)
+            .distinct()
+            .values_list('id', 'title', 'legal_name')
+        )
+
+        self.people_by_word = defaultdict(set)
+        for person_id, title, legal_name in self.people:
+            for word in person_name_words('%s %s' % (title, legal_name)):
+                self.people_by_word[word].add(person_id)
+
+    def set_intersection_matches(self, name):
+        """Return IDs of people with more than one word in common with name"""
+
+        words_in_common = defaultdict(int)
+        for word in speaker_name_words(name):
+            for person_id in self.people_by_word.get(word, ()):
+                words_in_common[person_id] += 1
+        return [person_id for person_id, count in words_in_common.items()
+                if count > 1]
+
+    def substring_matches(self, name):
+        """Return IDs of people whose legal name contains name, ignoring case"""
+
+        name = name.lower()
+        return [person_id for person_id, title, legal_name in self.people
+                if name in legal_name.lower()]
+
+
+class BulkSpeakerAssigner(object):
+
+    def __init__(self, name_matching_algorithm=NAME_SET_INTERSECTION_MATCH):
+        self.name_matching_algorithm = name_matching_algorithm
+        self.aliases = dict((a.alias, a) for a in Alias.objects.all())
+        self.rosters = {}
+        self.position_titles = None
+
+    def roster(self, when):
+        if when not in self.rosters:
+            self.rosters[when] = PoliticianRoster(when)
+        return self.rosters[when]
+
+    def position_titles_for(self, person_ids):
+        """Return a dict mapping each person ID to the titles they've ever held"""
+
+        if self.position_titles is None:
+            self.position_titles = defaultdict(list)
+            titles = (
+                Position
+                .objects
+                .filter(title__isnull=False)
+                .values_list('person_id', 'title__name')
+            )
+            for person_id, title_name in titles:
+                self.position_titles[person_id].append(title_name)
+        return dict((i, self.position_titles.get(i, [])) for i in person_ids)
+
+    def possible_matching_speakers(self, speaker_name, when, venue_name, source_name):
+        """Return IDs of the people who might be speaker_name
+
+        This mirrors Entry.possible_matching_speakers with update_aliases
+        set, including the changes it makes to the alias table."""
+
+        name = Alias.clean_up_name(speaker_name)
+
+        alias = self.aliases.get(name)
+        if alias:
+            if alias.ignored:
+                return []
+            elif alias.person_id:
+                return [alias.person_id]
+
+        roster = self.roster(when)
+
+        if self.name_matching_algorithm == NAME_SUBSTRING_MATCH:
+            results = roster.substring_matches(title_prefix_re.sub('', name))
+
+            # if the results are ambiguous, try restricting to members of
+            # the current house unless it's a joint sitting - see
+            # Entry.possible_matching_speakers
+            if len(results) > 1 and 'Joint Sitting' not in source_name:
+                house_title = 'Senator' if venue_name == 'Senate' else venue_name
+                titles = self.position_titles_for(results)
+                current_house = [i for i in results
+                                 if any(house_title in t for t in titles[i])]
+                if current_house:
+                    results = current_house
+        else:
+            results = roster.set_intersection_matches(name)
+
+        found_one_result = len(results) == 1
+
+        # If there is a single matching speaker and an unassigned alias delete it
+        if found_one_result and alias:
+            alias.delete()
+            del self.aliases[name]
+
+        # create an entry in the aliases table if one is needed
+        if not alias and not found_one_result and not Alias.can_ignore_name(name):
+            self.aliases[name] = Alias.objects.create(
+                alias   = name,
+                ignored = False,
+                person  = None,
+            )
+
+        return results
+
+    @transaction.commit_on_success
+    def assign(self):
+        """Set the speaker on every unassigned speech that has a single match
+
+        Returns the number of entries that were updated."""
+
+        entries = (
+            Entry
+            .objects
+            .all()
+            .unassigned_speeches()
+            .values_list(
+                'id',
+                'speaker_name',
+                'sitting__start_date',
+                'sitting__venue__name',
+                'sitting__source__name',
+            )
+        )
+
+        matches = {}
+        entry_ids_for_speaker = defaultdict(list)
+
+        for entry_id, speaker_name, when, venue_name, source_name in entries:
+            key = (speaker_name, when, venue_name, source_name)
+            if key not in matches:
+                matches[key] = self.possible_matching_speakers(*key)
+            speakers = matches[key]
+            if len(speakers) == 1:
+                entry_ids_for_speaker[speakers[0]].append(entry_id)
+
+        updated = 0
+        for speaker_id, entry_ids in entry_ids_for_speaker.items():
+            for i in range(0, len(entry_ids), UPDATE_CHUNK_SIZE):
+                chunk = entry_ids[i:i + UPDATE_CHUNK_SIZE]
+                updated += Entry.objects.filter(id__in=chunk).update(speaker=speaker_id)
+        return updated
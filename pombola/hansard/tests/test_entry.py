@@ -2,7 +2,7 @@ from datetime import date
 
 from django.test import TestCase
 from pombola.core.models import Person, Place, PlaceKind, Position, PositionTitle
-from pombola.hansard.models import Source, Sitting, Venue, Entry
+from pombola.hansard.models import Alias, Source, Sitting, Venue, Entry
 from pombola.hansard.models.entry import NAME_SUBSTRING_MATCH
 
 
@@ -153,3 +153,85 @@ class HansardEntryTest(TestCase):
             self.mp,
             possible_speakers[0]
         )
+
+
+class HansardBulkSpeakerAssignmentTest(TestCase):
+
+    def setUp(self):
+        source = Source.objects.create(
+            date = date(2011, 11, 15),
+            name = 'test source'
+        )
+        na = Venue.objects.create(
+            name='National Assembly',
+            slug='national-assembly'
+        )
+        self.sitting = Sitting.objects.create(
+            source     = source,
+            venue      = na,
+            start_date = date(2011, 11, 15),
+        )
+        na_member_title = PositionTitle.objects.create(
+            name='Member of the National Assembly',
+            slug='member-national-assembly',
+        )
+
+        self.mp = Person.objects.create(
+            legal_name='Paul Jones',
+            slug='paul-jones'
+        )
+        self.other_mp = Person.objects.create(
+            legal_name='Paula Smith',
+            slug='paula-smith'
+        )
+        for person in (self.mp, self.other_mp):
+            Position.objects.create(
+                person=person,
+                category='political',
+                title=na_member_title,
+            )
+
+    def create_entry(self, speaker_name):
+        return Entry.objects.create(
+            sitting       = self.sitting,
+            type          = 'speech',
+            page_number   = 12,
+            text_counter  = Entry.objects.count(),
+            speaker_name  = speaker_name,
+            content       = 'test',
+        )
+
+    def test_assign_speakers_in_bulk(self):
+        matched = [self.create_entry('Mr. Paul Jones') for i in range(3)]
+        unmatched = self.create_entry('Mr. Nobody Known')
+        ignored = self.create_entry('Mr. Deputy Speaker')
+
+        updated = Entry.assign_speakers_in_bulk()
+
+        self.assertEqual(3, updated)
+        for entry in matched:
+            self.assertEqual(self.mp, Entry.objects.get(pk=entry.pk).speaker)
+        self.assertIsNone(Entry.objects.get(pk=unmatched.pk).speaker)
+        self.assertIsNone(Entry.objects.get(pk=ignored.pk).speaker)
+
+        # An alias should have been created for the unmatched name, so
+        # that someone can check it, but not for the ignorable one:
+        self.assertEqual(
+            ['Mr. Nobody Known'],
+            [a.alias for a in Alias.objects.all().unassigned()])
+
+    def test_bulk_uses_aliases(self):
+        Alias.objects.create(alias='Mr. Smith', person=self.other_mp)
+        entry = self.create_entry('Mr. Smith')
+
+        Entry.assign_speakers_in_bulk()
+
+        self.assertEqual(self.other_mp, Entry.objects.get(pk=entry.pk).speaker)
+
+    def test_bulk_substring_match(self):
+        entry = self.create_entry('Mr. Jones')
+
+        Entry.assign_speakers_in_bulk(
+            name_matching_algorithm=NAME_SUBSTRING_MATCH)
+
+        self.assertEqual(self.mp, Entry.objects.get(pk=entry.pk).speaker)
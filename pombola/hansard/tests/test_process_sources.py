@@ -0,0 +1,75 @@
+import datetime
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TransactionTestCase
+
+from mock import Mock, patch
+
+from pombola.hansard.kenya_parser import KenyaParser
+from pombola.hansard.models import Source
+
+
+def fake_file(source, http_object=None):
+    if source.name == 'Missing':
+        raise Exception("Couldn't download {0}".format(source.url))
+    return source.name
+
+
+def fake_convert_html_to_transcript(html):
+    if html == 'Unparseable':
+        raise Exception("Couldn't parse {0}".format(html))
+    return [{'type': 'speech', 'text': html}]
+
+
+# The sources are fetched and parsed in worker processes, which
+# inherit the patched methods, but can only see committed data:
+@patch.object(Source, 'file', fake_file)
+@patch.object(KenyaParser, 'convert_pdf_to_html', Mock(side_effect=lambda pdf: pdf))
+@patch.object(KenyaParser, 'convert_html_to_transcript',
+              Mock(side_effect=fake_convert_html_to_transcript))
+@patch.object(KenyaParser, 'extract_meta_from_transcript', Mock(return_value={}))
+class ProcessSourcesInParallelTest(TransactionTestCase):
+
+    def create_source(self, name):
+        return Source.objects.create(
+            name=name,
+            url='http://example.com/{0}.pdf'.format(name.lower()),
+            date=datetime.date(2011, 11, 14),
+        )
+
+    def reload(self, source):
+        return Source.objects.get(id=source.id)
+
+    def test_sources_are_processed(self):
+        sources = [self.create_source(name) for name in ('First', 'Second', 'Third')]
+
+        with patch.object(KenyaParser, 'create_entries_from_data_and_source') as mock_create:
+            call_command('hansard_process_sources', jobs=2)
+
+        for source in sources:
+            self.assertIsNotNone(self.reload(source).last_processing_attempt)
+        self.assertEqual(
+            sorted(
+                (source.id, data['transcript'][0]['text'])
+                for (data, source), _ in mock_create.call_args_list),
+            sorted((source.id, source.name) for source in sources))
+
+    def test_failed_download_is_retried(self):
+        good = self.create_source('Good')
+        missing = self.create_source('Missing')
+        unparseable = self.create_source('Unparseable')
+
+        with patch.object(KenyaParser, 'create_entries_from_data_and_source') as mock_create:
+            with self.assertRaises(CommandError):
+                call_command('hansard_process_sources', jobs=2)
+
+        self.assertEqual(
+            [source.id for (data, source), _ in mock_create.call_args_list],
+            [good.id])
+        self.assertIsNotNone(self.reload(good).last_processing_attempt)
+        self.assertIsNotNone(self.reload(unparseable).last_processing_attempt)
+        # The source that couldn't be downloaded is left to be tried again:
+        self.assertIsNone(self.reload(missing).last_processing_attempt)
+        self.assertEqual(
+            list(Source.objects.all().requires_processing()), [self.reload(missing)])
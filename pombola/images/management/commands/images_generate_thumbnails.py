@@ -0,0 +1,29 @@
+from multiprocessing import cpu_count
+from optparse import make_option
+
+from django.core.management.base import NoArgsCommand, CommandError
+
+from pombola.images.thumbnails import generate_all_thumbnails
+
+
+class Command(NoArgsCommand):
+    help = 'Make the thumbnails in PREGENERATED_THUMBNAILS of any images that are missing them'
+
+    option_list = NoArgsCommand.option_list + (
+        make_option('--processes', dest='processes', type='int', default=cpu_count(),
+                    help='Resize this many images at once (defaults to the number of CPUs)'),
+    )
+
+    def handle_noargs(self, **options):
+        if options['processes'] < 1:
+            raise CommandError("--processes must be at least 1")
+
+        verbose = int(options['verbosity']) >= 2
+
+        made, failures = generate_all_thumbnails(
+            processes=options['processes'], verbose=verbose)
+
+        for image_id, error in failures:
+            print "Failed to make thumbnails of image {0}: {1}".format(image_id, error)
+        if verbose:
+            print "Made {0} thumbnails".format(made)
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models.signals import post_save
+from django.dispatch import receiver
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes import generic
 
@@ -34,25 +36,80 @@ class Image(models.Model):
         )
         
         # check that we are not first entry for content_object
-        if not siblings.count():
+        if not siblings.exists():
             self.is_primary = True
 
         super(Image, self).save(*args, **kwargs)
 
         # If we are true then make sure all others are false
         if self.is_primary is True:
+            siblings.filter(is_primary=True).exclude(id=self.id).update(is_primary=False)
 
-            primary_siblings = siblings.exclude( is_primary = False ).exclude( id = self.id )
+        self.update_cached_primary_image()
 
-            for sibling in primary_siblings:
-                sibling.is_primary = False
-                sibling.save()
+    def update_cached_primary_image(self):
+        """
+        Keep the cached_primary_image of the object this is an image of
+        pointing at its primary image. (When an image is deleted, the
+        foreign key is set to null by the database delete.)
+        """
+
+        model = ContentType.objects.get_for_id(self.content_type_id).model_class()
+        if model is None or not issubclass(model, HasImageMixin):
+            return
+
+        if self.is_primary:
+            model.objects.filter(id=self.object_id).update(cached_primary_image=self)
+        else:
+            model.objects.filter(cached_primary_image=self).update(cached_primary_image=None)
 
 
 class HasImageMixin():
+    """
+    Models using this should have a cached_primary_image foreign key to
+    Image, with related_name='+', null=True and on_delete=SET_NULL,
+    which Image.save() keeps up to date. To avoid a query per object
+    when showing many of them, use select_related('cached_primary_image')
+    or attach_primary_images().
+    """
 
     def primary_image(self):
-        primary = [i for i in self.images.all() if i.is_primary]
-        if primary:
-            return primary[0].image
-        return None
+        if self.cached_primary_image_id is None:
+            return None
+        return self.cached_primary_image.image
+
+
+def attach_primary_images(objects):
+    """
+    Fetch the primary images of a list of objects using HasImageMixin
+    with a single query, so that calling primary_image() on them doesn't
+    query the database. Returns the list of objects.
+    """
+
+    objects = list(objects)
+    image_ids = set(o.cached_primary_image_id for o in objects if o.cached_primary_image_id)
+    if image_ids:
+        images = Image.objects.in_bulk(image_ids)
+        for o in objects:
+            image = images.get(o.cached_primary_image_id)
+            if image is not None:
+                o.cached_primary_image = image
+    return objects
+
+
+@receiver(post_save, sender=Image)
+def generate_thumbnails_on_save(sender, instance, raw=False, **kwargs):
+    """Make the thumbnails of a new or changed image straight away"""
+
+    if raw or not instance.image:
+        return
+
+    # import here to avoid creating an import loop
+    from pombola.images.thumbnails import generate_thumbnails
+
+    try:
+        generate_thumbnails(instance.image)
+    except IOError:
+        # The image can't be read; saving it shouldn't fail because of
+        # that, and images_generate_thumbnails will report it.
+        pass
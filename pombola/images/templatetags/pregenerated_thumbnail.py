@@ -0,0 +1,25 @@
+from django import template
+
+from pombola.images.thumbnails import rendered_thumbnail
+
+register = template.Library()
+
+
+@register.assignment_tag
+def pregenerated_thumbnail(file_, geometry_string, **options):
+    """Find a thumbnail of an image, but only if it's already been made
+
+    This takes the same arguments as sorl-thumbnail's thumbnail tag, but
+    never makes the thumbnail, so that showing a page doesn't have to
+    wait for images to be resized. The thumbnails in
+    PREGENERATED_THUMBNAILS are made when an image is saved. For
+    example:
+
+        {% pregenerated_thumbnail object.primary_image "90x90" crop="center" as im %}
+        {% if im %}
+          <img src="{{ im.url }}" width="{{ im.width }}" height="{{ im.height }}"/>
+        {% else %}
+          <img src="{% static 'images/person-90x90.jpg' %}" />
+        {% endif %}
+    """
+    return rendered_thumbnail(file_, geometry_string, **options)
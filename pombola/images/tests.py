@@ -1,11 +1,14 @@
 import os
 
+from django.conf import settings
 from django.test import TestCase
+from django.template import Context, Template
 from django.core.files import File
 from django.contrib.sites.models import Site
 from django.contrib.contenttypes.models import ContentType
 
 from models import Image
+from thumbnails import rendered_thumbnail
 
 from nose.tools import nottest
 
@@ -105,3 +108,39 @@ class ImageTest(TestCase):
         #   pip install pillow
 
         im = get_thumbnail(third.image, '100x100', crop='center', quality=99)
+
+    def test_pregenerated_thumbnails(self):
+        """
+        Test that saving an image makes the pregenerated thumbnails
+        """
+
+        test_site = Site.objects.all()[0]
+
+        image = Image(
+            content_type = ContentType.objects.get_for_model(test_site),
+            object_id    = test_site.id,
+            source       = 'test directory',
+        )
+        image.image.save(
+            name    = 'foo.png',
+            content = self.get_test_file_content('foo.png'),
+        )
+
+        for geometry_string, options in settings.PREGENERATED_THUMBNAILS:
+            self.assertIsNotNone(
+                rendered_thumbnail(image.image, geometry_string, **options))
+
+        # Other sizes aren't made when they're asked for
+        self.assertIsNone(rendered_thumbnail(image.image, '37x37'))
+
+        template = Template(
+            '{% load pregenerated_thumbnail %}'
+            '{% pregenerated_thumbnail image size crop="center" as im %}'
+            '{% if im %}{{ im.width }}{% else %}placeholder{% endif %}'
+        )
+        self.assertEqual(
+            template.render(Context({'image': image.image, 'size': '90x90'})),
+            '90')
+        self.assertEqual(
+            template.render(Context({'image': image.image, 'size': '37x37'})),
+            'placeholder')
@@ -0,0 +1,121 @@
+"""
+Making the thumbnails of images in advance.
+
+sorl-thumbnail makes a thumbnail the first time it's asked for, which
+means opening and resizing the original image in the middle of a
+request; after importing a lot of photos that makes the first views of
+every listing very slow. Instead, the thumbnails listed in
+settings.PREGENERATED_THUMBNAILS are made whenever an image is saved,
+or for every image with the images_generate_thumbnails command, and the
+pregenerated_thumbnail template tag only uses thumbnails that have
+already been made, so the page can show a placeholder instead.
+"""
+
+from multiprocessing import Pool
+
+from django.conf import settings
+from django.db import connection
+
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+
+from pombola.images.models import Image
+
+
+def rendered_thumbnail(file_, geometry_string, **options):
+    """Return the thumbnail get_thumbnail() would if it's already been made, or None
+
+    This only looks the thumbnail up in sorl-thumbnail's key value
+    store, so it never opens the original image. To find the same key
+    as get_thumbnail() it copies the way sorl-thumbnail 12.3 merges in
+    the default options, and calls the private
+    backend._get_thumbnail_filename(). If the pinned sorl-thumbnail
+    version is upgraded and either of those changes, every lookup here
+    would miss and placeholders would be shown instead of thumbnails
+    across the whole site, so check this when upgrading."""
+
+    if not file_:
+        return None
+
+    backend = default.backend
+    for key, value in backend.default_options.iteritems():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(thumbnail_settings, attr)
+        if value != getattr(default_settings, attr):
+            options.setdefault(key, value)
+
+    name = backend._get_thumbnail_filename(ImageFile(file_), geometry_string, options)
+    return default.kvstore.get(ImageFile(name, default.storage))
+
+
+def generate_thumbnails(file_):
+    """Make any of the pregenerated thumbnails of an image that don't exist yet
+
+    Returns the number of thumbnails made. Raises IOError if the image
+    couldn't be read."""
+
+    made = 0
+    for geometry_string, options in settings.PREGENERATED_THUMBNAILS:
+        if rendered_thumbnail(file_, geometry_string, **options) is None:
+            thumbnail = get_thumbnail(file_, geometry_string, **options)
+            if not thumbnail.exists():
+                raise IOError("Couldn't make a {0} thumbnail of {1}".format(
+                    geometry_string, file_.name))
+            made += 1
+    return made
+
+
+def generate_image_thumbnails(image_id):
+    """Make the thumbnails of the Image with this ID
+
+    This is run in a worker process. Returns the image ID, the number
+    of thumbnails made and an error message if the image couldn't be
+    read."""
+
+    try:
+        image = Image.objects.get(id=image_id)
+        return image_id, generate_thumbnails(image.image), None
+    except Image.DoesNotExist:
+        return image_id, 0, None
+    except IOError as e:
+        return image_id, 0, str(e)
+
+
+def generate_all_thumbnails(image_ids=None, processes=None, verbose=False):
+    """Make the pregenerated thumbnails of all images that don't have them yet
+
+    If image_ids isn't given, every image is checked. processes is the
+    size of the pool of worker processes, which defaults to the number
+    of CPUs. Returns the number of thumbnails made, and a list of
+    (image_id, error_message) for the images that couldn't be read."""
+
+    if image_ids is None:
+        image_ids = list(Image.objects.order_by('id').values_list('id', flat=True))
+
+    made = 0
+    failures = []
+
+    # Don't let the worker processes share this process's database
+    # connection; each opens its own.
+    connection.close()
+    pool = Pool(processes)
+    try:
+        for image_id, image_made, error in pool.imap_unordered(
+                generate_image_thumbnails, image_ids):
+            made += image_made
+            if error:
+                failures.append((image_id, error))
+            if verbose:
+                print "Made {0} thumbnails of image {1}".format(image_made, image_id)
+    except:
+        pool.terminate()
+        raise
+    else:
+        pool.close()
+    finally:
+        pool.join()
+
+    return made, failures
@@ -0,0 +1,47 @@
+from optparse import make_option
+import os
+from os.path import exists, isdir, join
+
+import unicodecsv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...models import Release
+from ...tabulation import release_table
+
+
+class Command(BaseCommand):
+    args = 'OUTPUT-DIRECTORY'
+    help = 'Write a CSV file of all the entries in each release, with a column for each line item key'
+
+    option_list = BaseCommand.option_list + (
+        make_option('--release', dest='release_slugs', action='append', default=[],
+                    help='Only export the release with this slug (may be repeated)'),
+    )
+
+    def handle(self, *args, **options):
+        if len(args) != 1:
+            raise CommandError("You must provide an output directory")
+
+        output_directory = args[0]
+        if not exists(output_directory):
+            os.makedirs(output_directory)
+        elif not isdir(output_directory):
+            message = "'{0}' was not a directory"
+            raise CommandError(message.format(output_directory))
+
+        releases = Release.objects.all()
+        if options['release_slugs']:
+            releases = releases.filter(slug__in=options['release_slugs'])
+
+        for release in releases:
+            table = release_table(release)
+
+            output_filename = join(output_directory, release.slug + '.csv')
+            with open(output_filename, 'wb') as f:
+                writer = unicodecsv.writer(f)
+                writer.writerow(table.headers)
+                writer.writerows(table.data)
+
+            if int(options['verbosity']) >= 2:
+                print "Wrote {0} entries to {1}".format(len(table.rows), output_filename)
@@ -1,7 +1,9 @@
 from django.db import models
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from django.utils.text import slugify
 
-from pombola.core.models import Person
+from pombola.core.models import Person, touch
 
 
 # TODO
@@ -70,3 +72,17 @@ class EntryLineItem(models.Model):
     def __unicode__(self):
         return u"{0}: {1}".format(self.key, self.value)
 
+
+# Entries are included in the Popolo export of the person, so mark the
+# person as updated when they change:
+
+@receiver(post_save, sender=Entry)
+@receiver(post_delete, sender=Entry)
+def touch_entry_person(sender, instance, **kwargs):
+    touch(Person, id=instance.person_id)
+
+
+@receiver(post_save, sender=EntryLineItem)
+@receiver(post_delete, sender=EntryLineItem)
+def touch_line_item_person(sender, instance, **kwargs):
+    touch(Person, interests_register_entries=instance.entry_id)
@@ -0,0 +1,85 @@
+"""
+Lay out register entries as tables, with a column for each line item key.
+
+Each entry's line items are key/value pairs, and different entries in
+the same category may use different keys. A Table collects the keys as
+it sees them so that every row ends up with the same columns. The line
+items for all the entries being shown should be fetched at once with
+line_items_by_entry() rather than with entry.line_items.all() for each
+entry.
+"""
+
+from collections import defaultdict
+
+from .models import Entry, EntryLineItem
+
+
+def line_items_by_entry(entry_ids):
+    """Return a dict mapping each entry ID to a list of its (key, value) pairs"""
+
+    items = defaultdict(list)
+    line_items = (
+        EntryLineItem.objects
+        .filter(entry__in=list(entry_ids))
+        .order_by('entry', 'id')
+        .values_list('entry_id', 'key', 'value')
+    )
+    for entry_id, key, value in line_items:
+        items[entry_id].append((key, value))
+    return items
+
+
+class Table(object):
+    """Rows of line item values, with a column for each key seen
+
+    Columns for any headers passed in come first; rows can be given
+    values for those as well as their line items. Keys are given
+    columns in the order they're first seen, and every row is padded
+    to the full width."""
+
+    def __init__(self, headers=()):
+        self.headers = list(headers)
+        self.header_index = dict((h, i) for i, h in enumerate(self.headers))
+        self.rows = []
+
+    def add_row(self, line_items, cells=()):
+        row = list(cells)
+        for key, value in line_items:
+            if key not in self.header_index:
+                self.header_index[key] = len(self.headers)
+                self.headers.append(key)
+            index = self.header_index[key]
+            if index >= len(row):
+                row.extend([''] * (index + 1 - len(row)))
+            row[index] = value
+        self.rows.append(row)
+
+    @property
+    def data(self):
+        width = len(self.headers)
+        for row in self.rows:
+            if len(row) < width:
+                row.extend([''] * (width - len(row)))
+        return self.rows
+
+
+def release_table(release):
+    """Return a Table of every entry in a release, one row per entry
+
+    The first columns identify the person and category, followed by a
+    column for every line item key used in the release. This needs
+    two queries however many entries there are."""
+
+    entries = list(
+        Entry.objects
+        .filter(release=release)
+        .order_by('person__legal_name', 'person__id', 'category__sort_order',
+                  'category__name', 'sort_order', 'id')
+        .values_list('id', 'person__legal_name', 'person__slug', 'category__name')
+    )
+    line_items = line_items_by_entry(e[0] for e in entries)
+
+    table = Table(headers=['Person', 'Person slug', 'Category'])
+    for entry_id, legal_name, slug, category_name in entries:
+        table.add_row(line_items[entry_id], cells=[legal_name, slug, category_name])
+    return table
@@ -7,6 +7,7 @@ Replace this with more appropriate tests for your application.
 
 from django.test import TestCase
 from .models import Category, Release
+from .tabulation import Table
 
 class InterestsRegisterModelTests(TestCase):
     def test_category_creates_own_slug(self):
@@ -16,3 +17,16 @@ class InterestsRegisterModelTests(TestCase):
     def test_release_creates_own_slug(self):
         rel = Release.objects.create(name=u"Foo Bar", date="2013-12-04")
         self.assertEqual(rel.slug, 'foo-bar')
+
+
+class TableTests(TestCase):
+    def test_rows_padded_to_all_headers(self):
+        table = Table(headers=['Person'])
+        table.add_row([('Field1', 'Value1')], cells=['Alice'])
+        table.add_row([('Source', 'Source1'), ('Field1', 'Value2')], cells=['Bob'])
+
+        self.assertEqual(table.headers, ['Person', 'Field1', 'Source'])
+        self.assertEqual(
+            table.data,
+            [['Alice', 'Value1', ''],
+             ['Bob', 'Value2', 'Source1']])
@@ -3,6 +3,7 @@ import re
 from django.views.generic import ListView, TemplateView
 
 from mapit.models import Area
+from pombola.core import mapit_cache
 from pombola.core.models import Place
 from pombola.core.views import HomeView
 from pombola.info.models import InfoPage
@@ -166,15 +167,13 @@ class NGSearchView(SearchBaseView):
             # work out the polygons to match to, may need to go up tree to parents.
             area_for_polygons = self.find_containing_area(area)
             if area_for_polygons:
-                area_polygons = area_for_polygons.polygons.collect()
-
                 context['federal_constituencies'] = self.get_district_data(
-                    self.find_matching_places("FED", area_polygons),
+                    self.find_matching_places("FED", area_for_polygons),
                     "representative"
                 )
 
                 context['senatorial_districts']  = self.get_district_data(
-                    self.find_matching_places("SEN", area_polygons),
+                    self.find_matching_places("SEN", area_for_polygons),
                     "senator"
                 )
         return context
@@ -192,41 +191,19 @@ class NGSearchView(SearchBaseView):
         query = self.request.GET.get('q')
         return super(NGSearchView, self).get(request, *args, **kwargs)
 
-    def find_matching_places(self, code, polygons):
-        """Find MapIt areas of 'code' type that overlap with 'polygons'
+    def find_matching_places(self, code, area):
+        """Find MapIt areas of 'code' type that overlap with 'area'
 
-        Return every MapIt area of the specifiedE type such that at
-        least 50% of polygons (a MultiPolygon) overlaps it; if there
-        are no such areas, just return the 5 MapIt areas of the right
-        type with the largest overlap
+        Return every MapIt area of the specified type such that at
+        least 50% of area overlaps it; if there are no such areas, just
+        return the 5 MapIt areas of the right type with the largest
+        overlap. The areas found are cached, as working them out is slow.
         """
 
-        all_areas = Area.objects.filter(type__code=code, polygons__polygon__intersects=polygons).distinct()
-
-        area_of_original = polygons.area
-
-        size_of_overlap = {}
-
-        # calculate the overlap
-        for area in all_areas:
-            area_polygons = area.polygons.collect()
-            intersection = polygons.intersection(area_polygons)
-
-            size_of_overlap[area] = intersection.area / area_of_original
-
-        # Sort the results by the overlap size; largest overlap first
-        all_areas = sorted(all_areas,
-                           reverse=True,
-                           key=lambda a: size_of_overlap[a])
-
-        # get the most overlapping ones
-        likely_areas = [a for a in all_areas if size_of_overlap[a] > 0.5]
-
-        # If there are none display first five (better than nothing...)
-        if not likely_areas:
-            likely_areas = all_areas[:5]
+        likely_area_ids = mapit_cache.overlapping_area_ids(
+            area, code, minimum_overlap=0.5, fallback_count=5)
 
-        return self.convert_areas_to_places(likely_areas)
+        return self.convert_areas_to_places(likely_area_ids)
 
     def convert_areas_to_places(self, areas):
         places = []
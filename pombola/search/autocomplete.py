@@ -0,0 +1,286 @@
+"""
+An in-memory index of names for the autocomplete view.
+
+The autocomplete view is called on every keystroke in the search box, so
+rather than querying the search engine and then loading each hit from the
+database, it looks the names up in an AutocompleteIndex. This is built
+from the database when it's first needed, with the label, URL and image
+for each result worked out in advance.
+
+Each process keeps its own copy of the index. When any of the objects it
+is built from change, a new version number is stored in the cache. The
+next time each process uses its index after that, it starts rebuilding
+it in a background thread, and carries on using the old index until the
+new one is ready. A process rebuilds its index at most once every
+MIN_REBUILD_INTERVAL seconds, so a run of changes doesn't keep it busy
+rebuilding; bulk imports can also use deferred_autocomplete_invalidation
+to change the version just once at the end.
+"""
+
+from bisect import bisect_left
+from functools import wraps
+import re
+import threading
+import time
+import uuid
+
+from django.core.cache import cache
+from django.db import connection
+
+from pombola.core import models
+from pombola.images.models import Image
+from pombola.images.thumbnails import rendered_thumbnail
+
+CACHE_VERSION_KEY = 'search_autocomplete_index_version'
+# The version is replaced whenever anything changes, so this only needs
+# to be long enough to avoid needless rebuilds:
+CACHE_VERSION_TIMEOUT = 60 * 60 * 24 * 7
+# How long a process keeps using its index after building it, even if
+# it's out of date:
+MIN_REBUILD_INTERVAL = 60
+
+# The models that changes to should cause the index to be rebuilt:
+INDEXED_MODELS = (
+    models.Person,
+    models.AlternativePersonName,
+    models.Organisation,
+    models.Place,
+    models.PlaceKind,
+    models.PositionTitle,
+    models.ParliamentarySession,
+    Image,
+)
+
+word_re = re.compile(r'[^\W\d_]+', re.UNICODE)
+
+def name_words(name):
+    """Split a name into lowercase words, in the same way as the search engine"""
+    return [w.lower() for w in word_re.findall(name)]
+
+
+class AutocompleteEntry(object):
+
+    __slots__ = ('kind', 'name', 'label', 'url', 'css_class', 'image',
+                 'session_end_date')
+
+    def __init__(self, obj, label=None, image=None, session_end_date=None):
+        self.kind = obj._meta.module_name
+        self.name = obj.name
+        self.label = label or obj.name
+        self.url = obj.get_absolute_url()
+        self.css_class = obj.css_class()
+        self.image = image
+        self.session_end_date = session_end_date
+
+
+class AutocompleteIndex(object):
+    """Find people, organisations, places and position titles by name
+
+    The entries are kept in the order they should be returned in, and
+    the words of their names in a sorted list, so all the names with a
+    word starting with a given prefix can be found by bisection."""
+
+    max_results = 10
+
+    def __init__(self, entries):
+        self.entries = sorted(
+            entries,
+            key=lambda e: (e.name.lower(), e.kind, e.session_end_date is None,
+                           -(e.session_end_date.toordinal() if e.session_end_date else 0)))
+
+        words = []
+        for i, entry in enumerate(self.entries):
+            for word in set(name_words(entry.name)):
+                words.append((word, i))
+        words.sort()
+        self.words = [w for w, i in words]
+        self.word_entries = [i for w, i in words]
+
+        self.thumbnail_urls = {}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def build(cls):
+        """Create an index of everything that autocomplete can return"""
+
+        entries = []
+
+        def primary_image_name(obj):
+            image = obj.primary_image()
+            return image.name if image else None
+
+        people = (
+            models.Person.objects
+            .filter(hidden=False)
+            .select_related('cached_primary_image')
+            .prefetch_related('alternative_names')
+        )
+        for person in people:
+            entries.append(AutocompleteEntry(
+                person, image=primary_image_name(person)))
+
+        for organisation in models.Organisation.objects.select_related('cached_primary_image'):
+            entries.append(AutocompleteEntry(
+                organisation, image=primary_image_name(organisation)))
+
+        places = models.Place.objects.select_related('kind', 'parliamentary_session')
+        for place in places:
+            session = place.parliamentary_session
+            entries.append(AutocompleteEntry(
+                place,
+                label=place.name_autocomplete_html,
+                session_end_date=session and session.end_date))
+
+        for title in models.PositionTitle.objects.all():
+            entries.append(AutocompleteEntry(title))
+
+        return cls(entries)
+
+    def matching_entry_indices(self, prefix):
+        lo = bisect_left(self.words, prefix)
+        hi = bisect_left(self.words, prefix + u'\uffff')
+        return set(self.word_entries[lo:hi])
+
+    def search(self, term, kind=None):
+        """Return entries with a word starting with each word in term
+
+        Of places with the same label (e.g. constituencies that kept
+        their name from one parliament to the next) only the one from
+        the latest parliamentary session is returned, since people get
+        confused if they pick an old one and don't find their
+        representatives."""
+
+        words = name_words(term)
+        if not words:
+            return []
+
+        matches = None
+        for word in sorted(words, key=len, reverse=True):
+            indices = self.matching_entry_indices(word)
+            matches = indices if matches is None else matches & indices
+            if not matches:
+                return []
+
+        results = []
+        place_labels = set()
+        for i in sorted(matches):
+            entry = self.entries[i]
+            if kind and entry.kind != kind:
+                continue
+            if entry.kind == 'place':
+                if entry.label in place_labels:
+                    continue
+                place_labels.add(entry.label)
+            results.append(entry)
+            if len(results) == self.max_results:
+                break
+        return results
+
+    def image_url(self, entry):
+        """Return the URL of a small thumbnail or icon for entry"""
+
+        if entry.image is None:
+            return "/static/images/" + entry.css_class + "-16x16.jpg"
+        with self.lock:
+            if entry.image not in self.thumbnail_urls:
+                # Only use the thumbnail if it's already been made, and
+                # don't remember the icon, so that the thumbnail is
+                # used once it has been:
+                thumbnail = rendered_thumbnail(entry.image, '16x16', crop="center")
+                if thumbnail is None:
+                    return "/static/images/" + entry.css_class + "-16x16.jpg"
+                self.thumbnail_urls[entry.image] = thumbnail.url
+            return self.thumbnail_urls[entry.image]
+
+
+_index = None
+_index_version = None
+_index_built = None
+_rebuild_thread = None
+_index_lock = threading.Lock()
+_deferral = threading.local()
+
+def get_index_version():
+    """Return the current version of the index from the cache"""
+
+    version = cache.get(CACHE_VERSION_KEY)
+    if version is None:
+        # Either nothing has changed since the cache was cleared, or
+        # there's no cache; either way the index can't be trusted.
+        version = uuid.uuid4().hex
+        if not cache.add(CACHE_VERSION_KEY, version, CACHE_VERSION_TIMEOUT):
+            version = cache.get(CACHE_VERSION_KEY, version)
+    return version
+
+def get_autocomplete_index():
+    """Return this process's index, starting a rebuild if anything's changed
+
+    Only the first call in a process waits for the index to be built;
+    after that an out of date index is returned while a new one is
+    built in the background."""
+
+    global _index, _index_version, _index_built, _rebuild_thread
+
+    version = get_index_version()
+
+    with _index_lock:
+        if _index is None:
+            _index = AutocompleteIndex.build()
+            _index_version = version
+            _index_built = time.time()
+        elif (version != _index_version and
+              time.time() - _index_built >= MIN_REBUILD_INTERVAL and
+              not (_rebuild_thread and _rebuild_thread.is_alive())):
+            _rebuild_thread = threading.Thread(
+                target=rebuild_autocomplete_index, args=(version,))
+            _rebuild_thread.daemon = True
+            _rebuild_thread.start()
+        return _index
+
+def rebuild_autocomplete_index(version):
+    """Build a new index and replace this process's index with it"""
+
+    global _index, _index_version, _index_built
+
+    try:
+        index = AutocompleteIndex.build()
+        with _index_lock:
+            _index = index
+            _index_version = version
+            _index_built = time.time()
+    finally:
+        # This thread has its own database connection, which would
+        # otherwise be left open:
+        connection.close()
+
+def invalidate_autocomplete_index():
+    """Make every process rebuild its index"""
+
+    if getattr(_deferral, 'depth', 0):
+        _deferral.changed = True
+        return
+    cache.set(CACHE_VERSION_KEY, uuid.uuid4().hex, CACHE_VERSION_TIMEOUT)
+
+
+class deferred_autocomplete_invalidation(object):
+    """Invalidate the index just once for all the changes made in a block
+
+    This can be used as a context manager or as a decorator, for
+    example on the handle method of an import command, so that saving
+    each object doesn't invalidate the index again."""
+
+    def __enter__(self):
+        _deferral.depth = getattr(_deferral, 'depth', 0) + 1
+
+    def __exit__(self, *exc_info):
+        _deferral.depth -= 1
+        if not _deferral.depth and getattr(_deferral, 'changed', False):
+            _deferral.changed = False
+            invalidate_autocomplete_index()
+
+    def __call__(self, f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            with self:
+                return f(*args, **kwargs)
+        return wrapper
@@ -0,0 +1,104 @@
+from collections import defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+
+from haystack import connection_router, connections
+from haystack.exceptions import NotHandled
+
+from pombola.search.models import IndexQueueItem
+
+# The default number of queued changes to deal with at once:
+QUEUE_BATCH_SIZE = 500
+
+
+def search_indexes_for_model(model):
+    """Yield (backend, index) for each connection that indexes model"""
+
+    for using in connection_router.for_write(models=[model]):
+        try:
+            index = connections[using].get_unified_index().get_index(model)
+        except NotHandled:
+            continue
+        yield connections[using].get_backend(), index
+
+
+def update_objects_in_search_index(model, objects):
+    """Add or update objects of a model in the search index in one batch
+
+    Use this after saving objects in a way that doesn't send post_save
+    signals (e.g. with bulk_create), so they're not indexed one at a
+    time by the signal processor. Models without a search index in a
+    connection are skipped."""
+
+    objects = list(objects)
+    if not objects:
+        return
+
+    for backend, index in search_indexes_for_model(model):
+        to_index = [o for o in objects if index.should_update(o)]
+        if to_index:
+            backend.update(index, to_index)
+
+
+def remove_objects_from_search_index(model, ids):
+    """Remove the objects of a model with the given IDs from the search index"""
+
+    for backend, index in search_indexes_for_model(model):
+        for object_id in ids:
+            # The backends only need the model and primary key to work
+            # out the document to remove, so the object needn't exist.
+            backend.remove(model(pk=object_id))
+
+
+def process_search_index_queue(batch_size=QUEUE_BATCH_SIZE):
+    """Send the oldest queued changes to the search index
+
+    Several changes to the same object are coalesced, so that it's only
+    updated (or removed) once, according to its most recent change.
+    Returns the number of queued changes that were dealt with, so the
+    queue is empty once this returns less than batch_size."""
+
+    items = list(
+        IndexQueueItem
+        .objects
+        .order_by('id')
+        .values_list('id', 'content_type_id', 'object_id', 'action')
+        [:batch_size]
+    )
+    if not items:
+        return 0
+
+    latest_action = {}
+    for item_id, content_type_id, object_id, action in items:
+        latest_action[(content_type_id, object_id)] = action
+
+    to_update = defaultdict(list)
+    to_remove = defaultdict(list)
+    for (content_type_id, object_id), action in latest_action.items():
+        if action == IndexQueueItem.ACTION_DELETE:
+            to_remove[content_type_id].append(object_id)
+        else:
+            to_update[content_type_id].append(object_id)
+
+    for content_type_id in set(to_update) | set(to_remove):
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        # The model may have been removed since the change was queued
+        if model is None:
+            continue
+        remove_ids = list(to_remove.get(content_type_id, []))
+        update_ids = to_update.get(content_type_id, [])
+        if update_ids:
+            objects = list(model._default_manager.filter(pk__in=update_ids))
+            update_objects_in_search_index(model, objects)
+            # An object deleted since its update was queued won't be
+            # found, and should be removed from the index instead:
+            found_ids = set(o.pk for o in objects)
+            remove_ids.extend(i for i in update_ids if i not in found_ids)
+        if remove_ids:
+            remove_objects_from_search_index(model, remove_ids)
+
+    # Only delete the items that were read, since more may have been
+    # queued while the index was being updated.
+    IndexQueueItem.objects.filter(id__in=[i[0] for i in items]).delete()
+
+    return len(items)
@@ -0,0 +1,44 @@
+import time
+
+from optparse import make_option
+
+from django.core.management.base import NoArgsCommand
+from django.db import connection
+
+from pombola.search.indexing import process_search_index_queue, QUEUE_BATCH_SIZE
+
+
+class Command(NoArgsCommand):
+
+    help = 'Send queued changes to the search index in batches'
+
+    option_list = NoArgsCommand.option_list + (
+        make_option('--batch-size', dest='batch_size', type='int', default=QUEUE_BATCH_SIZE,
+                    help='The number of queued changes to send at once'),
+        make_option('--daemon', action='store_true', dest='daemon',
+                    help="Keep running, checking for new changes when the queue's empty"),
+        make_option('--sleep', dest='sleep', type='float', default=5,
+                    help='With --daemon, the seconds to wait between checks of an empty queue'),
+    )
+
+    def handle_noargs(self, **options):
+
+        verbose = int(options['verbosity']) >= 2
+
+        while True:
+            processed = 0
+            while True:
+                batch = process_search_index_queue(options['batch_size'])
+                processed += batch
+                if batch < options['batch_size']:
+                    break
+
+            if verbose and processed:
+                print "Processed %d queued changes" % processed
+
+            if not options['daemon']:
+                break
+
+            # Don't hold a database connection open while idle.
+            connection.close()
+            time.sleep(options['sleep'])
@@ -1,3 +1,43 @@
+from django.contrib.contenttypes import generic
+from django.contrib.contenttypes.models import ContentType
 from django.db import models
+from django.db.models import signals
+from django.dispatch import receiver
 
-# Create your models here.
+
+class IndexQueueItem(models.Model):
+    """A change to an object that hasn't been sent to the search index yet
+
+    These are created by pombola.search.signals.QueuedSignalProcessor
+    when indexed objects are saved or deleted, and are removed once the
+    search_process_index_queue command has dealt with them.
+    """
+
+    ACTION_UPDATE = 'update'
+    ACTION_DELETE = 'delete'
+    ACTION_CHOICES = (
+        (ACTION_UPDATE, 'Update'),
+        (ACTION_DELETE, 'Delete'),
+    )
+
+    content_type   = models.ForeignKey(ContentType)
+    object_id      = models.PositiveIntegerField()
+    content_object = generic.GenericForeignKey('content_type', 'object_id')
+
+    action  = models.CharField(max_length=6, choices=ACTION_CHOICES)
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __unicode__(self):
+        return u'%s %s.%s' % (self.action, self.content_type, self.object_id)
+
+    class Meta:
+        ordering = ['id']
+
+
+@receiver(signals.post_save)
+@receiver(signals.post_delete)
+def invalidate_autocomplete_index_on_change(sender, **kwargs):
+    # Imported here since the autocomplete module needs the core models
+    from pombola.search.autocomplete import INDEXED_MODELS, invalidate_autocomplete_index
+    if sender in INDEXED_MODELS:
+        invalidate_autocomplete_index()
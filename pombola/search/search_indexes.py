@@ -2,16 +2,24 @@ from django.conf import settings
 
 from haystack import indexes
 
+from sorl.thumbnail import get_thumbnail
+
 from pombola.core import models as core_models
 
-# TODO - currently this uses the realtime search index - which is possibly a bad
-# idea if the site gets heavy load. Switch to a queue as suggested in the docs:
+# Changes to indexed objects are queued by
+# pombola.search.signals.QueuedSignalProcessor rather than indexed in the
+# request, as suggested in the docs:
 #   http://docs.haystacksearch.org/dev/best_practices.html#use-of-a-queue-for-a-better-user-experience
 
-# TODO - all the search result html could be cached to save db access when
-# displaying results: Not done initially as the templates will keep changing
-# until the design is stable.
+# The fields that search results are displayed with are stored in the
+# index, so that showing a page of results doesn't load each object from
+# the database, as suggested in the docs:
 #   http://docs.haystacksearch.org/dev/best_practices.html#avoid-hitting-the-database
+# This means the index needs to be rebuilt when the result templates
+# start using a new field, or when THUMBNAIL_GEOMETRY changes.
+
+# The size of the thumbnails stored for search results:
+THUMBNAIL_GEOMETRY = '90x90'
 
 # Note - these indexes could be specified in the individual apps, which might
 # well be cleaner.
@@ -19,25 +27,64 @@ from pombola.core import models as core_models
 class BaseIndex(indexes.SearchIndex):
     text = indexes.CharField(document=True, use_template=True)
 
+    # Stored fields for displaying results:
+    title = indexes.CharField(indexed=False)
+    url = indexes.CharField(indexed=False)
+    css_class = indexes.CharField(indexed=False)
+    show_active = indexes.BooleanField(indexed=False)
+    thumbnail = indexes.CharField(indexed=False, null=True)
+    summary = indexes.CharField(indexed=False, null=True)
+
+    def prepare_title(self, obj):
+        return obj.name
+
+    def prepare_url(self, obj):
+        return obj.get_absolute_url()
+
+    def prepare_css_class(self, obj):
+        return obj.css_class()
+
+    def prepare_show_active(self, obj):
+        return obj.show_active
+
+    def prepare_thumbnail(self, obj):
+        """Return the URL of a thumbnail of the object's primary image, if any"""
+        image = obj.primary_image() if hasattr(obj, 'primary_image') else None
+        if image:
+            return get_thumbnail(image, THUMBNAIL_GEOMETRY, crop="center").url
+        return None
+
 class PersonIndex(BaseIndex, indexes.Indexable):
     name_auto = indexes.EdgeNgramField(model_attr='name')
     hidden = indexes.BooleanField(model_attr='hidden')
+    summary = indexes.CharField(indexed=False, use_template=True)
 
     def get_model(self):
         return core_models.Person
 
+    def index_queryset(self, using=None):
+        return self.get_model().objects.select_related('cached_primary_image').prefetch_related('alternative_names')
+
 class PlaceIndex(BaseIndex, indexes.Indexable):
     name_auto = indexes.EdgeNgramField(model_attr='name')
+    summary = indexes.CharField(indexed=False, use_template=True)
 
     def get_model(self):
         return core_models.Place
 
+    def index_queryset(self, using=None):
+        return self.get_model().objects.select_related('kind', 'parliamentary_session')
+
 class OrganisationIndex(BaseIndex, indexes.Indexable):
     name_auto = indexes.EdgeNgramField(model_attr='name')
+    summary = indexes.CharField(indexed=False, use_template=True)
 
     def get_model(self):
         return core_models.Organisation
 
+    def index_queryset(self, using=None):
+        return self.get_model().objects.select_related('kind', 'cached_primary_image')
+
 class PositionTitleIndex(BaseIndex, indexes.Indexable):
     name_auto = indexes.EdgeNgramField(model_attr='name')
 
@@ -56,16 +103,32 @@ if settings.ENABLED_FEATURES['hansard']:
 
         def index_queryset(self, using=None):
             """Used when the entire index for model is updated."""
-            return self.get_model().objects.select_related('sitting')
+            return self.get_model().objects.select_related('sitting__venue')
 
         def prepare_start_date(self, obj):
             return obj.sitting.start_date
 
+        def prepare_title(self, obj):
+            return obj.sitting.name
+
+        def prepare_show_active(self, obj):
+            return True
+
+        def prepare_summary(self, obj):
+            return obj.content
+
 if 'pombola.info' in settings.INSTALLED_APPS:
     from pombola.info.models import InfoPage
 
     class InfoPageIndex(BaseIndex, indexes.Indexable):
         kind = indexes.CharField(model_attr='kind')
+        start_date = indexes.DateTimeField(model_attr='publication_date')
 
         def get_model(self):
             return InfoPage
+
+        def prepare_title(self, obj):
+            return obj.name()
+
+        def prepare_show_active(self, obj):
+            return True
@@ -0,0 +1,77 @@
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import signals
+
+from haystack.exceptions import NotHandled
+from haystack.signals import BaseSignalProcessor
+
+from pombola.search.models import IndexQueueItem
+
+
+class QueuedSignalProcessor(BaseSignalProcessor):
+    """Queue changes to indexed objects rather than indexing them at once
+
+    The RealtimeSignalProcessor updates the search index in the request
+    that saves an object, which makes editing slow and means that a
+    script saving many objects does a round trip to the search engine
+    for each one. Instead this records each change in the
+    IndexQueueItem table, in the same transaction as the change itself,
+    and the search_process_index_queue command sends them to the search
+    engine in batches.
+
+    Some objects are shown in search results with details of related
+    objects, so when those change the object they're related to is
+    queued for updating too.
+    """
+
+    # Map a model's label to the attributes of its instances that
+    # are shown with them in search results:
+    related_objects = {
+        'core.position': ('person', 'organisation'),
+        # The thumbnail of the primary image is stored in the index:
+        'images.image': ('content_object',),
+    }
+
+    def setup(self):
+        signals.post_save.connect(self.handle_save)
+        signals.post_delete.connect(self.handle_delete)
+
+    def teardown(self):
+        signals.post_save.disconnect(self.handle_save)
+        signals.post_delete.disconnect(self.handle_delete)
+
+    def handle_save(self, sender, instance, **kwargs):
+        self.enqueue(sender, instance, IndexQueueItem.ACTION_UPDATE)
+        self.enqueue_related(sender, instance)
+
+    def handle_delete(self, sender, instance, **kwargs):
+        self.enqueue(sender, instance, IndexQueueItem.ACTION_DELETE)
+        self.enqueue_related(sender, instance)
+
+    def enqueue_related(self, sender, instance):
+        label = '%s.%s' % (sender._meta.app_label, sender._meta.module_name)
+        for attribute in self.related_objects.get(label, ()):
+            try:
+                related = getattr(instance, attribute)
+            except ObjectDoesNotExist:
+                continue
+            if related is not None:
+                self.enqueue(related.__class__, related, IndexQueueItem.ACTION_UPDATE)
+
+    def is_indexed(self, sender, instance):
+        for using in self.connection_router.for_write(instance=instance):
+            try:
+                self.connections[using].get_unified_index().get_index(sender)
+                return True
+            except NotHandled:
+                pass
+        return False
+
+    def enqueue(self, sender, instance, action):
+        if sender is IndexQueueItem or not self.is_indexed(sender, instance):
+            return
+        IndexQueueItem.objects.create(
+            content_type=ContentType.objects.get_for_model(sender),
+            object_id=instance.pk,
+            action=action,
+        )
@@ -1,14 +1,24 @@
 import json
 import re
 
+from datetime import date
+
 from django.conf import settings
+from django.test import TestCase
 from django.test.client import Client
 from django.utils import unittest
 from django.utils.text import slugify
 from django.core.urlresolvers import reverse
 from django.core.management import call_command
 
-from pombola.core.models import Person
+from mock import patch
+
+from pombola.core.models import (
+    Organisation, OrganisationKind, ParliamentarySession, Person, Place, PlaceKind)
+from pombola.search import autocomplete
+from pombola.search.autocomplete import (
+    AutocompleteIndex, MIN_REBUILD_INTERVAL, deferred_autocomplete_invalidation,
+    get_autocomplete_index)
 
 class AutocompleteTest(unittest.TestCase):
 
@@ -39,6 +49,12 @@ class AutocompleteTest(unittest.TestCase):
         #   https://github.com/toastdriven/django-haystack/issues/226
         call_command('rebuild_index', interactive=False, verbosity=0)
 
+        # Make sure this process builds a new autocomplete index with
+        # these people in it, rather than using one from another test:
+        patcher = patch.object(autocomplete, '_index', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
 
     def test_autocomplete_requests(self):
         c = Client()
@@ -88,3 +104,74 @@ class AutocompleteTest(unittest.TestCase):
                 set(expected_output),
                 msg="\n\nTesting input: '%s'" % test_input
             )
+
+
+class AutocompleteIndexTest(TestCase):
+
+    def setUp(self):
+        parliament = Organisation.objects.create(
+            name='Parliament',
+            slug='parliament',
+            kind=OrganisationKind.objects.create(name='House', slug='house'),
+        )
+        constituency = PlaceKind.objects.create(name='Constituency', slug='constituency')
+        for start_year, end_year in ((2007, 2013), (2013, 2017)):
+            session = ParliamentarySession.objects.create(
+                name='Parliament %d' % start_year,
+                slug='parliament-%d' % start_year,
+                start_date=date(start_year, 1, 1),
+                end_date=date(end_year, 1, 1),
+                house=parliament,
+            )
+            Place.objects.create(
+                name='Kilome',
+                slug='kilome-%d' % start_year,
+                kind=constituency,
+                parliamentary_session=session,
+            )
+        self.index = AutocompleteIndex.build()
+
+    def test_only_latest_place_with_a_label_is_returned(self):
+        results = self.index.search('kil')
+        self.assertEqual([e.url for e in results], ['/place/kilome-2013/'])
+        self.assertEqual(results[0].label, 'Kilome <i>(Constituency)</i>')
+
+    def test_kind_restricts_results(self):
+        self.assertEqual(len(self.index.search('kil', kind='place')), 1)
+        self.assertEqual(self.index.search('kil', kind='person'), [])
+        self.assertEqual(len(self.index.search('parl')), 1)
+
+
+@patch.multiple(autocomplete, _index=None, _index_version=None,
+                _index_built=None, _rebuild_thread=None)
+class AutocompleteIndexRebuildTest(TestCase):
+
+    @patch('pombola.search.autocomplete.get_index_version')
+    @patch('pombola.search.autocomplete.AutocompleteIndex.build')
+    def test_index_is_rebuilt_in_the_background(self, mock_build, mock_version):
+        old_index, new_index = object(), object()
+        mock_build.side_effect = [old_index, new_index]
+
+        mock_version.return_value = 'first'
+        self.assertIs(get_autocomplete_index(), old_index)
+
+        # It's too soon after building the index to rebuild it:
+        mock_version.return_value = 'second'
+        self.assertIs(get_autocomplete_index(), old_index)
+        self.assertEqual(mock_build.call_count, 1)
+
+        # Later, the old index is still used while the new one is built:
+        with patch('pombola.search.autocomplete.time.time',
+                   return_value=autocomplete._index_built + MIN_REBUILD_INTERVAL):
+            self.assertIs(get_autocomplete_index(), old_index)
+        autocomplete._rebuild_thread.join()
+        self.assertIs(get_autocomplete_index(), new_index)
+        self.assertEqual(mock_build.call_count, 2)
+
+    @patch('pombola.search.autocomplete.cache')
+    def test_invalidation_can_be_deferred(self, mock_cache):
+        with deferred_autocomplete_invalidation():
+            Person.objects.create(legal_name='Alice Smith', slug='alice-smith')
+            Person.objects.create(legal_name='Bob Smith', slug='bob-smith')
+            self.assertFalse(mock_cache.set.called)
+        self.assertEqual(mock_cache.set.call_count, 1)
@@ -0,0 +1,143 @@
+from django.test import TestCase
+
+from haystack import connection_router, connections
+from mock import patch
+
+from pombola.core.models import Organisation, OrganisationKind, Person, PositionTitle
+from pombola.images.models import Image
+from pombola.info.models import InfoPage
+from pombola.search.indexing import process_search_index_queue
+from pombola.search.models import IndexQueueItem
+from pombola.search.search_indexes import (
+    InfoPageIndex, OrganisationIndex, PersonIndex, PositionTitleIndex)
+from pombola.search.signals import QueuedSignalProcessor
+from pombola.tasks.models import TaskCategory
+
+
+class QueuedSignalProcessorTest(TestCase):
+
+    def setUp(self):
+        self.processor = QueuedSignalProcessor(connections, connection_router)
+
+    def tearDown(self):
+        self.processor.teardown()
+
+    def queued(self):
+        return list(
+            IndexQueueItem.objects.values_list('object_id', 'action'))
+
+    def test_changes_are_queued(self):
+        person = Person.objects.create(legal_name='Alice Smith', slug='alice-smith')
+        person.save()
+        person_id = person.id
+        person.delete()
+
+        self.assertEqual(
+            self.queued(),
+            [(person_id, 'update'), (person_id, 'update'), (person_id, 'delete')])
+
+    def test_image_changes_queue_their_object(self):
+        person = Person.objects.create(legal_name='Alice Smith', slug='alice-smith')
+        IndexQueueItem.objects.all().delete()
+
+        image = Image.objects.create(
+            content_object=person, image='images/alice.png', source='test')
+        image.delete()
+
+        self.assertEqual(
+            self.queued(),
+            [(person.id, 'update'), (person.id, 'update')])
+
+    def test_unindexed_models_are_not_queued(self):
+        TaskCategory.objects.create(slug='test-category')
+        self.assertEqual(self.queued(), [])
+
+    @patch('pombola.search.indexing.remove_objects_from_search_index')
+    @patch('pombola.search.indexing.update_objects_in_search_index')
+    def test_queue_is_coalesced(self, mock_update, mock_remove):
+        alice = Person.objects.create(legal_name='Alice Smith', slug='alice-smith')
+        alice.save()
+        bob = Person.objects.create(legal_name='Bob Jones', slug='bob-jones')
+        bob_id = bob.id
+        bob.delete()
+        title = PositionTitle.objects.create(name='Mayor', slug='mayor')
+
+        self.assertEqual(process_search_index_queue(batch_size=3), 3)
+        self.assertEqual(mock_update.call_count, 1)
+        self.assertEqual(mock_update.call_args[0][0], Person)
+        self.assertEqual(list(mock_update.call_args[0][1]), [alice])
+        # Bob's already been deleted, so is removed even though his
+        # deletion is in the next batch:
+        mock_remove.assert_called_once_with(Person, [bob_id])
+
+        mock_update.reset_mock()
+        mock_remove.reset_mock()
+        self.assertEqual(process_search_index_queue(batch_size=3), 2)
+        mock_remove.assert_called_once_with(Person, [bob_id])
+        self.assertEqual(mock_update.call_count, 1)
+        self.assertEqual(list(mock_update.call_args[0][1]), [title])
+
+        self.assertEqual(process_search_index_queue(batch_size=3), 0)
+        self.assertEqual(self.queued(), [])
+
+    @patch('pombola.search.indexing.remove_objects_from_search_index')
+    @patch('pombola.search.indexing.update_objects_in_search_index')
+    def test_update_of_deleted_object_removes_it(self, mock_update, mock_remove):
+        person = Person.objects.create(legal_name='Alice Smith', slug='alice-smith')
+        person_id = person.id
+        # Delete the person without queueing the deletion, as if it
+        # had been lost:
+        Person.objects.filter(id=person_id).delete()
+        IndexQueueItem.objects.filter(action=IndexQueueItem.ACTION_DELETE).delete()
+
+        self.assertEqual(process_search_index_queue(), 1)
+        self.assertEqual(list(mock_update.call_args[0][1]), [])
+        mock_remove.assert_called_once_with(Person, [person_id])
+
+
+class StoredFieldsTest(TestCase):
+
+    def test_person_display_fields(self):
+        person = Person.objects.create(legal_name='Alice Smith', slug='alice-smith')
+        data = PersonIndex().full_prepare(person)
+
+        self.assertEqual(data['title'], 'Alice Smith')
+        self.assertEqual(data['url'], '/person/alice-smith/')
+        self.assertEqual(data['css_class'], 'person')
+        self.assertTrue(data['show_active'])
+        self.assertIsNone(data['thumbnail'])
+        self.assertIn('No currently active positions found.', data['summary'])
+
+    def test_position_title_has_no_summary(self):
+        title = PositionTitle.objects.create(name='Mayor', slug='mayor')
+        data = PositionTitleIndex().full_prepare(title)
+
+        self.assertEqual(data['title'], 'Mayor')
+        self.assertEqual(data['url'], '/position/mayor/')
+        self.assertIsNone(data['summary'])
+
+    def test_organisation_summary_counts_positions(self):
+        organisation = Organisation.objects.create(
+            name='Parliament',
+            slug='parliament',
+            kind=OrganisationKind.objects.create(name='House', slug='house'),
+        )
+        person = Person.objects.create(legal_name='Alice Smith', slug='alice-smith')
+        organisation.position_set.create(person=person, category='political')
+        data = OrganisationIndex().full_prepare(organisation)
+
+        self.assertIn('House', data['summary'])
+        self.assertIn('1 related positions', data['summary'])
+
+    def test_info_page_display_fields(self):
+        page = InfoPage.objects.create(
+            title='About us',
+            slug='about-us',
+            kind=InfoPage.KIND_BLOG,
+        )
+        data = InfoPageIndex().full_prepare(page)
+
+        self.assertEqual(data['title'], 'About us')
+        self.assertEqual(data['url'], page.get_absolute_url())
+        self.assertEqual(data['css_class'], 'infopage')
+        self.assertTrue(data['show_active'])
@@ -2,15 +2,19 @@ from datetime import date
 import unittest
 
 from django.conf import settings
+from django.core.paginator import Paginator
 from django.core.urlresolvers import reverse
 from django_webtest import WebTest
 from django.test.utils import override_settings
 from django.test import TestCase, RequestFactory
 
+from haystack.inputs import AutoQuery
+from haystack.query import SearchQuerySet
 from mock import patch
 
-from pombola.core.models import Person
+from pombola.core.models import Organisation, OrganisationKind, Person
 from pombola.hansard.models import Entry, Sitting, Source, Venue
+from pombola.search.views import PrefetchedResults, SearchBaseView
 
 
 def fake_geocoder(country, q, decimal_places=3):
@@ -174,3 +178,104 @@ class SearchPaginationTest(TestCase):
         self.assertEqual(paginator._count, 3)
         self.assertEqual(paginator._num_pages, 2)
         self.assertEqual(page.number, 1)
+
+
+class GlobalSearchTopHitsTest(TestCase):
+
+    def setUp(self):
+        self.view = SearchBaseView()
+
+    def test_section_facet_queries(self):
+        self.assertEqual(
+            self.view.get_section_facet_query('persons'),
+            'django_ct:"core.person"')
+        if 'blog_posts' in self.view.search_sections:
+            self.assertEqual(
+                self.view.get_section_facet_query('blog_posts'),
+                'django_ct:"info.infopage" AND kind:"blog"')
+
+    def test_prefetched_results_paginate(self):
+        paginator = Paginator(PrefetchedResults(range(5), 12), 5)
+        self.assertEqual(paginator.count, 12)
+        self.assertEqual(paginator.num_pages, 3)
+        self.assertEqual(list(paginator.page(1).object_list), range(5))
+
+
+class GlobalSearchTopHitsSearchTest(TestCase):
+
+    def setUp(self):
+        self.view = SearchBaseView()
+        self.view.query = 'blancmange'
+        self.view.order = None
+        self.view.start_date_range = None
+        self.view.end_date_range = None
+
+        kind = OrganisationKind.objects.create(name='Company', slug='company')
+        self.organisations = [
+            Organisation.objects.create(
+                name='Blancmange Company {0}'.format(i),
+                slug='blancmange-company-{0}'.format(i),
+                kind=kind,
+                )
+            for i in range(5)
+            ]
+        self.people = [
+            Person.objects.create(
+                legal_name='Blancmange Person {0}'.format(i),
+                slug='blancmange-person-{0}'.format(i),
+                )
+            for i in range(2)
+            ]
+
+    def get_sqs(self):
+        # Organisations sort before people, so it's known which
+        # results are in the first slice:
+        return SearchQuerySet(). \
+            models(Organisation, Person). \
+            filter(content=AutoQuery(self.view.query)). \
+            order_by('django_ct')
+
+    def test_top_hits_from_first_slice(self):
+        top_hits, results_count, results = self.view.get_top_hits(self.get_sqs())
+
+        self.assertEqual(
+            set(r.object for r in top_hits), set(self.people))
+        self.assertEqual(
+            set(r.object for r in results), set(self.organisations))
+        self.assertEqual(results_count, 5)
+
+    def test_top_hits_found_separately(self):
+        # With one result per page, the people aren't in the first
+        # slice of the results, so they have to be searched for again:
+        self.view.results_per_page = 1
+        max_top_hits = sum(
+            SearchBaseView.top_hits_under[s]
+            for s in SearchBaseView.top_hits_under
+            if s in self.view.search_sections
+            )
+        self.assertTrue(max_top_hits + 1 <= len(self.organisations))
+
+        top_hits, results_count, results = self.view.get_top_hits(self.get_sqs())
+
+        self.assertEqual(
+            set(r.object for r in top_hits), set(self.people))
+        self.assertEqual(len(results), max_top_hits + 1)
+        self.assertTrue(
+            all(r.object in self.organisations for r in results))
+        self.assertEqual(results_count, 5)
+
+    def test_no_top_hits_over_limit(self):
+        self.people.append(
+            Person.objects.create(
+                legal_name='Blancmange Person 2',
+                slug='blancmange-person-2',
+                )
+            )
+
+        top_hits, results_count, results = self.view.get_top_hits(self.get_sqs())
+
+        self.assertEqual(top_hits, [])
+        self.assertEqual(
+            set(r.object for r in results),
+            set(self.organisations + self.people))
+        self.assertEqual(results_count, 8)
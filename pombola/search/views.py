@@ -1,5 +1,4 @@
 from datetime import datetime
-import re
 import sys
 import simplejson
 
@@ -14,10 +13,30 @@ from pombola.core import models
 from haystack.query import SearchQuerySet
 from haystack.inputs import AutoQuery
 
-from sorl.thumbnail import get_thumbnail
+from .autocomplete import get_autocomplete_index
 from .geocoder import geocoder
 
 
+class PrefetchedResults(object):
+    """The start of some search results, and how many there are in total
+
+    This is enough for a Paginator to show the first page of results
+    that have already been fetched, without searching again."""
+
+    def __init__(self, results, count):
+        self.results = results
+        self._count = count
+
+    def count(self):
+        return self._count
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, key):
+        return self.results[key]
+
+
 class SearchBaseView(TemplateView):
 
     top_hits_under = {
@@ -147,20 +166,7 @@ class SearchBaseView(TemplateView):
 
         show_top_hits = (self.page == '1' or not self.page)
 
-        top_hits_ids = []
-
-        if show_top_hits:
-            context['top_hits'] = []
-            for section, max_for_top_hits in SearchBaseView.top_hits_under.items():
-                data = self.get_section_data(section)
-                if data['results_count'] <= max_for_top_hits:
-                    context['top_hits'] += data['results']
-            top_hits_ids = set(r.id for r in context['top_hits'])
-
         sqs = SearchQuerySet().models(*list(models))
-        # Exclude anything that will already have been shown in the top hits:
-        for top_hit_id in top_hits_ids:
-            sqs = sqs.exclude(id=top_hit_id)
         sqs = sqs. \
             exclude(hidden=True). \
             filter(content=AutoQuery(self.query)). \
@@ -175,10 +181,77 @@ class SearchBaseView(TemplateView):
         if self.order == 'date':
             sqs = sqs.order_by('-start_date')
 
-        context['paginator'] = Paginator(sqs, self.results_per_page)
+        if show_top_hits:
+            context['top_hits'], results_count, results = self.get_top_hits(sqs)
+            context['paginator'] = Paginator(
+                PrefetchedResults(results, results_count), self.results_per_page)
+        else:
+            context['paginator'] = Paginator(sqs, self.results_per_page)
+
         context['page_obj'] = self.get_paginated_results(context['paginator'])
         return context
 
+    def get_top_hits(self, sqs):
+        """Split the first page of results from sqs into top hits and the rest
+
+        The number of results in each of the top_hits_under sections is
+        found with facets, so the top hits and the first page of the
+        other results usually come from a single search. Returns the
+        top hits, the number of other results, and the start of them."""
+
+        sections = [
+            section for section in SearchBaseView.top_hits_under
+            if section in self.search_sections
+        ]
+        for section in sections:
+            sqs = sqs.query_facet(section, self.get_section_facet_query(section))
+
+        max_top_hits = sum(SearchBaseView.top_hits_under[s] for s in sections)
+        results = sqs[:self.results_per_page + max_top_hits]
+        section_counts = sqs.facet_counts().get('queries', {})
+
+        top_hits = []
+        for section in sections:
+            section_count = section_counts.get(section, 0)
+            if section_count > SearchBaseView.top_hits_under[section]:
+                continue
+            hits = [r for r in results if self.result_in_section(r, section)]
+            if len(hits) < section_count:
+                # Some of them are further down the overall results,
+                # so they have to be found separately.
+                hits = list(self.get_section_data(section)['results'])
+            top_hits += hits
+
+        top_hits_ids = set(r.id for r in top_hits)
+        other_results = [r for r in results if r.id not in top_hits_ids]
+        return top_hits, sqs.count() - len(top_hits_ids), other_results
+
+    def get_section_facet_query(self, section):
+        """Return a query string matching the results in a section
+
+        This is only used to count the results in a section, within
+        the global search, which already leaves out hidden results, so
+        the section's exclude option is ignored."""
+
+        defaults = self.search_sections[section]
+        model = defaults['model']
+        filter_kwargs = defaults.get('filter', {}).get('kwargs', {})
+
+        terms = ['django_ct:"%s.%s"' % (model._meta.app_label, model._meta.module_name)]
+        for field, value in sorted(filter_kwargs.items()):
+            terms.append('%s:"%s"' % (field, value))
+        return ' AND '.join(terms)
+
+    def result_in_section(self, result, section):
+        defaults = self.search_sections[section]
+        if result.model != defaults['model']:
+            return False
+        filter_kwargs = defaults.get('filter', {}).get('kwargs', {})
+        return all(
+            getattr(result, field, None) == value
+            for field, value in filter_kwargs.items()
+        )
+
     def get_section_context(self, context, section):
         data = self.get_section_data(section)
         context['paginator'] = Paginator(data['results'], self.results_per_page)
@@ -345,52 +418,7 @@ class GeocoderView(TemplateView):
         return context
 
 
-known_kinds = {
-    'person': models.Person,
-    'place':  models.Place,
-}
-
-def places_ordered_by_session(place_a, place_b):
-    """Return True if both places have sessions and place_b's is later"""
-    a_session = place_a.parliamentary_session
-    b_session = place_b.parliamentary_session
-    if not (a_session and b_session):
-        return False
-    return a_session.end_date < b_session.end_date
-
-def remove_duplicate_places(response_data):
-    """Remove all but the newest of places with indistinguishable labels
-
-    We have a slightly unpleasant problem where consituencies that
-    have the same name from one parliament to the next appear twice
-    with exactly the same label - people get confused if they pick the
-    old one and don't find their aspirants.  We could exclude all
-    older constituencies, but for people who don't know that their
-    constituency name has changed, it's potentially useful to still
-    have the old name returned in results.  So, look for duplicate
-    labels, and (if they're places) delete the one from the older
-    parliamentary session."""
-
-    indices_to_remove = []
-    previous_label_index = {}
-
-    for i, result in enumerate(response_data):
-        this_label = result['label']
-        this_object = result['object']
-        if (this_label in previous_label_index) and type(this_object) == models.Place:
-            previous_i = previous_label_index[this_label]
-            if places_ordered_by_session(response_data[previous_i]['object'], this_object):
-                indices_to_remove.append(previous_i)
-                previous_label_index[this_label] = i
-            else:
-                indices_to_remove.append(i)
-        else:
-            previous_label_index[this_label] = i
-
-    # Now remove those marked for deletion:
-    indices_to_remove.sort(reverse=True)
-    for index_to_remove in indices_to_remove:
-        del response_data[index_to_remove]
+known_kinds = ('person', 'place')
 
 def autocomplete(request):
     """Return autocomplete JSON results"""
@@ -400,71 +428,24 @@ def autocomplete(request):
 
     if len(term):
 
-        # Does not work - probably because the FLAG_PARTIAL is not set on Xapian
-        # (trying to set it in settings.py as documented appears to have no effect)
-        # sqs = SearchQuerySet().autocomplete(name_auto=term)
-
-        # Split the search term up into little bits
-        terms = re.split(r'\s+', term)
-
-        # Build up a query based on the bits
-        sqs = SearchQuerySet()
-        for bit in terms:
-            # print "Adding '%s' to the '%s' query" % (bit,term)
-            sqs = sqs.filter_and(
-                name_auto__startswith = sqs.query.clean( bit )
-            )
-        sqs = sqs.exclude(hidden=False)
-
         # If we have a kind then filter on that too
         model_kind = request.GET.get('model', None)
-        if model_kind:
-            model = known_kinds.get(model_kind, None)
-            if model:
-                sqs = sqs.models(model)
-        else:
-            sqs = sqs.models(
-                models.Person,
-                models.Organisation,
-                models.Place,
-                models.PositionTitle,
-            )
-
-        # collate the results into json for the autocomplete js
-        for result in sqs.all()[0:10]:
-
-            object = result.object
-            css_class = object.css_class()
-
-            # use the specific field if it has one
-            if hasattr(object, 'name_autocomplete_html'):
-                label = object.name_autocomplete_html
-            else:
-                label = object.name
+        if model_kind not in known_kinds:
+            model_kind = None
 
-            image_url = None
-            if hasattr(object, 'primary_image'):
-                image = object.primary_image()
-                if image:
-                    image_url = get_thumbnail(image, '16x16', crop="center").url
-
-            if not image_url:
-                image_url = "/static/images/" + css_class + "-16x16.jpg"
+        # The index is kept in memory, so this doesn't need to query the
+        # search engine or the database - see pombola.search.autocomplete
+        index = get_autocomplete_index()
 
+        # collate the results into json for the autocomplete js
+        for entry in index.search(term, kind=model_kind):
             response_data.append({
-                'url':   object.get_absolute_url(),
-                'label': '<img height="16" width="16" src="%s" /> %s' % (image_url, label),
-                'type':  css_class,
-                'value': object.name,
-                'object': object
+                'url':   entry.url,
+                'label': '<img height="16" width="16" src="%s" /> %s' % (index.image_url(entry), entry.label),
+                'type':  entry.css_class,
+                'value': entry.name,
             })
 
-    remove_duplicate_places(response_data)
-
-    # Remove the 'object' elements before returning the response:
-    for d in response_data:
-        del d['object']
-
     # send back the results as JSON
     return HttpResponse(
         simplejson.dumps(response_data),
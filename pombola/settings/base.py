@@ -294,7 +294,9 @@ HAYSTACK_CONNECTIONS = {
     },
 }
 
-HAYSTACK_SIGNAL_PROCESSOR = 'haystack.signals.RealtimeSignalProcessor'
+# Changes to indexed objects are queued, and sent to the search engine in
+# batches by the search_process_index_queue management command.
+HAYSTACK_SIGNAL_PROCESSOR = 'pombola.search.signals.QueuedSignalProcessor'
 
 # Admin autocomplete
 AJAX_LOOKUP_CHANNELS = {
@@ -347,6 +349,18 @@ BLOG_RSS_FEED = config.get( 'BLOG_RSS_FEED', None )
 
 THUMBNAIL_DEBUG = True
 
+# The thumbnails made whenever an image is saved, and by the
+# images_generate_thumbnails command, as (geometry, options) pairs. The
+# pregenerated_thumbnail template tag shows a placeholder until a
+# thumbnail has been made, so this should list every size it's used with.
+PREGENERATED_THUMBNAILS = (
+    ('16x16', {'crop': 'center'}),
+    ('50x50', {'crop': 'center'}),
+    ('90x90', {'crop': 'center'}),
+    ('100x100', {'crop': 'center'}),
+    ('210x210', {'crop': 'center'}),
+)
+
 # ZA Hansard settings
 HANSARD_CACHE   = os.path.join( root_dir, 'hansard_cache' )
 COMMITTEE_CACHE = os.path.join( HANSARD_CACHE, 'committee' )
@@ -1,5 +1,7 @@
 from pombola.hansard.constants import NAME_SUBSTRING_MATCH
 
+from . import base
+
 COUNTRY_APP = 'kenya'
 
 OPTIONAL_APPS = [
@@ -23,6 +25,11 @@ MAP_BOUNDING_BOX_WEST = 33.83
 
 MAPIT_COUNTRY = 'KE'
 
+# Kenya's person and place pages have a larger profile picture:
+PREGENERATED_THUMBNAILS = base.PREGENERATED_THUMBNAILS + (
+    ('230x230', {'crop': 'center'}),
+)
+
 COUNTRY_CSS = {
     'kenya': {
         'source_filenames': (
@@ -1,3 +1,4 @@
+from . import base
 from .apps import *
 
 COUNTRY_APP = 'south_africa'
@@ -35,6 +36,11 @@ MAP_BOUNDING_BOX_WEST = 16.30
 
 MAPIT_COUNTRY = 'ZA'
 
+PREGENERATED_THUMBNAILS = base.PREGENERATED_THUMBNAILS + (
+    ('58x58', {'crop': 'center'}),
+    ('58x78', {'crop': 'center'}),
+)
+
 COUNTRY_CSS = {
     'south-africa': {
         'source_filenames': (
@@ -21,6 +21,10 @@ STATIC_ROOT = os.path.normpath( os.path.join( root_dir, "collected_static/") )
 HTTPLIB2_CACHE_DIR = os.path.join( root_dir, 'httplib2_cache' )
 HANSARD_CACHE = os.path.join( root_dir, 'hansard_cache' )
 
+# Nothing processes the search index queue when running the tests, so
+# index changes as they happen:
+HAYSTACK_SIGNAL_PROCESSOR = 'haystack.signals.RealtimeSignalProcessor'
+
 MAP_BOUNDING_BOX_NORTH = None
 MAP_BOUNDING_BOX_SOUTH = None
 MAP_BOUNDING_BOX_EAST = None
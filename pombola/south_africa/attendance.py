@@ -0,0 +1,279 @@
+"""
+Committee meeting attendance of members of parliament, from the PMG API.
+
+Fetching a member's attendance means paging through the API, which can
+take several seconds, so rather than doing it while a person's page is
+requested, update_attendance() fetches it for many people at once in a
+pool of threads and stores a summary in the AttendanceYear and
+AttendedMeeting tables, which is all the person page reads.
+"""
+
+from __future__ import division
+
+import json
+from multiprocessing.pool import ThreadPool
+import re
+import traceback
+import urllib
+from urlparse import urlsplit
+
+import dateutil.parser
+import requests
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+
+from pombola.core.models import Identifier, Person
+from pombola.south_africa.models import AttendanceYear, AttendedMeeting
+
+PMG_MEMBER_SCHEME = 'za.org.pmg.api/member'
+
+MEMBER_SEARCH_URL_TEMPLATE = "https://api.pmg.org.za/member/?filter[pa_link]={}"
+ATTENDANCE_URL_TEMPLATE = "http://api.pmg.org.za/member/{}/attendance/"
+MEETING_URL_TEMPLATE = 'https://pmg.org.za/committee-meeting/{}/'
+
+api_meeting_url_re = re.compile(r'/committee-meeting/(\d+)/')
+
+# The number of recent meetings attended to store for each person:
+LATEST_MEETINGS_COUNT = 5
+
+# The default number of people to fetch attendance for at once:
+DEFAULT_THREADS = 4
+
+# How long to wait for the PMG API, in seconds, before giving up on a
+# request, so that one stalled connection can't hold up a worker thread
+# indefinitely:
+REQUEST_TIMEOUT = 60
+
+# Meanings of attendance field
+
+#  A:   Absent
+#  AP:  Absent with Apologies
+#  DE:  Departed Early
+#  L:   Arrived Late
+#  LDE: Arrived Late and Departed Early
+#  P:   Present
+
+PRESENT_VALUES = set(('P', 'DE', 'L', 'LDE'))
+
+
+def find_pmg_member_id(person_slug):
+    """Return the ID of the PMG member whose PA link is to this person, or None"""
+
+    pa_link = urllib.quote(
+        "http://www.pa.org.za/person/{}/".format(person_slug))
+
+    search_resp = requests.get(
+        MEMBER_SEARCH_URL_TEMPLATE.format(pa_link), timeout=REQUEST_TIMEOUT)
+    search_data = json.loads(search_resp.text)
+
+    if not search_data.get('count'):
+        return None
+
+    if search_data['count'] > 1:
+        raise Exception('Duplicate members at PMG with slug {}'.format(person_slug))
+
+    return search_data['results'][0]['id']
+
+
+def download_attendance_data(pmg_member_id):
+    """Return all the attendance records for a PMG member
+
+    Results are returned from the API most recent first, which is
+    convenient for us."""
+
+    results = []
+    next_url = ATTENDANCE_URL_TEMPLATE.format(pmg_member_id)
+    while next_url:
+        resp = requests.get(next_url, timeout=REQUEST_TIMEOUT)
+        data = json.loads(resp.text)
+        results.extend(data.get('results'))
+
+        next_url = data.get('next')
+
+    return results
+
+
+def get_attendance_stats_raw(data):
+    """Count each kind of attendance in each year"""
+
+    if not data:
+        return {}
+
+    attendance_by_year = {}
+
+    for x in data:
+        attendance = x['attendance']
+        year = dateutil.parser.parse(x['meeting']['date']).year
+
+        year_dict = attendance_by_year.setdefault(year, {})
+
+        year_dict.setdefault(attendance, 0)
+        year_dict[attendance] += 1
+
+    return attendance_by_year
+
+
+def get_attendance_stats(attendance_by_year):
+    """Return the year, meetings attended, total and percentage, latest year first"""
+
+    sorted_keys = sorted(attendance_by_year.keys(), reverse=True)
+
+    return_data = []
+    # year, attended, total, percentage
+    for year in sorted_keys:
+        year_dict = attendance_by_year[year]
+
+        attendance = sum((year_dict[x] for x in year_dict if x in PRESENT_VALUES))
+        meeting_count = sum((year_dict[x] for x in year_dict))
+        return_data.append(
+            {'year': year,
+             'attended': attendance,
+             'total': meeting_count,
+             'percentage': 100 * attendance / meeting_count,
+             }
+            )
+
+    return return_data
+
+
+def get_latest_meeting_urls(data):
+    """Return the PMG page, title and committee of the latest meetings"""
+
+    results = []
+
+    for x in data[:LATEST_MEETINGS_COUNT]:
+        meeting = x['meeting']
+        path = urlsplit(meeting['url']).path
+        meeting_id = api_meeting_url_re.match(path).group(1)
+
+        results.append(
+            {'url': MEETING_URL_TEMPLATE.format(meeting_id),
+             'title': meeting['title'],
+             'committee_name': meeting['committee']['name'],
+             }
+            )
+
+    return results
+
+
+@transaction.commit_on_success
+def store_attendance_data(person, data):
+    """Replace the stored attendance summary for person with one of data"""
+
+    AttendanceYear.objects.filter(person=person).delete()
+    AttendedMeeting.objects.filter(person=person).delete()
+
+    AttendanceYear.objects.bulk_create(
+        AttendanceYear(
+            person=person,
+            year=stats['year'],
+            attended=stats['attended'],
+            total=stats['total'],
+            )
+        for stats in get_attendance_stats(get_attendance_stats_raw(data))
+        )
+
+    AttendedMeeting.objects.bulk_create(
+        AttendedMeeting(person=person, order=i, **meeting)
+        for i, meeting in enumerate(get_latest_meeting_urls(data))
+        )
+
+
+def get_stored_attendance(person):
+    """Return (attendance_stats, latest_meetings) as stored for person
+
+    These are in the same form as get_attendance_stats() and
+    get_latest_meeting_urls() return."""
+
+    attendance_stats = [
+        {'year': year,
+         'attended': attended,
+         'total': total,
+         'percentage': 100 * attended / total,
+         }
+        for year, attended, total
+        in person.attendance_years.values_list('year', 'attended', 'total')
+        ]
+
+    latest_meetings = list(
+        person.attended_meetings.values('url', 'title', 'committee_name'))
+
+    return attendance_stats, latest_meetings
+
+
+def fetch_attendance(person_and_member_id):
+    """Fetch the attendance of a person, returning (person, member_id, data, error)
+
+    This is run in a worker thread, so it only talks to the PMG API and
+    not the database. If the person's PMG member ID isn't known it's
+    looked up first; if they're not found both member_id and data are
+    None. If anything goes wrong error is the traceback."""
+
+    person, pmg_member_id = person_and_member_id
+    try:
+        if pmg_member_id is None:
+            pmg_member_id = find_pmg_member_id(person.slug)
+        if pmg_member_id is None:
+            return person, None, None, None
+        return person, pmg_member_id, download_attendance_data(pmg_member_id), None
+    except Exception:
+        return person, pmg_member_id, None, traceback.format_exc()
+
+
+def update_attendance(people, threads=DEFAULT_THREADS, verbose=False):
+    """Fetch and store the attendance of people, several at once
+
+    The database is only used from this thread; as each download
+    finishes, any newly found PMG member ID is saved as an identifier
+    of the person and their attendance summary is replaced. Returns
+    a list of (person, error) for the people whose attendance couldn't
+    be fetched, whose stored attendance is left as it was."""
+
+    people = list(people)
+
+    member_ids = dict(
+        Identifier.objects
+        .filter(
+            scheme=PMG_MEMBER_SCHEME,
+            content_type=ContentType.objects.get_for_model(Person),
+            object_id__in=[p.id for p in people],
+            )
+        .values_list('object_id', 'identifier')
+        )
+
+    to_fetch = [(p, member_ids.get(p.id)) for p in people]
+
+    failed = []
+    pool = ThreadPool(threads)
+    try:
+        for person, pmg_member_id, data, error in pool.imap_unordered(fetch_attendance, to_fetch):
+            if error is not None:
+                failed.append((person, error))
+                continue
+
+            if pmg_member_id is None:
+                if verbose:
+                    print "No PMG member found for {0}".format(person.slug)
+                continue
+
+            if person.id not in member_ids:
+                Identifier.objects.create(
+                    scheme=PMG_MEMBER_SCHEME,
+                    identifier=pmg_member_id,
+                    content_object=person,
+                    )
+
+            store_attendance_data(person, data)
+
+            if verbose:
+                print "Stored {0} attendance records for {1}".format(len(data), person.slug)
+    except:
+        pool.terminate()
+        raise
+    else:
+        pool.close()
+    finally:
+        pool.join()
+
+    return failed
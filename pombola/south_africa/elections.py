@@ -0,0 +1,189 @@
+"""
+The data shared by the election pages for a particular year.
+
+Every election page shows the parties, provinces and the parties
+running in the election, and the statistics page adds counts of the
+current MPs who are standing again and a list of people who appear to
+have switched party. These change only when candidates are imported,
+but the pages get a lot of traffic around an election, so they're all
+worked out at once in an ElectionSnapshot, which is kept in the cache
+and shared by all the election views.
+"""
+
+from __future__ import division
+
+import datetime
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from pombola.core import models
+
+CACHE_KEY_TEMPLATE = 'south_africa_election_snapshot_{0}'
+# The import commands clear the snapshot, but in case anything else
+# changes the candidates, don't keep it for long:
+CACHE_TIMEOUT = 60 * 15
+
+
+class ElectionSnapshot(object):
+
+    def __init__(self, election_year):
+        self.election_year = election_year
+
+        self.party_list = list(
+            models.Organisation.objects
+            .filter(kind__slug='party')
+            .order_by('name'))
+
+        self.province_list = list(
+            models.Place.objects
+            .filter(kind__slug='province')
+            .order_by('name'))
+
+        self.running_party_list = self.get_running_parties()
+        self.current_mps = self.get_current_mps()
+        self.people_new_party = self.get_people_new_party()
+
+    def get_running_parties(self):
+        """Return the parties with a national list in this election, in list name order"""
+
+        election_list_suffix = '-national-election-list-' + self.election_year
+
+        running_parties = []
+        national_running_party_lists = (
+            models.Organisation.objects
+            .filter(
+                kind__slug='election-list',
+                slug__endswith=election_list_suffix)
+            .order_by('name')
+            .values_list('slug', flat=True))
+        for list_slug in national_running_party_lists:
+            party_slug = list_slug.replace(election_list_suffix, '')
+            if party_slug not in running_parties:
+                running_parties.append(party_slug)
+
+        parties = dict(
+            (o.slug, o) for o in
+            models.Organisation.objects.filter(slug__in=running_parties))
+        return [parties[slug] for slug in running_parties if slug in parties]
+
+    def candidate_person_ids(self):
+        """Return a queryset of IDs of people on a national or regional list in this election"""
+
+        return (
+            models.Position.objects
+            .filter(
+                Q(organisation__slug__contains='national-election-list-' + self.election_year) |
+                (Q(organisation__slug__contains='election-list-' + self.election_year) &
+                 Q(organisation__slug__contains='regional')))
+            .values('person'))
+
+    def get_current_mps(self):
+        """Count the current MPs, and those standing again, overall and by party
+
+        The counts by party are of current MPs who have ever been a
+        member of the party, each found with a single grouped query."""
+
+        current_mp_ids = (
+            models.Position.objects
+            .filter(organisation__slug='national-assembly')
+            .currently_active()
+            .values('person'))
+        rerunning_mp_ids = current_mp_ids.filter(person__in=self.candidate_person_ids())
+
+        current_mps = {'all': {}, 'byparty': []}
+
+        current = current_mp_ids.distinct().count()
+        rerunning = rerunning_mp_ids.distinct().count()
+        current_mps['all'] = {
+            'current': current,
+            'rerunning': rerunning,
+            'percent_rerunning': 100 * rerunning / current if current else 0,
+        }
+
+        def count_by_party(person_ids):
+            return dict(
+                models.Position.objects
+                .filter(organisation__kind__slug='party', person__in=person_ids)
+                .values_list('organisation')
+                .annotate(Count('person', distinct=True))
+                .order_by())
+
+        current_by_party = count_by_party(current_mp_ids)
+        rerunning_by_party = count_by_party(rerunning_mp_ids)
+
+        for party in self.party_list:
+            current = current_by_party.get(party.id, 0)
+            if current:
+                rerunning = rerunning_by_party.get(party.id, 0)
+                current_mps['byparty'].append({
+                    'party': party,
+                    'current': current,
+                    'rerunning': rerunning,
+                    'percent_rerunning': 100 * rerunning / current,
+                })
+
+        return current_mps
+
+    def get_people_new_party(self):
+        """Find candidates in this election who appear to have switched party"""
+
+        person_ids = list(
+            models.Person.objects
+            .filter(
+                position__organisation__kind__slug='party',
+                position__title__slug='member')
+            .annotate(num_parties=Count('position'))
+            .filter(num_parties__gt=1)
+            .values_list('id', flat=True))
+
+        list_positions = {}
+        for position in (
+                models.Position.objects
+                .filter(
+                    person__in=person_ids,
+                    organisation__slug__contains='election-list-' + self.election_year)
+                .select_related('person', 'organisation')):
+            list_positions.setdefault(position.person_id, []).append(position)
+
+        party_positions = {}
+        for position in (
+                models.Position.objects
+                .filter(
+                    person__in=list_positions.keys(),
+                    organisation__kind__slug='party')
+                .select_related('organisation')):
+            party_positions.setdefault(position.person_id, []).append(position)
+
+        today = datetime.date.today()
+        people_new_party = []
+        for person_id, person_list in sorted(
+                list_positions.items(),
+                key=lambda item: item[1][0].person.sort_name):
+            positions = party_positions.get(person_id, [])
+            people_new_party.append({
+                'person': person_list[0].person,
+                'current_positions': [
+                    p for p in positions if p.is_currently_active],
+                'former_positions': [
+                    p for p in positions
+                    if p.date_range_start > today or p.date_range_end < today],
+                'person_list': person_list,
+            })
+
+        return people_new_party
+
+
+def get_election_snapshot(election_year):
+    """Return the cached snapshot for an election year, building it if needed"""
+
+    key = CACHE_KEY_TEMPLATE.format(election_year)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = ElectionSnapshot(election_year)
+        cache.set(key, snapshot, CACHE_TIMEOUT)
+    return snapshot
+
+
+def invalidate_election_snapshot(election_year):
+    cache.delete(CACHE_KEY_TEMPLATE.format(election_year))
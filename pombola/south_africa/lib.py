@@ -5,6 +5,13 @@ def make_pa_url(pombola_object, base_url):
     parsed_url[2] = pombola_object.get_absolute_url()
     return urlparse.urlunparse(parsed_url)
 
+def prefetch_extra_popolo_data_for_people(people):
+    return people.prefetch_related(
+        'interests_register_entries__release',
+        'interests_register_entries__category',
+        'interests_register_entries__line_items',
+    )
+
 def add_extra_popolo_data_for_person(person, popolo_object, base_url):
     popolo_object['pa_url'] = make_pa_url(person, base_url)
 
@@ -24,6 +31,9 @@ def add_extra_popolo_data_for_person(person, popolo_object, base_url):
 
         popolo_object['interests_register'] = interests
 
+def prefetch_extra_popolo_data_for_organizations(organisations):
+    return organisations.prefetch_related('place_set')
+
 def add_extra_popolo_data_for_organization(organisation, popolo_object, base_url):
     popolo_object['pa_url'] = make_pa_url(organisation, base_url)
     if organisation.kind.slug in ('constituency-office', 'constituency-area'):
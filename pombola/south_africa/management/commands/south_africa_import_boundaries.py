@@ -32,6 +32,8 @@ from django.core.management.base import NoArgsCommand, CommandError
 
 from mapit.models import Area, Code, CodeType, Generation, Type, NameType, Country
 
+from pombola.core.mapit_cache import invalidate_mapit_cache
+
 
 class Command(NoArgsCommand):
     """Import South African boundaries"""
@@ -135,3 +137,8 @@ class Command(NoArgsCommand):
             call_command('mapit_import',
                          b.shapefile,
                          **all_options)
+
+        if options['commit']:
+            # Saving the boundaries should already have done this, but
+            # make certain that no cached lookups use the old ones:
+            invalidate_mapit_cache()
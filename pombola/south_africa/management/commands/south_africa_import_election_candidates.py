@@ -24,6 +24,8 @@ from django_date_extensions.fields import ApproximateDateField, ApproximateDate
 
 from haystack.query import SearchQuerySet
 
+from pombola.south_africa.elections import invalidate_election_snapshot
+
 party_to_object = {}
 list_to_object = {}
 position_to_object = {}
@@ -341,3 +343,6 @@ class Command(NoArgsCommand):
             for row in candidiates:
                 if not search(row[3], row[4], row[0], row[2], row[1]):
                     add_new_person(row[0], row[2], row[1], row[3], row[4])
+
+        # The election pages share a cached summary of the candidates
+        invalidate_election_snapshot(YEAR)
@@ -15,6 +15,7 @@ from django_date_extensions.fields import ApproximateDate
 
 from pombola.core.models import ( ContentType, ContactKind, Identifier,
     Organisation, Person, Contact )
+from pombola.search.autocomplete import deferred_autocomplete_invalidation
 
 def parse_approximate_date(s):
     """Take a partial ISO 8601 date, and return an ApproximateDate for it
@@ -46,6 +47,7 @@ class Command(LabelCommand):
 
     help = 'Imports the South Africa Popolo JSON into Pombola.'
 
+    @deferred_autocomplete_invalidation()
     def handle_label(self, filename, **options):
 
         with open(filename) as f:
@@ -14,6 +14,7 @@ from django.utils.text import slugify
 from pombola.core.models import (
     Person, ContentType, Image
 )
+from pombola.search.autocomplete import deferred_autocomplete_invalidation
 
 from haystack.query import SearchQuerySet
 
@@ -54,6 +55,7 @@ class Command(LabelCommand):
 
         self.content_type_person = ContentType.objects.get_for_model(Person)
 
+    @deferred_autocomplete_invalidation()
     def handle_label(self, path, **options):
 
         matched = 0
@@ -0,0 +1,15 @@
+from django.core.management.base import NoArgsCommand
+
+from pombola.south_africa.models import QuestionAnswer, SectionSummary
+
+
+class Command(NoArgsCommand):
+    help = 'Recreate the summaries of SayIt sections used by the Hansard, committee and question indexes'
+
+    def handle_noargs(self, **options):
+        SectionSummary.objects.rebuild()
+        QuestionAnswer.objects.rebuild()
+
+        if int(options['verbosity']) >= 2:
+            print "Summarised {0} sections, of which {1} are questions".format(
+                SectionSummary.objects.count(), QuestionAnswer.objects.count())
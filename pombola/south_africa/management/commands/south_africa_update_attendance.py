@@ -0,0 +1,47 @@
+from optparse import make_option
+
+from django.core.management.base import NoArgsCommand, CommandError
+
+from pombola.core.models import Person, Position
+from pombola.south_africa.attendance import DEFAULT_THREADS, update_attendance
+
+# The organisations whose current members have their attendance updated:
+HOUSE_SLUGS = ('national-assembly', 'ncop')
+
+
+class Command(NoArgsCommand):
+    help = 'Fetch committee meeting attendance of current MPs from the PMG API'
+
+    option_list = NoArgsCommand.option_list + (
+        make_option('--threads', dest='threads', type='int', default=DEFAULT_THREADS,
+                    help='Fetch the attendance of this many people at once'),
+        make_option('--person', dest='person_slugs', action='append', default=[],
+                    help='Only update the person with this slug (may be repeated)'),
+    )
+
+    def handle_noargs(self, **options):
+        if options['threads'] < 1:
+            raise CommandError("--threads must be at least 1")
+
+        verbose = int(options['verbosity']) >= 2
+
+        if options['person_slugs']:
+            people = Person.objects.filter(slug__in=options['person_slugs'])
+        else:
+            positions = (
+                Position.objects
+                .all()
+                .currently_active()
+                .filter(organisation__slug__in=HOUSE_SLUGS)
+            )
+            people = Person.objects.filter(position__in=positions).distinct()
+
+        failed = update_attendance(people, threads=options['threads'], verbose=verbose)
+
+        for person, error in failed:
+            print "Failed to fetch the attendance of {0}:".format(person.slug)
+            print error
+
+        if failed:
+            raise CommandError(
+                "Failed to fetch the attendance of {0} people".format(len(failed)))
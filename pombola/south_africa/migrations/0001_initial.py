@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+from south.utils import datetime_utils as datetime
+from south.db import db
+from south.v2 import SchemaMigration
+from django.db import models
+
+
+class Migration(SchemaMigration):
+
+    def forwards(self, orm):
+        # Adding model 'AttendanceYear'
+        db.create_table(u'south_africa_attendanceyear', (
+            (u'id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('person', self.gf('django.db.models.fields.related.ForeignKey')(related_name='attendance_years', to=orm['core.Person'])),
+            ('year', self.gf('django.db.models.fields.PositiveIntegerField')()),
+            ('attended', self.gf('django.db.models.fields.PositiveIntegerField')()),
+            ('total', self.gf('django.db.models.fields.PositiveIntegerField')()),
+        ))
+        db.send_create_signal(u'south_africa', ['AttendanceYear'])
+
+        # Adding unique constraint on 'AttendanceYear', fields ['person', 'year']
+        db.create_unique(u'south_africa_attendanceyear', ['person_id', 'year'])
+
+        # Adding model 'AttendedMeeting'
+        db.create_table(u'south_africa_attendedmeeting', (
+            (u'id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('person', self.gf('django.db.models.fields.related.ForeignKey')(related_name='attended_meetings', to=orm['core.Person'])),
+            ('order', self.gf('django.db.models.fields.PositiveIntegerField')()),
+            ('url', self.gf('django.db.models.fields.URLField')(max_length=200)),
+            ('title', self.gf('django.db.models.fields.TextField')()),
+            ('committee_name', self.gf('django.db.models.fields.CharField')(max_length=300)),
+        ))
+        db.send_create_signal(u'south_africa', ['AttendedMeeting'])
+
+
+    def backwards(self, orm):
+        # Removing unique constraint on 'AttendanceYear', fields ['person', 'year']
+        db.delete_unique(u'south_africa_attendanceyear', ['person_id', 'year'])
+
+        # Deleting model 'AttendanceYear'
+        db.delete_table(u'south_africa_attendanceyear')
+
+        # Deleting model 'AttendedMeeting'
+        db.delete_table(u'south_africa_attendedmeeting')
+
+
+    models = {
+        u'core.person': {
+            'Meta': {'ordering': "['sort_name']", 'object_name': 'Person'},
+            '_biography_rendered': ('django.db.models.fields.TextField', [], {'blank': 'True'}),
+            '_summary_rendered': ('django.db.models.fields.TextField', [], {'blank': 'True'}),
+            'additional_name': ('django.db.models.fields.CharField', [], {'max_length': '300', 'blank': 'True'}),
+            'biography': ('markitup.fields.MarkupField', [], {'default': "''", 'no_rendered_field': 'True', 'blank': 'True'}),
+            'can_be_featured': ('django.db.models.fields.BooleanField', [], {'default': 'False'}),
+            'created': ('django.db.models.fields.DateTimeField', [], {'auto_now_add': 'True', 'blank': 'True'}),
+            'date_of_birth': ('django_date_extensions.fields.ApproximateDateField', [], {'max_length': '10', 'blank': 'True'}),
+            'date_of_death': ('django_date_extensions.fields.ApproximateDateField', [], {'max_length': '10', 'blank': 'True'}),
+            'email': ('django.db.models.fields.EmailField', [], {'max_length': '75', 'blank': 'True'}),
+            'family_name': ('django.db.models.fields.CharField', [], {'max_length': '300', 'blank': 'True'}),
+            'gender': ('django.db.models.fields.CharField', [], {'max_length': '20', 'blank': 'True'}),
+            'given_name': ('django.db.models.fields.CharField', [], {'max_length': '300', 'blank': 'True'}),
+            'hidden': ('django.db.models.fields.BooleanField', [], {'default': 'False'}),
+            'honorific_prefix': ('django.db.models.fields.CharField', [], {'max_length': '300', 'blank': 'True'}),
+            'honorific_suffix': ('django.db.models.fields.CharField', [], {'max_length': '300', 'blank': 'True'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'legal_name': ('django.db.models.fields.CharField', [], {'max_length': '300'}),
+            'national_identity': ('django.db.models.fields.CharField', [], {'max_length': '100', 'blank': 'True'}),
+            'slug': ('django.db.models.fields.SlugField', [], {'unique': 'True', 'max_length': '200'}),
+            'sort_name': ('django.db.models.fields.CharField', [], {'max_length': '300', 'blank': 'True'}),
+            'summary': ('markitup.fields.MarkupField', [], {'default': "''", 'no_rendered_field': 'True', 'blank': 'True'}),
+            'title': ('django.db.models.fields.CharField', [], {'max_length': '100', 'blank': 'True'}),
+            'updated': ('django.db.models.fields.DateTimeField', [], {'auto_now': 'True', 'blank': 'True'})
+        },
+        u'south_africa.attendanceyear': {
+            'Meta': {'ordering': "['person', '-year']", 'unique_together': "(('person', 'year'),)", 'object_name': 'AttendanceYear'},
+            'attended': ('django.db.models.fields.PositiveIntegerField', [], {}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'person': ('django.db.models.fields.related.ForeignKey', [], {'related_name': "'attendance_years'", 'to': u"orm['core.Person']"}),
+            'total': ('django.db.models.fields.PositiveIntegerField', [], {}),
+            'year': ('django.db.models.fields.PositiveIntegerField', [], {})
+        },
+        u'south_africa.attendedmeeting': {
+            'Meta': {'ordering': "['person', 'order']", 'object_name': 'AttendedMeeting'},
+            'committee_name': ('django.db.models.fields.CharField', [], {'max_length': '300'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'order': ('django.db.models.fields.PositiveIntegerField', [], {}),
+            'person': ('django.db.models.fields.related.ForeignKey', [], {'related_name': "'attended_meetings'", 'to': u"orm['core.Person']"}),
+            'title': ('django.db.models.fields.TextField', [], {}),
+            'url': ('django.db.models.fields.URLField', [], {'max_length': '200'})
+        }
+    }
+
+    complete_apps = ['south_africa']
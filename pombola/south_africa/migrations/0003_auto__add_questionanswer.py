@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+from south.utils import datetime_utils as datetime
+from south.db import db
+from south.v2 import SchemaMigration
+from django.db import models
+
+
+class Migration(SchemaMigration):
+
+    def forwards(self, orm):
+        # Adding model 'QuestionAnswer'
+        db.create_table(u'south_africa_questionanswer', (
+            ('section', self.gf('django.db.models.fields.related.OneToOneField')(related_name='south_africa_question', unique=True, primary_key=True, to=orm['speeches.Section'])),
+            ('section_title', self.gf('django.db.models.fields.TextField')(blank=True)),
+            ('minister_slug', self.gf('django.db.models.fields.CharField')(max_length=255, db_index=True)),
+            ('questionto', self.gf('django.db.models.fields.TextField')(blank=True)),
+            ('question', self.gf('django.db.models.fields.related.ForeignKey')(related_name='+', to=orm['speeches.Speech'])),
+            ('answer', self.gf('django.db.models.fields.related.ForeignKey')(related_name='+', null=True, to=orm['speeches.Speech'])),
+            ('answer_date', self.gf('django.db.models.fields.DateField')(null=True)),
+            ('reply_text', self.gf('django.db.models.fields.TextField')(blank=True)),
+            ('earliest_date', self.gf('django.db.models.fields.DateField')(null=True)),
+            ('latest_date', self.gf('django.db.models.fields.DateField')(null=True)),
+            ('first_speech_id', self.gf('django.db.models.fields.PositiveIntegerField')()),
+            ('speech_count', self.gf('django.db.models.fields.PositiveIntegerField')()),
+        ))
+        db.send_create_signal(u'south_africa', ['QuestionAnswer'])
+
+
+    def backwards(self, orm):
+        # Deleting model 'QuestionAnswer'
+        db.delete_table(u'south_africa_questionanswer')
+
+
+    models = {
+        u'core.person': {
+            'Meta': {'ordering': "['sort_name']", 'object_name': 'Person'},
+            '_biography_rendered': ('django.db.models.fields.TextField', [], {'blank': 'True'}),
+            '_summary_rendered': ('django.db.models.fields.TextField', [], {'blank': 'True'}),
+            'additional_name': ('django.db.models.fields.CharField', [], {'max_length': '300', 'blank': 'True'}),
+            'biography': ('markitup.fields.MarkupField', [], {'default': "''", 'no_rendered_field': 'True', 'blank': 'True'}),
+            'can_be_featured': ('django.db.models.fields.BooleanField', [], {'default': 'False'}),
+            'created': ('django.db.models.fields.DateTimeField', [], {'auto_now_add': 'True', 'blank': 'True'}),
+            'date_of_birth': ('django_date_extensions.fields.ApproximateDateField', [], {'max_length': '10', 'blank': 'True'}),
+            'date_of_death': ('django_date_extensions.fields.ApproximateDateField', [], {'max_length': '10', 'blank': 'True'}),
+            'email': ('django.db.models.fields.EmailField', [], {'max_length': '75', 'blank': 'True'}),
+            'family_name': ('django.db.models.fields.CharField', [], {'max_length': '300', 'blank': 'True'}),
+            'gender': ('django.db.models.fields.CharField', [], {'max_length': '20', 'blank': 'True'}),
+            'given_name': ('django.db.models.fields.CharField', [], {'max_length': '300', 'blank': 'True'}),
+            'hidden': ('django.db.models.fields.BooleanField', [], {'default': 'False'}),
+            'honorific_prefix': ('django.db.models.fields.CharField', [], {'max_length': '300', 'blank': 'True'}),
+            'honorific_suffix': ('django.db.models.fields.CharField', [], {'max_length': '300', 'blank': 'True'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'legal_name': ('django.db.models.fields.CharField', [], {'max_length': '300'}),
+            'national_identity': ('django.db.models.fields.CharField', [], {'max_length': '100', 'blank': 'True'}),
+            'slug': ('django.db.models.fields.SlugField', [], {'unique': 'True', 'max_length': '200'}),
+            'sort_name': ('django.db.models.fields.CharField', [], {'max_length': '300', 'blank': 'True'}),
+            'summary': ('markitup.fields.MarkupField', [], {'default': "''", 'no_rendered_field': 'True', 'blank': 'True'}),
+            'title': ('django.db.models.fields.CharField', [], {'max_length': '100', 'blank': 'True'}),
+            'updated': ('django.db.models.fields.DateTimeField', [], {'auto_now': 'True', 'blank': 'True'})
+        },
+        u'south_africa.attendanceyear': {
+            'Meta': {'ordering': "['person', '-year']", 'unique_together': "(('person', 'year'),)", 'object_name': 'AttendanceYear'},
+            'attended': ('django.db.models.fields.PositiveIntegerField', [], {}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'person': ('django.db.models.fields.related.ForeignKey', [], {'related_name': "'attendance_years'", 'to': u"orm['core.Person']"}),
+            'total': ('django.db.models.fields.PositiveIntegerField', [], {}),
+            'year': ('django.db.models.fields.PositiveIntegerField', [], {})
+        },
+        u'south_africa.attendedmeeting': {
+            'Meta': {'ordering': "['person', 'order']", 'object_name': 'AttendedMeeting'},
+            'committee_name': ('django.db.models.fields.CharField', [], {'max_length': '300'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'order': ('django.db.models.fields.PositiveIntegerField', [], {}),
+            'person': ('django.db.models.fields.related.ForeignKey', [], {'related_name': "'attended_meetings'", 'to': u"orm['core.Person']"}),
+            'title': ('django.db.models.fields.TextField', [], {}),
+            'url': ('django.db.models.fields.URLField', [], {'max_length': '200'})
+        },
+        u'south_africa.questionanswer': {
+            'Meta': {'object_name': 'QuestionAnswer'},
+            'answer': ('django.db.models.fields.related.ForeignKey', [], {'related_name': "'+'", 'null': 'True', 'to': u"orm['speeches.Speech']"}),
+            'answer_date': ('django.db.models.fields.DateField', [], {'null': 'True'}),
+            'earliest_date': ('django.db.models.fields.DateField', [], {'null': 'True'}),
+            'first_speech_id': ('django.db.models.fields.PositiveIntegerField', [], {}),
+            'latest_date': ('django.db.models.fields.DateField', [], {'null': 'True'}),
+            'minister_slug': ('django.db.models.fields.CharField', [], {'max_length': '255', 'db_index': 'True'}),
+            'question': ('django.db.models.fields.related.ForeignKey', [], {'related_name': "'+'", 'to': u"orm['speeches.Speech']"}),
+            'questionto': ('django.db.models.fields.TextField', [], {'blank': 'True'}),
+            'reply_text': ('django.db.models.fields.TextField', [], {'blank': 'True'}),
+            'section': ('django.db.models.fields.related.OneToOneField', [], {'related_name': "'south_africa_question'", 'unique': 'True', 'primary_key': 'True', 'to': u"orm['speeches.Section']"}),
+            'section_title': ('django.db.models.fields.TextField', [], {'blank': 'True'}),
+            'speech_count': ('django.db.models.fields.PositiveIntegerField', [], {})
+        },
+        u'south_africa.sectionsummary': {
+            'Meta': {'object_name': 'SectionSummary', 'index_together': "[('top_section', 'depth')]"},
+            'depth': ('django.db.models.fields.PositiveIntegerField', [], {}),
+            'first_speech_id': ('django.db.models.fields.PositiveIntegerField', [], {}),
+            'latest_start_date': ('django.db.models.fields.DateField', [], {'null': 'True'}),
+            'parent': ('django.db.models.fields.related.ForeignKey', [], {'related_name': "'+'", 'null': 'True', 'to': u"orm['speeches.Section']"}),
+            'parent_title': ('django.db.models.fields.TextField', [], {'blank': 'True'}),
+            'section': ('django.db.models.fields.related.OneToOneField', [], {'related_name': "'south_africa_summary'", 'unique': 'True', 'primary_key': 'True', 'to': u"orm['speeches.Section']"}),
+            'speech_count': ('django.db.models.fields.PositiveIntegerField', [], {}),
+            'title': ('django.db.models.fields.TextField', [], {'blank': 'True'}),
+            'top_section': ('django.db.models.fields.related.ForeignKey', [], {'related_name': "'+'", 'to': u"orm['speeches.Section']"})
+        },
+        u'speeches.section': {
+            'Meta': {'object_name': 'Section'},
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'parent': ('django.db.models.fields.related.ForeignKey', [], {'blank': 'True', 'related_name': "'children'", 'null': 'True', 'to': u"orm['speeches.Section']"}),
+            'title': ('django.db.models.fields.TextField', [], {'blank': 'True'})
+        },
+        u'speeches.speech': {
+            'Meta': {'object_name': 'Speech'},
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'section': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['speeches.Section']", 'null': 'True', 'blank': 'True'}),
+            'start_date': ('django.db.models.fields.DateField', [], {'null': 'True', 'blank': 'True'}),
+            'text': ('django.db.models.fields.TextField', [], {'blank': 'True'})
+        }
+    }
+
+    complete_apps = ['south_africa']
@@ -1,11 +1,22 @@
-from pombola.core.models import Place, Position, Organisation
+from django.db import models, transaction
+from django.db.models import Count, Max, Min, Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from speeches.models import Section, Speech
+
+from pombola.core.models import Person, Place, Position, Organisation
 
 class ZAPlace(Place):
     class Meta:
         proxy = True
 
     def postal_addresses(self):
-        return self.organisation.contacts.filter(kind__slug='address')
+        # Filter in Python rather than with .filter() so that contacts
+        # loaded with prefetch_related('organisation__contacts__kind')
+        # are used, rather than doing a new query per place.
+        return [c for c in self.organisation.contacts.all()
+                if c.kind.slug == 'address']
 
     def related_positions(self):
         return Position.objects.filter(organisation=self.organisation)
@@ -23,4 +34,334 @@ class ZAPlace(Place):
                 org_rels_as_a__organisation_b=self.organisation,
                 kind__slug='party',
                 )
-            
+
+
+class AttendanceYear(models.Model):
+    """How many of the PMG-monitored committee meetings in a year a person attended
+
+    These are refreshed from the PMG API by the
+    south_africa_update_attendance management command."""
+
+    person = models.ForeignKey(Person, related_name='attendance_years')
+    year = models.PositiveIntegerField()
+    attended = models.PositiveIntegerField()
+    total = models.PositiveIntegerField()
+
+    class Meta:
+        ordering = ['person', '-year']
+        unique_together = ('person', 'year')
+
+    def __unicode__(self):
+        return u"%s attended %d of %d meetings in %d" % (
+            self.person, self.attended, self.total, self.year)
+
+
+class AttendedMeeting(models.Model):
+    """One of the most recent committee meetings a person was recorded at by PMG"""
+
+    person = models.ForeignKey(Person, related_name='attended_meetings')
+    # The order the meetings were returned in by the API, most recent first
+    order = models.PositiveIntegerField()
+    url = models.URLField()
+    title = models.TextField()
+    committee_name = models.CharField(max_length=300)
+
+    class Meta:
+        ordering = ['person', 'order']
+
+    def __unicode__(self):
+        return u"%s at %s" % (self.person, self.title)
+
+
+class SectionSummaryManager(models.Manager):
+
+    # The maximum number of sections to refresh in one go:
+    chunk_size = 500
+
+    def load_ancestry(self, section_ids):
+        """Return a dict mapping the IDs of sections and all their ancestors to (parent_id, title)
+
+        This takes one query per level of the tree, rather than one per
+        section."""
+
+        ancestry = {}
+        to_load = set(section_ids)
+        while to_load:
+            for section_id, parent_id, title in (
+                    Section.objects
+                    .filter(id__in=to_load)
+                    .values_list('id', 'parent_id', 'title')):
+                ancestry[section_id] = (parent_id, title)
+            to_load = set(
+                parent_id for parent_id, title in ancestry.values()
+                if parent_id is not None and parent_id not in ancestry)
+        return ancestry
+
+    def refresh(self, section_ids, update_ancestry=False):
+        """Bring the summaries of these sections up to date with their speeches
+
+        Sections that no longer contain any speeches have their summary
+        removed. The position of an already summarised section in the
+        tree is only looked up again if update_ancestry is set.
+
+        This is called when speeches are saved, so it runs in whatever
+        transaction they're being saved in."""
+
+        section_ids = list(set(section_ids))
+        for i in range(0, len(section_ids), self.chunk_size):
+            self.refresh_chunk(section_ids[i:i + self.chunk_size], update_ancestry)
+
+    def refresh_chunk(self, section_ids, update_ancestry):
+        stats = dict(
+            (row['section'], row) for row in
+            Speech.objects
+            .filter(section_id__in=section_ids)
+            .values('section')
+            .annotate(
+                latest_start_date=Max('start_date'),
+                first_speech_id=Min('id'),
+                speech_count=Count('id'),
+            )
+        )
+
+        self.filter(section_id__in=section_ids) \
+            .exclude(section_id__in=stats.keys()) \
+            .delete()
+
+        existing = set(
+            self.filter(section_id__in=stats.keys())
+            .values_list('section_id', flat=True))
+
+        if update_ancestry:
+            to_place = set(stats.keys())
+        else:
+            to_place = set(stats.keys()) - existing
+        ancestry = self.load_ancestry(to_place)
+
+        new_summaries = []
+        for section_id, row in stats.items():
+            values = {
+                'latest_start_date': row['latest_start_date'],
+                'first_speech_id': row['first_speech_id'],
+                'speech_count': row['speech_count'],
+            }
+            if section_id in to_place:
+                parent_id, title = ancestry[section_id]
+                top_section_id, depth = section_id, 0
+                while ancestry[top_section_id][0] is not None:
+                    top_section_id = ancestry[top_section_id][0]
+                    depth += 1
+                values.update({
+                    'title': title,
+                    'parent_id': parent_id,
+                    'parent_title': ancestry[parent_id][1] if parent_id else '',
+                    'top_section_id': top_section_id,
+                    'depth': depth,
+                })
+            if section_id in existing:
+                self.filter(section_id=section_id).update(**values)
+            else:
+                new_summaries.append(self.model(section_id=section_id, **values))
+
+        self.bulk_create(new_summaries)
+
+    @transaction.commit_on_success
+    def rebuild(self):
+        """Recreate the summaries of all the sections that contain speeches"""
+
+        self.all().delete()
+        section_ids = (
+            Speech.objects
+            .filter(section__isnull=False)
+            .values_list('section_id', flat=True)
+            .distinct()
+        )
+        self.refresh(section_ids)
+
+
+class SectionSummary(models.Model):
+    """The speeches directly in a SayIt section, summarised for the index pages
+
+    The Hansard and committee minutes index pages list sections a
+    fixed number of levels below their top-level section, grouped by
+    the title of their parent. Working that out from the speeches
+    table needs several aggregate queries joining the sections table
+    to itself, so instead the results are kept here. They're updated
+    whenever a speech or section is saved or deleted, and the
+    south_africa_rebuild_section_summaries command recreates them all."""
+
+    section = models.OneToOneField(Section, primary_key=True, related_name='south_africa_summary')
+    title = models.TextField(blank=True)
+    parent = models.ForeignKey(Section, null=True, related_name='+')
+    parent_title = models.TextField(blank=True)
+    top_section = models.ForeignKey(Section, related_name='+')
+    # The number of levels the section is below its top-level section:
+    depth = models.PositiveIntegerField()
+
+    latest_start_date = models.DateField(null=True)
+    first_speech_id = models.PositiveIntegerField()
+    speech_count = models.PositiveIntegerField()
+
+    objects = SectionSummaryManager()
+
+    class Meta:
+        index_together = [('top_section', 'depth')]
+
+    def __unicode__(self):
+        return u"%s (%d speeches)" % (self.title, self.speech_count)
+
+
+def clean_reply_text(text):
+    """Extract the actual reply from the text of an answer
+
+    Replies often include the original question and other text, such
+    as a letterhead, before the word 'REPLY'.
+
+    >>> clean_reply_text(u"MINISTRY OF FOO\\nQuestion 12\\nREPLY: It's fine.")
+    u" It's fine."
+    >>> clean_reply_text(u"It's fine.")
+    u"It's fine."
+    >>> clean_reply_text(u": It's fine.")
+    u": It's fine."
+    """
+
+    parts = text.split('REPLY')
+    if len(parts) > 1:
+        text = parts[-1]
+        if text.startswith(':'):
+            text = text[1:]
+    return text
+
+
+class QuestionAnswerManager(models.Manager):
+
+    # Questions are in sections under one per minister:
+    # "Questions" -> minister -> question -> [speeches]
+    questions_section_title = 'Questions'
+
+    def refresh(self, section_ids):
+        """Bring the question and answer for these sections up to date
+
+        This reads the section summaries, so those must be refreshed
+        first. The first speech in a question section is the question,
+        and if there's more than one, the last is assumed to be the
+        answer."""
+
+        section_ids = set(section_ids)
+        if not section_ids:
+            return
+
+        summaries = dict(
+            (summary.section_id, summary) for summary in
+            SectionSummary.objects
+            .filter(
+                section_id__in=section_ids,
+                section__parent__parent__title=self.questions_section_title,
+            )
+            .select_related('parent')
+        )
+
+        self.filter(section_id__in=section_ids).delete()
+
+        if not summaries:
+            return
+
+        speeches_by_section = {}
+        speeches = (
+            Speech.objects
+            .filter(section_id__in=summaries.keys())
+            .only('id', 'section', 'start_date', 'text')
+        )
+        for speech in speeches:
+            speeches_by_section.setdefault(speech.section_id, []).append(speech)
+
+        question_answers = []
+        for section_id, summary in summaries.items():
+            speeches = speeches_by_section[section_id]
+            question = speeches[0]
+            answer = speeches[-1] if len(speeches) > 1 else None
+            start_dates = [s.start_date for s in speeches if s.start_date is not None]
+            question_answers.append(self.model(
+                section_id=section_id,
+                section_title=summary.title,
+                minister_slug=summary.parent.slug,
+                questionto=summary.parent_title.replace('Questions asked to the ', ''),
+                question_id=question.id,
+                answer_id=answer and answer.id,
+                answer_date=answer and answer.start_date,
+                reply_text=clean_reply_text(answer.text) if answer else '',
+                earliest_date=min(start_dates) if start_dates else None,
+                latest_date=summary.latest_start_date,
+                first_speech_id=summary.first_speech_id,
+                speech_count=summary.speech_count,
+            ))
+
+        self.bulk_create(question_answers)
+
+    @transaction.commit_on_success
+    def rebuild(self):
+        """Recreate the question and answer for every question section"""
+
+        self.all().delete()
+        section_ids = list(
+            SectionSummary.objects
+            .filter(section__parent__parent__title=self.questions_section_title)
+            .values_list('section_id', flat=True)
+        )
+        chunk_size = SectionSummary.objects.chunk_size
+        for i in range(0, len(section_ids), chunk_size):
+            self.refresh(section_ids[i:i + chunk_size])
+
+
+class QuestionAnswer(models.Model):
+    """A question to a minister and the latest answer to it, for the questions index
+
+    This is worked out from the speeches in a question section when
+    they're imported, along with the text of the reply with any
+    letterhead and repeated question removed, so that the index page
+    only has to read this table."""
+
+    section = models.OneToOneField(Section, primary_key=True, related_name='south_africa_question')
+    section_title = models.TextField(blank=True)
+    # The slug of the section for the minister the question was asked to
+    minister_slug = models.CharField(max_length=255, db_index=True)
+    questionto = models.TextField(blank=True)
+
+    question = models.ForeignKey(Speech, related_name='+')
+    answer = models.ForeignKey(Speech, null=True, related_name='+')
+    answer_date = models.DateField(null=True)
+    reply_text = models.TextField(blank=True)
+
+    earliest_date = models.DateField(null=True)
+    latest_date = models.DateField(null=True)
+    first_speech_id = models.PositiveIntegerField()
+    speech_count = models.PositiveIntegerField()
+
+    objects = QuestionAnswerManager()
+
+    def __unicode__(self):
+        return self.section_title
+
+
+@receiver(post_save, sender=Speech)
+@receiver(post_delete, sender=Speech)
+def refresh_speech_section_summary(sender, instance, **kwargs):
+    if instance.section_id is not None:
+        SectionSummary.objects.refresh([instance.section_id])
+        QuestionAnswer.objects.refresh([instance.section_id])
+
+
+@receiver(post_save, sender=Section)
+def refresh_section_summaries(sender, instance, created, **kwargs):
+    # A new section can't contain any speeches yet
+    if created:
+        return
+    # The title or parent of the section may have changed, which
+    # affects its own summary and the parent_title of its children's.
+    section_ids = list(
+        SectionSummary.objects
+        .filter(Q(section=instance) | Q(parent=instance))
+        .values_list('section_id', flat=True)
+    )
+    SectionSummary.objects.refresh(section_ids, update_ancestry=True)
+    QuestionAnswer.objects.refresh(section_ids)
@@ -8,7 +8,7 @@ from tempfile import mkdtemp
 from urlparse import urlparse
 from BeautifulSoup import Tag, NavigableString
 
-from mock import patch
+from mock import Mock, patch
 
 from django.contrib.gis.geos import Polygon, Point
 from django.test import TestCase
@@ -18,7 +18,6 @@ from django.test.utils import override_settings
 # NOTE - from Django 1.7 this should be replaced with 
 # django.core.cache.caches
 # https://docs.djangoproject.com/en/1.8/topics/cache/#django.core.cache.caches
-from django.core.cache import get_cache
 
 from django.core.urlresolvers import reverse, resolve
 from django.core.management import call_command
@@ -35,7 +34,11 @@ from popit.models import Person as PopitPerson, ApiInstance
 from speeches.models import Speaker, Section, Speech
 from speeches.tests import create_sections
 from pombola import south_africa
-from pombola.south_africa.views import SAPersonDetail
+from pombola.south_africa.attendance import (
+    get_attendance_stats, get_attendance_stats_raw, store_attendance_data,
+    update_attendance)
+from pombola.south_africa.elections import ElectionSnapshot
+from pombola.south_africa.models import AttendanceYear, QuestionAnswer, SectionSummary
 from pombola.core.views import PersonSpeakerMappingsMixin
 from pombola.info.models import InfoPage
 from instances.models import Instance
@@ -190,6 +193,35 @@ class ConstituencyOfficesTestCase(TransactionWebTest):
         assert len(content_boxes[0].findAll('li')) == 2, 'Box 0 should contain two sections, each with a party office.'
         assert len(content_boxes[1].findAll('li')) == 1, 'Box 1 should contain one sections, as the other party office is outside the box.'
 
+    def test_latlon_json(self):
+        person = models.Person.objects.create(legal_name='Jane Contact', slug='jane-contact')
+        cc_title = models.PositionTitle.objects.create(
+            name='Constituency Contact', slug='constituency-contact')
+        models.Position.objects.create(
+            person=person,
+            title=cc_title,
+            organisation=models.Organisation.objects.get(slug='party1-office1'),
+            category='political',
+            )
+
+        response = self.app.get(
+            reverse('latlon-json', kwargs={'lat': '-29.1', 'lon': '17.1'}))
+        data = json.loads(response.content)
+
+        self.assertEqual(data['province']['name'], 'Test Province')
+        offices = data['nearest_offices']
+        office_names = [o['name'] for o in offices]
+        self.assertEqual(office_names[0], 'Party1: Office1')
+        self.assertNotIn('Party2: Office1', office_names)
+        self.assertAlmostEqual(offices[0]['distance_km'], 0)
+        self.assertEqual(
+            offices[0]['people'],
+            [{'name': 'Jane Contact',
+              'url': '/person/jane-contact/',
+              'positions': [{'title': 'Constituency Contact',
+                             'organisation': 'Party1: Office1'}]}])
+        self.assertEqual(offices[1]['people'], [])
+
     def tearDown(self):
         settings.MAPIT_AREA_SRID = self.old_srid
         settings.HAYSTACK_SIGNAL_PROCESSOR = self.old_HAYSTACK_SIGNAL_PROCESSOR
@@ -338,22 +370,6 @@ class SAPersonDetailViewTest(PersonSpeakerMappingsMixin, TestCase):
                          {'title': u"Committee Minutes"},
                          {'title': u"Questions"}])
 
-        moomin_finn = models.Person.objects.get(slug='moomin-finn')
-        # Give moomin-finn a fake ID for the PMG API
-        models.Identifier.objects.create(
-            scheme='za.org.pmg.api/member',
-            identifier=moomin_finn.slug,
-            content_object=moomin_finn,
-            )
-
-        # Put blank attendance data in the cache to stop us fetching from
-        # the live PMG API
-        pmg_api_cache = get_cache('pmg_api')
-        pmg_api_cache.set(
-            "http://api.pmg.org.za/member/moomin-finn/attendance/",
-            [],
-            )
-
     def test_person_to_speaker_resolution(self):
         person = models.Person.objects.get(slug='moomin-finn')
         speaker = self.pombola_person_to_sayit_speaker(person, '')
@@ -472,11 +488,8 @@ class SAPersonDetailViewTest(PersonSpeakerMappingsMixin, TestCase):
         with open(test_data_path) as f:
             raw_data = json.load(f)
 
-        pmg_api_cache = get_cache('pmg_api')
-        pmg_api_cache.set(
-            "http://api.pmg.org.za/member/moomin-finn/attendance/",
-            raw_data['results'],
-            )
+        moomin_finn = models.Person.objects.get(slug='moomin-finn')
+        store_attendance_data(moomin_finn, raw_data['results'])
 
         context = self.client.get(reverse('person', args=('moomin-finn',))).context
 
@@ -521,7 +534,7 @@ class SAAttendanceDataTest(TestCase):
              }
             ]
 
-        stats = SAPersonDetail().get_attendance_stats(raw_data)
+        stats = get_attendance_stats(raw_data)
         self.assertEqual(stats, expected)
 
         raw_data = {
@@ -542,7 +555,7 @@ class SAAttendanceDataTest(TestCase):
              }
         ]
 
-        stats = SAPersonDetail().get_attendance_stats(raw_data)
+        stats = get_attendance_stats(raw_data)
         self.assertEqual(stats, expected)
 
     def test_get_attendance_stats_raw(self):
@@ -553,12 +566,65 @@ class SAAttendanceDataTest(TestCase):
         with open(test_data_path) as f:
             raw_data = json.load(f)
 
-        raw_stats = SAPersonDetail().get_attendance_stats_raw(raw_data['results'])
+        raw_stats = get_attendance_stats_raw(raw_data['results'])
 
         expected = {2014: {u'A': 1, u'P': 14}, 2015: {u'A': 1, u'P': 25, u'AP': 2}}
 
         self.assertEqual(raw_stats, expected)
 
+    def test_update_attendance(self):
+        test_data_path = os.path.join(
+            os.path.dirname(os.path.realpath(__file__)),
+            'data/test/attendance_587.json',
+            )
+        with open(test_data_path) as f:
+            raw_data = f.read()
+
+        person = models.Person.objects.create(legal_name='Test MP', slug='test-mp')
+        # Some out of date data, which should be replaced:
+        AttendanceYear.objects.create(person=person, year=2013, attended=1, total=2)
+
+        responses = {
+            'https://api.pmg.org.za/member/?filter[pa_link]=http%3A//www.pa.org.za/person/test-mp/':
+                json.dumps({'count': 1, 'results': [{'id': 587}]}),
+            'http://api.pmg.org.za/member/587/attendance/': raw_data,
+            }
+
+        def fake_get(url, timeout=None):
+            response = Mock()
+            response.text = responses[url]
+            return response
+
+        with patch('pombola.south_africa.attendance.requests.get', side_effect=fake_get):
+            failed = update_attendance([person], threads=2)
+
+        self.assertEqual(failed, [])
+        self.assertEqual(person.get_identifier('za.org.pmg.api/member'), '587')
+        self.assertEqual(
+            list(person.attendance_years.values_list('year', 'attended', 'total')),
+            [(2015, 25, 28), (2014, 14, 15)],
+            )
+        self.assertEqual(person.attended_meetings.count(), 5)
+        self.assertEqual(
+            person.attended_meetings.all()[0].url,
+            'https://pmg.org.za/committee-meeting/21460/',
+            )
+
+    def test_update_attendance_failure_keeps_stored_data(self):
+        person = models.Person.objects.create(legal_name='Test MP', slug='test-mp')
+        models.Identifier.objects.create(
+            scheme='za.org.pmg.api/member',
+            identifier='587',
+            content_object=person,
+            )
+        AttendanceYear.objects.create(person=person, year=2013, attended=1, total=2)
+
+        with patch('pombola.south_africa.attendance.requests.get', side_effect=IOError):
+            failed = update_attendance([person])
+
+        self.assertEqual([p for p, error in failed], [person])
+        self.assertEqual(person.attendance_years.count(), 1)
+
 
 @attr(country='south_africa')
 class SAPersonProfileSubPageTest(TransactionWebTest):
@@ -627,24 +693,6 @@ class SAPersonProfileSubPageTest(TransactionWebTest):
             end_date='2014-04-01',
         )
 
-        # Make some identifiers for these people so we avoid
-        # looking them up with PMG, and put blank attendance data
-        # in the cache to stop us fetching from the live PMG API.
-        pmg_api_cache = get_cache('pmg_api')
-
-        for person in (self.deceased, self.former_mp):
-            models.Identifier.objects.create(
-                scheme='za.org.pmg.api/member',
-                identifier=person.slug,
-                content_object=person,
-                )
-
-            pmg_api_cache.set(
-                "http://api.pmg.org.za/member/{}/attendance/".format(person.slug),
-                [],
-                )
-
-
     def get_person_summary(self, soup):
         return soup.find('div', class_='person-summary')
 
@@ -895,6 +943,25 @@ class SAHansardIndexViewTest(TestCase):
         self.assertContains(response, '<a href="/%s">%s</a>' % (section.get_path, section_name), html=True)
         self.assertNotContains(response, "Empty section")
 
+    def test_section_summaries_follow_speeches(self):
+        section = Section.objects.get(title="Bill on Silly Walks")
+        summary = SectionSummary.objects.get(section=section)
+        self.assertEqual(summary.speech_count, 2)
+        self.assertEqual(summary.depth, 5)
+        self.assertEqual(summary.top_section.title, "Hansard")
+        self.assertEqual(summary.parent_title, "Proceedings of the National Assembly (2012/2/16)")
+        self.assertEqual(summary.latest_start_date, date(2013, 2, 16))
+
+        section.speech_set.all()[0].delete()
+        self.assertEqual(SectionSummary.objects.get(section=section).speech_count, 1)
+
+        section.speech_set.all().delete()
+        self.assertFalse(SectionSummary.objects.filter(section=section).exists())
+
+        response = self.client.get('/hansard/')
+        self.assertNotContains(response, "Bill on Silly Walks")
+        self.assertContains(response, "Proceedings of Foo")
+
 @attr(country='south_africa')
 class SACommitteeIndexViewTest(TransactionWebTest):
 
@@ -1001,6 +1068,144 @@ class SACommitteeIndexViewTest(TransactionWebTest):
         self.assertEqual(response.status_code, 200)
         self.assertIn('rhubarb rhubarb', response)
 
+@attr(country='south_africa')
+class SAQuestionIndexViewTest(TestCase):
+
+    def setUp(self):
+        create_sections([
+            {
+                'title': u"Questions",
+                'subsections': [
+                    {   'title': u"Questions asked to the Minister of Silly Walks",
+                        'subsections': [
+                            {   'title': u"Question 1 - Funny walks",
+                                'speeches': [ 2, date(2013, 2, 16), time(9, 0) ],
+                            },
+                            {   'title': u"Question 2 - Unanswered walks",
+                                'speeches': [ 1, date(2013, 2, 18), time(9, 0) ],
+                            },
+                        ],
+                    },
+                ],
+            },
+        ])
+
+    def test_question_answers_follow_speeches(self):
+        section = Section.objects.get(title=u"Question 1 - Funny walks")
+        question, answer = section.speech_set.all()
+
+        answer.text = u"MINISTRY OF SILLY WALKS\nREPLY: They are being developed."
+        answer.save()
+
+        question_answer = QuestionAnswer.objects.get(section=section)
+        self.assertEqual(question_answer.question, question)
+        self.assertEqual(question_answer.answer, answer)
+        self.assertEqual(question_answer.reply_text, u" They are being developed.")
+        self.assertEqual(question_answer.questionto, u"Minister of Silly Walks")
+        self.assertEqual(question_answer.speech_count, 2)
+
+        unanswered = QuestionAnswer.objects.get(
+            section__title=u"Question 2 - Unanswered walks")
+        self.assertIsNone(unanswered.answer)
+        self.assertEqual(unanswered.reply_text, u"")
+
+    def test_questions_section_need_not_be_top_level(self):
+        create_sections([
+            {
+                'title': u"Parliament",
+                'subsections': [
+                    {   'title': u"Questions",
+                        'subsections': [
+                            {   'title': u"Questions asked to the Minister of Cheese",
+                                'subsections': [
+                                    {   'title': u"Question 3 - Missing cheese",
+                                        'speeches': [ 1, date(2013, 2, 20), time(9, 0) ],
+                                    },
+                                ],
+                            },
+                        ],
+                    },
+                ],
+            },
+        ])
+
+        question_answer = QuestionAnswer.objects.get(
+            section__title=u"Question 3 - Missing cheese")
+        self.assertEqual(question_answer.questionto, u"Minister of Cheese")
+
+    def test_index_page(self):
+        response = self.client.get('/question/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [q.section_title for q in response.context['questions']],
+            [u"Question 2 - Unanswered walks", u"Question 1 - Funny walks"],
+            )
+
+        response = self.client.get('/question/?orderby=recentanswers')
+        self.assertEqual(
+            [q.section_title for q in response.context['questions']],
+            [u"Question 1 - Funny walks"],
+            )
+
+@attr(country='south_africa')
+class SAElectionSnapshotTest(TestCase):
+
+    def setUp(self):
+        party_kind = models.OrganisationKind.objects.create(name='Party', slug='party')
+        parliament_kind = models.OrganisationKind.objects.create(name='Parliament', slug='parliament')
+        list_kind = models.OrganisationKind.objects.create(name='Election List', slug='election-list')
+        member = models.PositionTitle.objects.create(name='Member', slug='member')
+        candidate = models.PositionTitle.objects.create(name='1st Candidate', slug='1st_candidate')
+
+        national_assembly = models.Organisation.objects.create(
+            name='National Assembly', slug='national-assembly', kind=parliament_kind)
+        self.party = models.Organisation.objects.create(
+            name='Test Party', slug='test-party', kind=party_kind)
+        self.other_party = models.Organisation.objects.create(
+            name='Other Party', slug='other-party', kind=party_kind)
+        party_list = models.Organisation.objects.create(
+            name='Test Party National Election List 2014',
+            slug='test-party-national-election-list-2014',
+            kind=list_kind)
+
+        self.rerunning = models.Person.objects.create(legal_name='Re Running', slug='re-running')
+        retiring = models.Person.objects.create(legal_name='Re Tiring', slug='re-tiring')
+
+        for person in (self.rerunning, retiring):
+            for organisation in (national_assembly, self.party):
+                models.Position.objects.create(
+                    person=person, organisation=organisation, title=member,
+                    start_date='2009-05-06', end_date='future')
+        models.Position.objects.create(
+            person=self.rerunning, organisation=self.other_party, title=member,
+            start_date='2005-01-01', end_date='2008-01-01')
+        models.Position.objects.create(
+            person=self.rerunning, organisation=party_list, title=candidate,
+            start_date='2014-04-22', end_date='future')
+
+    def test_current_mps(self):
+        snapshot = ElectionSnapshot('2014')
+
+        self.assertEqual(
+            snapshot.current_mps['all'],
+            {'current': 2, 'rerunning': 1, 'percent_rerunning': 50})
+        self.assertEqual(
+            snapshot.current_mps['byparty'],
+            [{'party': self.party, 'current': 2, 'rerunning': 1, 'percent_rerunning': 50}])
+        self.assertEqual(snapshot.running_party_list, [self.party])
+
+    def test_people_new_party(self):
+        snapshot = ElectionSnapshot('2014')
+
+        self.assertEqual(len(snapshot.people_new_party), 1)
+        switcher = snapshot.people_new_party[0]
+        self.assertEqual(switcher['person'], self.rerunning)
+        self.assertEqual(
+            [p.organisation for p in switcher['current_positions']], [self.party])
+        self.assertEqual(
+            [p.organisation for p in switcher['former_positions']], [self.other_party])
+
+
 @attr(country='south_africa')
 class SAOrganisationDetailViewTest(TransactionWebTest):
 
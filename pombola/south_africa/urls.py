@@ -5,7 +5,7 @@ from django.views.generic.base import RedirectView, TemplateView
 
 from pombola.south_africa import views
 from pombola.south_africa.views import (SAHomeView, LatLonDetailNationalView,
-    LatLonDetailLocalView, SAPlaceDetailSub, SAOrganisationDetailView,
+    LatLonDetailLocalView, LatLonDetailJSONView, SAPlaceDetailSub, SAOrganisationDetailView,
     SAPersonDetail, SASearchView, SANewsletterPage, SAPlaceDetailView,
     SASpeakerRedirectView, SAHansardIndex, SACommitteeIndex,
     SAPersonAppearanceView, SAQuestionIndex,
@@ -109,6 +109,9 @@ place_patterns.extend((
     url(r'^latlon/(?P<lat>[0-9\.-]+),(?P<lon>[0-9\.-]+)/$',
         LatLonDetailLocalView.as_view(),
         name='latlon'),
+    url(r'^latlon/(?P<lat>[0-9\.-]+),(?P<lon>[0-9\.-]+)/json/$',
+        LatLonDetailJSONView.as_view(),
+        name='latlon-json'),
     ))
 
 urlpatterns = patterns(
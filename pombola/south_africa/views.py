@@ -2,21 +2,15 @@ from __future__ import division
 
 from collections import defaultdict
 import datetime
-import dateutil
 import json
 import re
-import urllib
-from urlparse import urlsplit
 import warnings
 
-import requests
-
 from django.contrib.gis.geos import Point
 from django.contrib.gis.measure import D
-from django.http import Http404
-from django.db.models import Count, Min, Max
+from django.http import Http404, HttpResponse
+from django.db.models import Max
 from django.conf import settings
-from django.core.cache import get_cache
 from django.core.exceptions import ObjectDoesNotExist
 from django.shortcuts import redirect
 from django.core.urlresolvers import reverse
@@ -28,14 +22,14 @@ from django.db.models import Q
 from django.contrib.contenttypes.models import ContentType
 
 import mapit
-from haystack.query import RelatedSearchQuerySet, SearchQuerySet, SQ
+from haystack.query import SearchQuerySet, SQ
 from haystack.inputs import AutoQuery
 from haystack.forms import SearchForm
 
 from speeches.models import Section, Speech, Speaker, Tag
 from speeches.views import NamespaceMixin, SpeechView, SectionView
 
-from pombola.core import models
+from pombola.core import mapit_cache, models
 from pombola.core.views import (HomeView, BasePlaceDetailView, PlaceDetailView,
     PlaceDetailSub, OrganisationDetailView, PersonDetail, PlaceDetailView,
     OrganisationDetailSub, CommentArchiveMixin, PersonSpeakerMappingsMixin)
@@ -46,9 +40,12 @@ from pombola.info.views import InfoPageView
 from pombola.search.views import GeocoderView, SearchBaseView
 from pombola.slug_helpers.views import SlugRedirect
 
-from pombola.south_africa.models import ZAPlace
+from pombola.south_africa.attendance import get_stored_attendance
+from pombola.south_africa.elections import get_election_snapshot
+from pombola.south_africa.models import QuestionAnswer, SectionSummary, ZAPlace
 
 from pombola.interests_register.models import Release, Category, Entry, EntryLineItem
+from pombola.interests_register.tabulation import Table, line_items_by_entry
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django_date_extensions.fields import ApproximateDateField, ApproximateDate
 
@@ -128,11 +125,11 @@ class LatLonDetailBaseView(BasePlaceDetailView):
 
         self.location = Point(lon, lat)
 
-        areas = mapit.models.Area.objects.by_location(self.location)
+        area_ids = mapit_cache.area_ids_by_location(lat, lon)
 
         try:
             # FIXME - Handle getting more than one province.
-            province = models.Place.objects.get(mapit_area__in=areas, kind__slug='province')
+            province = models.Place.objects.get(mapit_area__in=area_ids, kind__slug='province')
         except models.Place.DoesNotExist:
             raise Http404
 
@@ -144,82 +141,124 @@ class LatLonDetailBaseView(BasePlaceDetailView):
 
         context['office_search_radius'] = self.constituency_office_search_radius
 
+        context['nearest_offices'] = self.get_nearest_offices()
+
+        context['form'] = LocationSearchForm()
+
+        context['politicians'] = (self.object
+            .all_related_current_politicians()
+            .filter(position__organisation__slug='national-assembly')
+        )
+
+        return context
+
+    def get_nearest_offices(self):
+        """Return the active constituency offices near the location
+
+        Each office has its constituency contacts, with their positions
+        relevant to the office, in office_people_entries, and the slug of
+        its party in party_slug_for_icon if there's a logo for it. These
+        are found with the same few queries however many offices there
+        are, as this page is hit a lot from the map."""
+
         ork_has_office, _ = models.OrganisationRelationshipKind.objects.get_or_create(
             name='has_office')
 
-        context['nearest_offices'] = nearest_offices = (
+        nearest_offices = (
             ZAPlace.objects
             .filter(kind__slug__in=CONSTITUENCY_OFFICE_PLACE_KIND_SLUGS)
             .distance(self.location)
             .filter(location__distance_lte=(self.location, D(km=self.constituency_office_search_radius)))
             .order_by('distance')
+            .select_related('organisation')
+            .prefetch_related('organisation__contacts__kind')
             )
 
         #exclude non-active offices
         #FIXME - this can probably be better implemented by a
         #organisation_currently_active() filter for places
-        for office in nearest_offices:
-            if not office.organisation.is_ongoing():
-                context['nearest_offices'] = nearest_offices = nearest_offices.exclude(id=office.id)
+        nearest_offices = [
+            office for office in nearest_offices
+            if office.organisation.is_ongoing()
+        ]
+        if not nearest_offices:
+            return nearest_offices
 
-        # FIXME - There must be a cleaner way/place to do this.
-        for office in nearest_offices:
-            try:
-                cc_positions = office \
-                    .organisation \
-                    .position_set \
-                    .filter(
-                        person__position__title__slug='constituency-contact',
-                    ) \
-                    .currently_active()
-
-                constituency_contacts = models.Person.objects.filter(position__in=cc_positions)
-                office_people_entries = []
-
-                for constituency_contact in constituency_contacts:
-
-                    # Find positions for this person that are relevant to the office.
-                    positions = constituency_contact.position_set \
-                        .filter(
-                            organisation__slug__in = [
-                                "national-assembly",
-                                office.organisation.slug,
-                            ]
-                        ) \
-                        .currently_active()
-
-                    office_people_entries.append({
-                        'person': constituency_contact,
-                        'positions': positions
-                    })
-
-                if len(office_people_entries):
-                    office.office_people_entries = office_people_entries
-
-            except models.Person.DoesNotExist:
-                warnings.warn("{0} has no MPs".format(office.organisation))
+        organisation_ids = [office.organisation_id for office in nearest_offices]
 
-            #determine the party slug for the logo
-            try:
-                organisation_relationship = models.OrganisationRelationship.objects.get(
-                    organisation_b=office.organisation,
-                    kind=ork_has_office
-                )
-                party_slug = organisation_relationship.organisation_a.slug
-                if party_slug in self.party_slugs_that_have_logos:
-                    office.party_slug_for_icon = party_slug
+        contact_ids_by_organisation = defaultdict(set)
+        cc_positions = (
+            models.Position.objects
+            .filter(
+                organisation__in=organisation_ids,
+                person__position__title__slug='constituency-contact',
+            )
+            .currently_active()
+            .values_list('organisation_id', 'person_id')
+            )
+        for organisation_id, person_id in cc_positions:
+            contact_ids_by_organisation[organisation_id].add(person_id)
 
-            except ObjectDoesNotExist:
-                warnings.warn("{0} has no related party".format(office.organisation))
+        contact_ids = set()
+        for person_ids in contact_ids_by_organisation.values():
+            contact_ids.update(person_ids)
 
-        context['form'] = LocationSearchForm()
+        constituency_contacts = list(
+            models.Person.objects
+            .filter(id__in=contact_ids)
+            .select_related('cached_primary_image')
+            .prefetch_related('alternative_names')
+            )
 
-        context['politicians'] = (self.object
-            .all_related_current_politicians()
-            .filter(position__organisation__slug='national-assembly')
-        )
+        # Find positions for these people that are relevant to any of
+        # the offices, to be divided up between the offices below.
+        positions_by_person = defaultdict(list)
+        relevant_positions = (
+            models.Position.objects
+            .filter(
+                person__in=contact_ids,
+                organisation__slug__in=["national-assembly"] + [
+                    office.organisation.slug for office in nearest_offices
+                ],
+            )
+            .currently_active()
+            .select_related('title', 'organisation')
+            )
+        for position in relevant_positions:
+            positions_by_person[position.person_id].append(position)
 
-        return context
+        party_slugs = dict(
+            models.OrganisationRelationship.objects
+            .filter(organisation_b__in=organisation_ids, kind=ork_has_office)
+            .values_list('organisation_b_id', 'organisation_a__slug')
+            )
+
+        for office in nearest_offices:
+            organisation_slugs = ("national-assembly", office.organisation.slug)
+
+            office_people_entries = [
+                {
+                    'person': constituency_contact,
+                    'positions': [
+                        position for position in positions_by_person[constituency_contact.id]
+                        if position.organisation.slug in organisation_slugs
+                    ],
+                }
+                for constituency_contact in constituency_contacts
+                if constituency_contact.id in contact_ids_by_organisation[office.organisation_id]
+            ]
+
+            if len(office_people_entries):
+                office.office_people_entries = office_people_entries
+
+            #determine the party slug for the logo
+            party_slug = party_slugs.get(office.organisation_id)
+            if party_slug is None:
+                warnings.warn("{0} has no related party".format(office.organisation))
+            elif party_slug in self.party_slugs_that_have_logos:
+                office.party_slug_for_icon = party_slug
+
+        return nearest_offices
 
 
 class LatLonDetailNationalView(LatLonDetailBaseView):
@@ -230,6 +269,54 @@ class LatLonDetailLocalView(LatLonDetailBaseView):
     template_name = 'south_africa/latlon_local_view.html'
 
 
+class LatLonDetailJSONView(LatLonDetailBaseView):
+    """The constituency offices near a location as JSON, for the map"""
+
+    def get_context_data(self, **kwargs):
+        return {
+            'province': {
+                'name': self.object.name,
+                'url': self.object.get_absolute_url(),
+            },
+            'office_search_radius': self.constituency_office_search_radius,
+            'nearest_offices': [
+                self.office_as_dict(office) for office in self.get_nearest_offices()
+            ],
+        }
+
+    def office_as_dict(self, office):
+        return {
+            'id': office.id,
+            'name': office.organisation.name,
+            'url': office.organisation.get_absolute_url(),
+            'distance_km': office.distance.km,
+            'lat': office.location.y,
+            'lng': office.location.x,
+            'party_slug_for_icon': getattr(office, 'party_slug_for_icon', None),
+            'postal_addresses': [a.value for a in office.postal_addresses()],
+            'people': [
+                {
+                    'name': entry['person'].name,
+                    'url': entry['person'].get_absolute_url(),
+                    'positions': [
+                        {
+                            'title': position.title and position.title.name,
+                            'organisation': position.organisation.name,
+                        }
+                        for position in entry['positions']
+                    ],
+                }
+                for entry in getattr(office, 'office_people_entries', [])
+            ],
+        }
+
+    def render_to_response(self, context, **response_kwargs):
+        return HttpResponse(
+            json.dumps(context),
+            content_type='application/json',
+        )
+
+
 
 class SAPlaceDetailView(PlaceDetailView):
 
@@ -402,28 +489,29 @@ class SAOrganisationDetailSubParty(SAOrganisationDetailSub):
         # of the organisation and that membership overlapped with
         # their membership of the party, and mark whether that
         # time includes the current date.
-        current_date = str(datetime.date.today())
-        params = [current_date, current_date, current_date, current_date,
+        current_date = datetime.date.today()
+        params = [current_date, current_date,
             self.object.id, context['party'].id]
-        # n.b. "hp" = "house position", "pp" = "party position"
+        # n.b. "hp" = "house position", "pp" = "party position"; the
+        # date ranges are compared so that the GiST index on them can
+        # be used.
         all_positions = models.raw_query_with_prefetch(
             models.Position,
             '''
 SELECT
     hp.*,
-    (hp.sorting_start_date <= %s AND
-     hp.sorting_end_date_high >= %s AND
-     pp.sorting_start_date <= %s AND
-     pp.sorting_end_date_high >= %s) AS current
+    ({hp_range} @> %s::date AND
+     {pp_range} @> %s::date) AS current
 FROM core_position hp, core_position pp
   WHERE hp.person_id = pp.person_id
     AND hp.organisation_id = %s
     AND pp.organisation_id = %s
-    AND hp.sorting_start_date <= pp.sorting_end_date_high
-    AND pp.sorting_start_date <= hp.sorting_end_date_high
-''',
+    AND {hp_range} && {pp_range}
+'''.format(
+                hp_range=models.POSITION_DATE_RANGE_SQL.format('hp'),
+                pp_range=models.POSITION_DATE_RANGE_SQL.format('pp')),
             params,
-            (('person', ('alternative_names', 'images')),
+            (('person', ('alternative_names', 'cached_primary_image')),
              ('place', ()),
              ('organisation', ()),
              ('title', ())))
@@ -507,7 +595,9 @@ class SAPersonDetail(PersonSpeakerMappingsMixin, PersonDetail):
 
 
     def get_tabulated_interests(self):
-        interests = self.object.interests_register_entries.all()
+        interests = self.object.interests_register_entries \
+            .select_related('release', 'category') \
+            .prefetch_related('line_items')
         tabulated = {}
 
         for entry in interests:
@@ -585,141 +675,6 @@ class SAPersonDetail(PersonSpeakerMappingsMixin, PersonDetail):
             .order_by('-end_date','-start_date')
         )
 
-    def store_or_get_pmg_member_id(self, scheme='za.org.pmg.api/member'):
-        identifier = self.object.get_identifier(scheme)
-
-        if not identifier:
-            # First find the id of the person
-            pa_link = urllib.quote(
-                "http://www.pa.org.za/person/{}/".format(self.object.slug))
-
-            url_fmt = "https://api.pmg.org.za/member/?filter[pa_link]={}"
-            api_search_url = url_fmt.format(pa_link)
-            search_resp = requests.get(api_search_url)
-            search_data = json.loads(search_resp.text)
-
-            if not search_data.get('count'):
-                return None
-
-            if search_data['count'] > 1:
-                raise Exception('Duplicate members at PMG with slug {}'.format(self.object.slug))
-
-            identifier = search_data['results'][0]['id']
-
-            models.Identifier.objects.create(
-                scheme=scheme,
-                identifier=identifier,
-                content_object=self.object,
-                )
-
-        return identifier
-
-    def get_attendance_data_url(self, attendance_url_template="http://api.pmg.org.za/member/{}/attendance/"):
-        identifier = self.store_or_get_pmg_member_id()
-
-        if identifier:
-            return attendance_url_template.format(identifier)
-
-    def download_attendance_data(self):
-        attendance_url = next_url = self.get_attendance_data_url()
-
-        cache = get_cache('pmg_api')
-        results = cache.get(attendance_url)
-
-        if results is None:
-            results = []
-            while next_url:
-                resp = requests.get(next_url)
-                data = json.loads(resp.text)
-                results.extend(data.get('results'))
-
-                next_url = data.get('next')
-
-            cache.set(attendance_url, results)
-
-        # Results are returned from the API most recent first, which
-        # is convenient for us.
-        return results
-
-    def get_attendance_stats_raw(self, data):
-        if not data:
-            return {}
-
-        attendance_by_year = {}
-
-        for x in data:
-            attendance = x['attendance']
-            year = dateutil.parser.parse(x['meeting']['date']).year
-
-            year_dict = attendance_by_year.setdefault(year, {})
-
-            year_dict.setdefault(attendance, 0)
-            year_dict[attendance] += 1
-
-        return attendance_by_year
-
-    def get_latest_meeting_urls(self, data):
-        api_url_re = r'/committee-meeting/(\d+)/'
-        meeting_url_template = 'https://pmg.org.za/committee-meeting/{}/'
-
-        meetings = [x['meeting'] for x in data[:5]]
-
-        results = []
-
-        for meeting in meetings:
-            api_url = meeting['url']
-            path = urlsplit(api_url).path
-            meeting_id = re.match(api_url_re, path).group(1)
-
-            results.append(
-                {'url': meeting_url_template.format(meeting_id),
-                 'title': meeting['title'],
-                 'committee_name': meeting['committee']['name'],
-                 }
-                )
-
-        return results
-
-    # Meanings of attendance field
-
-    #  A:   Absent
-    #  AP:  Absent with Apologies
-    #  DE:  Departed Early
-    #  L:   Arrived Late
-    #  LDE: Arrived Late and Departed Early
-    #  P:   Present
-
-    def get_attendance_stats(self, attendance_by_year):
-        present_values = set(('P', 'DE', 'L', 'LDE'))
-
-        sorted_keys = sorted(attendance_by_year.keys(), reverse=True)
-
-        return_data = []
-        # year, attended, total, percentage
-        for year in sorted_keys:
-            year_dict = attendance_by_year[year]
-
-            attendance = sum((year_dict[x] for x in year_dict if x in present_values))
-            meeting_count = sum((year_dict[x] for x in year_dict))
-            percentage = 100 * attendance / meeting_count
-            return_data.append(
-                {'year': year,
-                 'attended': attendance,
-                 'total': meeting_count,
-                 'percentage': percentage,
-                 }
-                )
-
-        return return_data
-
-    def get_attendance_data_for_display(self):
-        raw_data = self.download_attendance_data()
-        attendance_by_year = self.get_attendance_stats_raw(raw_data)
-        attendance_stats = self.get_attendance_stats(attendance_by_year)
-        meeting_urls = self.get_latest_meeting_urls(raw_data)
-
-        return attendance_stats, meeting_urls
-
     def get_context_data(self, **kwargs):
         context = super(SAPersonDetail, self).get_context_data(**kwargs)
         context['twitter_contacts'] = self.list_contacts(('twitter',))
@@ -746,7 +701,9 @@ class SAPersonDetail(PersonSpeakerMappingsMixin, PersonDetail):
         if self.object.date_of_death != None:
             context['former_parties'] = self.get_former_parties(self.object)
 
-        context['attendance'], context['latest_meetings_attended'] = self.get_attendance_data_for_display()
+        # This is kept up to date by the south_africa_update_attendance command
+        context['attendance'], context['latest_meetings_attended'] = \
+            get_stored_attendance(self.object)
 
         return context
 
@@ -808,7 +765,8 @@ class SASpeechesIndex(NamespaceMixin, TemplateView):
     template_name = 'south_africa/hansard_index.html'
     top_section_name='Hansard'
     sections_to_show = 25
-    section_parent_field = 'parent__parent__parent__parent'
+    # The number of levels below the top section of the sections listed
+    debate_section_depth = 5
 
     def get_context_data(self, **kwargs):
         context = super(SASpeechesIndex, self).get_context_data(**kwargs)
@@ -820,30 +778,23 @@ class SASpeechesIndex(NamespaceMixin, TemplateView):
 
         # As we know that the hansard section structure is
         # "Hansard" -> yyyy -> mm -> dd -> section -> subsection -> [speeches]
-        # we can create very specific queries to fetch the sections
-        # then the subsections containing the speeches themselves.
-        #
-        # The parent_sections form the headings which are expanded by javascript
-        # to reveal the debate_sections
+        # we can fetch the subsections containing the speeches at a
+        # known depth below the top section. These are summarised in
+        # the SectionSummary table, which includes the number of
+        # speeches and the latest speech date, so that the speeches
+        # table doesn't need to be aggregated here.
         #
-        # FIXME ideally we'd have start_date for sections rather than
-        # having to get MAX('start_date') from the speeches table
-
-        # exclude sections without subsections and
-        # with subsections that have no speeches
-        section_filter = {
-            self.section_parent_field : top_section,
-            'children__speech__id__isnull' : False,
-            'children__id__isnull' : False
-        }
+        # The titles of the parent sections form the headings which
+        # are expanded by javascript to reveal the debate sections.
+        summaries = SectionSummary.objects.filter(
+            top_section=top_section,
+            depth=self.debate_section_depth,
+        )
 
-        # get a list of all the section titles
-        all_parent_section_titles = Section \
-              .objects \
-              .filter(**section_filter) \
-              .values('title') \
-              .distinct() \
-              .annotate(latest_start_date=Max('children__speech__start_date')) \
+        # get a list of all the parent section titles
+        all_parent_section_titles = summaries \
+              .values('parent_title') \
+              .annotate(latest_start_date=Max('latest_start_date')) \
               .order_by('-latest_start_date')
 
         # use Paginator to cut this down to the sections for the current page
@@ -855,25 +806,14 @@ class SASpeechesIndex(NamespaceMixin, TemplateView):
         except EmptyPage:
             parent_section_titles = paginator.page(paginator.num_pages)
 
-        # get the sections for the current page in date order
-        titles = list(section['title'] for section in parent_section_titles)
-        section_filter['title__in'] = titles
-        parent_sections = Section \
-              .objects \
-              .values('id', 'title') \
-              .filter(**section_filter) \
-              .annotate(latest_start_date=Max('children__speech__start_date')) \
-              .order_by('-latest_start_date', 'title')
-
-        # get the subsections based on the relevant section ids
-        # exclude those with blank titles as we have no way of linking to them
-        parent_ids = list(section['id'] for section in parent_sections)
-        debate_sections = Section \
-            .objects \
-            .filter(parent_id__in=parent_ids, speech__id__isnull=False) \
-            .annotate(start_order=Min('speech__id'), start_date=Max('speech__start_date'), speech_count=Count('speech__id')) \
+        # get the debate sections under those titles, excluding those
+        # with blank titles as we have no way of linking to them
+        titles = list(section['parent_title'] for section in parent_section_titles)
+        debate_sections = summaries \
+            .filter(parent_title__in=titles) \
             .exclude(title='') \
-            .order_by('-start_date', 'parent__title', 'start_order')
+            .select_related('section') \
+            .order_by('-latest_start_date', 'parent_title', 'first_speech_id')
 
         context['entries'] = debate_sections
         context['page_obj'] = parent_section_titles
@@ -882,13 +822,13 @@ class SASpeechesIndex(NamespaceMixin, TemplateView):
 class SAHansardIndex(SASpeechesIndex):
     template_name = 'south_africa/hansard_index.html'
     top_section_name='Hansard'
-    section_parent_field = 'parent__parent__parent__parent'
+    debate_section_depth = 5
     sections_to_show = 15
 
 class SACommitteeIndex(SASpeechesIndex):
     template_name = 'south_africa/hansard_index.html'
     top_section_name='Committee Minutes'
-    section_parent_field = 'parent__parent'
+    debate_section_depth = 3
     sections_to_show = 25
 
 def questions_section_sort_key(section):
@@ -959,99 +899,54 @@ class SAQuestionIndex(TemplateView):
         if not context['orderby'] in ['recentquestions', 'recentanswers']:
             context['orderby'] = 'recentquestions'
 
-        search_result_sections = []
+        questions = QuestionAnswer.objects.select_related(
+            'section', 'question__speaker')
+
+        if context['minister'] != 'all':
+            questions = questions.filter(minister_slug=context['minister'])
 
         if context['q'] != '':
-            #using a RelatedSearchQuerySet seems to result in fewer
-            #queries, although the same results can be achieved with a
-            #SearchQuerySet
-            query = RelatedSearchQuerySet().models(Speech)
-            query = query.filter(
+            # Only the IDs of the matching speeches are needed, so
+            # they're not loaded from the database
+            query = SearchQuerySet().models(Speech).filter(
                 tags__name__in = ['question', 'answer'],
                 content=AutoQuery(context['q']),
-                ).load_all()
-
-            all_speeches = Speech.objects.all().filter(
-                tags__name__in = ['question', 'answer'])
-
-            if context['minister'] != 'all':
-                all_speeches = all_speeches.filter(
-                    section__parent__slug=context['minister']
-                    )
-
-            query = query.load_all_queryset(Speech, all_speeches)
-
-            for result in query:
-                search_result_sections.append(result.object.section.id)
-
-        sections = Section \
-            .objects \
-            .filter(
-                parent__parent__title='Questions'
-            ) \
-            .select_related('parent__name') \
-            .prefetch_related('speech_set') \
-            .annotate(
-                earliest_date=Min('speech__start_date'),
-                smallest_id=Min('speech__id'),
-                number_speeches=Count('speech'),
-                latest_date=Max('speech__start_date'),
-            )
+                )
+            speech_ids = [result.pk for result in query]
 
-        if context['minister'] != 'all':
-            sections = sections.filter(parent__slug=context['minister'])
+            search_result_sections = list(
+                Speech.objects
+                .filter(id__in=speech_ids)
+                .values_list('section_id', flat=True)
+                .distinct()
+                )
 
-        if len(search_result_sections)>0:
-            sections = sections.filter(id__in=search_result_sections)
+            if len(search_result_sections)>0:
+                questions = questions.filter(section_id__in=search_result_sections)
 
         if context['orderby'] == 'recentanswers':
-            sections = sections.filter(number_speeches__gt=1).order_by(
+            questions = questions.filter(speech_count__gt=1).order_by(
                 '-latest_date',
-                '-smallest_id'
+                '-first_speech_id'
             )
         else:
-            sections = sections.order_by(
+            questions = questions.order_by(
                 '-earliest_date',
-                '-smallest_id'
+                '-first_speech_id'
             )
 
-        paginator = Paginator(sections, 10)
+        paginator = Paginator(questions, 10)
         page = self.request.GET.get('page')
 
         try:
-            sections = paginator.page(page)
+            questions = paginator.page(page)
         except PageNotAnInteger:
-            sections = paginator.page(1)
+            questions = paginator.page(1)
         except EmptyPage:
-            sections = paginator.page(paginator.num_pages)
-
-        context['paginator'] = sections
-
-        #format questions and answers for the template
-        questions = []
-        for section in sections:
-            question = section.speech_set.all()[0]
-            question.questionto = section.parent.title.replace('Questions asked to the ','')
-            question.questionto_slug = section.parent.slug
+            questions = paginator.page(paginator.num_pages)
 
-            #assume if there is more than one speech that the question is answered
-            if len(section.speech_set.all())>1:
-                question.answer = section \
-                    .speech_set \
-                    .all()[len(section.speech_set.all())-1]
-
-                #extract the actual reply from the reply text (replies
-                #often include the original question and other text,
-                #such as a letterhead)
-                text = question.answer.text.split('REPLY')
-                if len(text)>1:
-                    question.answer.text = text[len(text)-1]
-                    if question.answer.text[0]==':':
-                        question.answer.text = question.answer.text[1:]
-
-            questions.append(question)
-
-        context['speeches'] = questions
+        context['paginator'] = questions
+        context['questions'] = questions
 
         return context
 
@@ -1204,44 +1099,19 @@ class SAElectionOverviewMixin(TemplateView):
     def get_context_data(self, **kwargs):
         context = super(SAElectionOverviewMixin, self).get_context_data(**kwargs)
 
-        # XXX Does this need to only be parties standing in the election?
-        party_kind = models.OrganisationKind.objects.get(slug='party')
-        context['party_list'] = models.Organisation.objects.filter(
-            kind=party_kind).order_by('name')
-
-        province_kind = models.PlaceKind.objects.get(slug='province')
-        context['province_list'] = models.Place.objects.filter(
-            kind=province_kind).order_by('name')
-
         election_year = self.kwargs['election_year']
-
-        # All lists of candidates share this kind
-        election_list = models.OrganisationKind.objects.get(slug='election-list')
-
         context['election_year'] = election_year
 
-        # Build the right election list names
-        election_list_suffix = '-national-election-list-' + election_year
-
-        # All the running parties live in this list
-        running_parties = []
+        # The lists of parties and provinces are the same for all the
+        # election pages, so are shared through the cache
+        self.snapshot = get_election_snapshot(election_year)
 
-        # Find the slugs of all parties taking part in the national election
-        national_running_party_lists = models.Organisation.objects.filter(
-            kind=election_list,
-            slug__endswith=election_list_suffix
-        ).order_by('name')
-
-        # Loop through national sets and extract slugs
-        for l in national_running_party_lists:
-            party_slug = l.slug.replace(election_list_suffix, '')
-            if not party_slug in running_parties:
-                running_parties.append(party_slug)
+        # XXX Does this need to only be parties standing in the election?
+        context['party_list'] = self.snapshot.party_list
+        context['province_list'] = self.snapshot.province_list
 
-        # I am so sorry for this.
-        context['running_party_list'] = []
-        for running_party in running_parties:
-            context['running_party_list'].append(models.Organisation.objects.get(slug=running_party))
+        # The parties taking part in the national election
+        context['running_party_list'] = self.snapshot.running_party_list
 
         return context
 
@@ -1255,36 +1125,11 @@ class SAElectionStatisticsView(SAElectionOverviewMixin):
     def get_context_data(self, **kwargs):
         context = super(SAElectionStatisticsView, self).get_context_data(**kwargs)
 
-        context['current_mps'] = {'all': {}, 'byparty': []}
-
-        context['current_mps']['all']['current'] = models.Organisation.objects.get(slug='national-assembly').position_set.all().currently_active().distinct('person__id').count()
-        context['current_mps']['all']['rerunning'] = models.Organisation.objects.get(slug='national-assembly').position_set.all().currently_active().filter(Q(person__position__organisation__slug__contains='national-election-list-2014') | (Q(person__position__organisation__slug__contains='election-list-2014') & Q(person__position__organisation__slug__contains='regional'))).distinct('person__id').count()
-        context['current_mps']['all']['percent_rerunning'] = 100 * context['current_mps']['all']['rerunning'] / context['current_mps']['all']['current']
-
-        #find the number of current MPs running for office per party
-        for p in context['party_list']:
-            party = models.Organisation.objects.get(slug=p.slug)
-            current = models.Organisation.objects.get(slug='national-assembly').position_set.all().currently_active().filter(person__position__organisation__slug=p.slug).distinct('person__id').count()
-            rerunning = models.Organisation.objects.get(slug='national-assembly').position_set.all().currently_active().filter(person__position__organisation__slug=p.slug).filter(Q(person__position__organisation__slug__contains='national-election-list-2014') | (Q(person__position__organisation__slug__contains='election-list-2014') & Q(person__position__organisation__slug__contains='regional'))).distinct('person__id').count()
-            if current:
-                percent = 100 * rerunning / current
-                context['current_mps']['byparty'].append({'party': party, 'current': current, 'rerunning': rerunning, 'percent_rerunning': percent})
-
-
-        #find individuals who appear to have switched party
-        context['people_new_party'] = []
-        people = models.Person.objects.filter(position__organisation__kind__slug='party', position__title__slug='member').annotate(num_parties=Count('position')).filter(num_parties__gt=1)
-
-        for person in people:
-            #check whether the person is a candidate - there is probably be a cleaner way to do this in the initial query
-            person_list = person.position_set.all().filter(organisation__slug__contains='election-list-2014')
-            if person_list:
-                context['people_new_party'].append({
-                    'person': person,
-                    'current_positions': person.position_set.all().filter(organisation__kind__slug='party').currently_active(),
-                    'former_positions': person.position_set.all().filter(organisation__kind__slug='party').currently_inactive(),
-                    'person_list': person_list
-                })
+        # the number of current MPs running for office, overall and per party
+        context['current_mps'] = self.snapshot.current_mps
+
+        # individuals who appear to have switched party
+        context['people_new_party'] = self.snapshot.people_new_party
 
         return context
 
@@ -1527,7 +1372,10 @@ class SAMembersInterestsIndex(TemplateView):
         when = datetime.date.today()
         now_approx = repr(ApproximateDate(year=when.year, month=when.month, day=when.day))
 
-        people = Entry.objects.order_by(
+        people = Entry.objects.select_related(
+            'person',
+            'release'
+        ).order_by(
             'person__legal_name',
             'release__date'
         ).distinct(
@@ -1562,49 +1410,42 @@ class SAMembersInterestsIndex(TemplateView):
 
         context['paginator'] = people_paginated
 
-        #tabulate the data
-        data = []
-        for entry_person in people_paginated:
-            person = entry_person.person
-            year = entry_person.release.date.year
-            person_data = []
-            person_categories = person.interests_register_entries.filter(
-                release=entry_person.release
-            ).order_by(
-                'category__id'
-            ).distinct(
-                'category__id'
-            )
-
-            for cat in person_categories:
-                entries = person.interests_register_entries.filter(
-                    category=cat.category,
-                    release=entry_person.release)
-
-                headers = []
-                headers_index = {}
-                cat_data = []
-                for entry in entries:
-                    row = ['']*len(headers)
-
-                    for entrylineitem in entry.line_items.all():
-                        if entrylineitem.key not in headers:
-                            headers_index[entrylineitem.key] = len(headers)
-                            headers.append(entrylineitem.key)
-                            row.append('')
-
-                        row[headers_index[entrylineitem.key]] = entrylineitem.value
+        #tabulate the data, fetching the entries and line items for
+        #everyone on the page at once
+        pairs = set((e.person_id, e.release_id) for e in people_paginated)
+        entries = Entry.objects.filter(
+            person__in=set(p for p, r in pairs),
+            release__in=set(r for p, r in pairs),
+        ).select_related(
+            'category'
+        ).order_by(
+            'person',
+            'release',
+            'category__id',
+            'sort_order',
+            'id'
+        )
+        entries = [e for e in entries if (e.person_id, e.release_id) in pairs]
+        line_items = line_items_by_entry(e.id for e in entries)
 
-                    cat_data.append(row)
+        tables = defaultdict(list)
+        for entry in entries:
+            categories = tables[(entry.person_id, entry.release_id)]
+            if not categories or categories[-1][0] != entry.category:
+                categories.append((entry.category, Table()))
+            categories[-1][1].add_row(line_items[entry.id])
 
-                person_data.append({
-                    'category': cat.category,
-                    'headers': headers,
-                    'data': cat_data})
+        data = []
+        for entry_person in people_paginated:
             data.append({
-                'person': person,
-                'data': person_data,
-                'year': year})
+                'person': entry_person.person,
+                'data': [
+                    {'category': category,
+                     'headers': table.headers,
+                     'data': table.data}
+                    for category, table
+                    in tables[(entry_person.person_id, entry_person.release_id)]],
+                'year': entry_person.release.date.year})
 
         context['data'] = data
 
@@ -1618,8 +1459,9 @@ class SAMembersInterestsIndex(TemplateView):
         now_approx = repr(ApproximateDate(year=when.year, month=when.month, day=when.day))
 
         entries = Entry.objects.select_related(
-            'person__name',
-            'category'
+            'person',
+            'category',
+            'release'
         ).all().filter(
             category__id=context['category_id']
         ).order_by(
@@ -1652,24 +1494,15 @@ class SAMembersInterestsIndex(TemplateView):
         except EmptyPage:
             entries_paginated = paginator.page(paginator.num_pages)
 
-        headers = ['Year', 'Person', 'Type']
-        headers_index = {'Year': 0, 'Person': 1, 'Type': 2}
-        data = []
+        line_items = line_items_by_entry(e.id for e in entries_paginated)
+        table = Table(headers=['Year', 'Person', 'Type'])
         for entry in entries_paginated:
-            row = ['']*len(headers)
-            row[0] = entry.release.date.year
-            row[1] = entry.person
-            row[2] = entry.category.name
-
-            for entrylineitem in entry.line_items.all():
-                if entrylineitem.key not in headers:
-                    headers_index[entrylineitem.key] = len(headers)
-                    headers.append(entrylineitem.key)
-                    row.append('')
-
-                row[headers_index[entrylineitem.key]] = entrylineitem.value
+            table.add_row(
+                line_items[entry.id],
+                cells=[entry.release.date.year, entry.person, entry.category.name])
 
-            data.append(row)
+        data = table.data
+        headers = table.headers
 
         context['data'] = data
         context['headers'] = headers